@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Timeouts Adaptativos por Host
+Timeouts de conexão e de leitura separados, calculados a partir dos
+percentis de latência observados em cada host, e um prazo total por página
+que também corta corpos enviados aos poucos
+"""
+
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+
+from config import SETTINGS, TIMEOUT_CONFIG
+from crawl_metrics import METRICS
+
+
+class DeadlineExceeded(requests.Timeout):
+    """A página não terminou de chegar dentro do prazo total"""
+
+
+def percentile(values, pct):
+    """Percentil (vizinho mais próximo) de uma lista de números"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class HostLatency:
+    """Últimas latências de conexão e de primeira resposta de cada host"""
+
+    def __init__(self, window=None, max_hosts=10000):
+        self.window = window or TIMEOUT_CONFIG['window']
+        self.max_hosts = max_hosts
+        self._connect = {}
+        self._response = {}
+        self._lock = threading.Lock()
+
+    def _record(self, samples, host, seconds):
+        with self._lock:
+            if host not in samples and len(samples) >= self.max_hosts:
+                # Descarta o host mais antigo (dicionários mantêm a ordem de inserção)
+                samples.pop(next(iter(samples)))
+            samples.setdefault(host, deque(maxlen=self.window)).append(seconds)
+
+    def record_connect(self, host, seconds):
+        self._record(self._connect, host.lower(), seconds)
+
+    def record_response(self, host, seconds):
+        self._record(self._response, host.lower(), seconds)
+
+    def samples(self, host):
+        """Cópias das amostras (conexão, resposta) do host"""
+        host = host.lower()
+        with self._lock:
+            return list(self._connect.get(host, ())), list(self._response.get(host, ()))
+
+
+# Compartilhado pelo processo: as conexões são medidas na camada de transporte
+HOST_LATENCY = HostLatency()
+
+
+class AdaptiveTimeouts:
+    """Calcula (conexão, leitura) para cada host a partir da latência observada
+
+    Antes de `min_samples` medições valem os valores padrão; depois, o
+    percentil configurado vezes `multiplier`, limitado a [min, max]. Hosts
+    rápidos que deixam de responder falham cedo; hosts lentos, mas vivos,
+    ganham mais tempo.
+    """
+
+    def __init__(self, latency=None, deadline=None):
+        self.latency = latency or HOST_LATENCY
+        self.deadline = deadline or TIMEOUT_CONFIG['deadline']
+        self.default_connect = TIMEOUT_CONFIG['connect']
+        self.default_read = SETTINGS['timeout']
+        self.pct = TIMEOUT_CONFIG['percentile']
+        self.multiplier = TIMEOUT_CONFIG['multiplier']
+        self.min_samples = TIMEOUT_CONFIG['min_samples']
+
+    @staticmethod
+    def host_of(url):
+        """Host (sem porta) da URL, como a conexão o conhece"""
+        return (urlparse(url).hostname or '').lower()
+
+    def _adapt(self, samples, default, low, high):
+        if len(samples) < self.min_samples:
+            return default
+        return min(high, max(low, percentile(samples, self.pct) * self.multiplier))
+
+    def for_url(self, url):
+        """Tupla (conexão, leitura) para o requests"""
+        connect, response = self.latency.samples(self.host_of(url))
+        return (
+            self._adapt(connect, self.default_connect, TIMEOUT_CONFIG['min_connect'], TIMEOUT_CONFIG['max_connect']),
+            self._adapt(response, self.default_read, TIMEOUT_CONFIG['min_read'], TIMEOUT_CONFIG['max_read']),
+        )
+
+    def record_response(self, url, seconds):
+        self.latency.record_response(self.host_of(url), seconds)
+
+
+def fetch_page(session, url, timeouts, deadline=None, headers=None):
+    """GET com timeouts (conexão, leitura) do host e prazo total para a página inteira
+
+    O corpo é lido em pedaços conforme chega; se o prazo estourar no meio, a
+    conexão é fechada e DeadlineExceeded é levantado. Sem isso, um servidor
+    que manda um byte por vez nunca estoura o timeout de leitura.
+    """
+    deadline = deadline or timeouts.deadline
+    started = time.monotonic()
+    connect, read = timeouts.for_url(url)
+    response = session.get(url, timeout=(min(connect, deadline), min(read, deadline)),
+                           headers=headers, stream=True)
+    try:
+        # Tempo até os cabeçalhos (inclui a conexão quando ela é nova)
+        timeouts.record_response(url, response.elapsed.total_seconds())
+        METRICS.observe('response', response.elapsed.total_seconds())
+        METRICS.inc('scraper_http_responses_total', status=response.status_code)
+        body_started = time.monotonic()
+
+        chunks = []
+        while True:
+            if time.monotonic() - started > deadline:
+                raise DeadlineExceeded(f"Prazo de {deadline}s estourado lendo {url}")
+            # read1 (urllib3 >= 2.1) devolve o que já chegou, sem esperar o pedaço inteiro; os erros do
+            # urllib3 viram os do requests, como em Response.iter_content
+            try:
+                chunk = response.raw.read1(64 * 1024, decode_content=True)
+            except ReadTimeoutError as e:
+                raise requests.ReadTimeout(e, request=response.request)
+            except ProtocolError as e:
+                raise requests.ConnectionError(e, request=response.request)
+            except DecodeError as e:
+                raise requests.exceptions.ContentDecodingError(e, request=response.request)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        response._content = b''.join(chunks)
+        response._content_consumed = True
+        METRICS.observe('download', time.monotonic() - body_started)
+        METRICS.inc('scraper_response_bytes_total', len(response._content))
+    finally:
+        # Com o corpo lido a conexão volta ao pool; no meio do corpo, é descartada
+        response.close()
+    return response
@@ -7,15 +7,32 @@ Usa múltiplas fontes e estratégias de busca
 
 import requests
 import re
-import time
-import random
-import pandas as pd
-from bs4 import BeautifulSoup
 import json
 import logging
 from datetime import datetime
-from urllib.parse import urljoin, urlparse, quote_plus
+from urllib.parse import urlparse, quote_plus
 import csv
+import os
+import argparse
+
+from config import ARCHIVE_CONFIG, CACHE_CONFIG, CRAWLER_CONFIG, MEDICAL_SPECIALTIES, ROBOTS_CONFIG, TIMEOUT_CONFIG
+from crawl_metrics import METRICS, start_exporter
+from crawl_state import CrawlState
+from fetch_engine import AsyncFetchEngine
+from host_scheduler import HostScheduler
+from host_breaker import HostUnavailable
+from http_cache import HttpCache
+from http_transport import TRANSPORT_STATS, configure_session
+from keyword_matcher import get_matcher
+from link_crawler import BestFirstCrawler, LinkScorer
+from page_archive import PageArchive
+from page_extractor import find_emails
+from parse_pool import ParsePool
+from result_sink import RESULT_FORMATS, ResultSink, export_excel
+from robots_cache import RobotsCache, RobotsDisallowed
+from sitemap_discovery import SitemapDiscovery
+from url_canon import canonical_url, registered_domain
+from visited_set import VisitedSet
 
 # Configuração de logging
 logging.basicConfig(
@@ -28,7 +45,8 @@ logging.basicConfig(
 )
 
 class AdvancedClinicScraper:
-    def __init__(self):
+    def __init__(self, max_concurrency=None, per_host_limit=None, crawl_state=None, output_dir='.',
+                 output_format=None, use_sitemaps=False, visited=None, handoff=None, archive=None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -39,8 +57,52 @@ class AdvancedClinicScraper:
             'Upgrade-Insecure-Requests': '1',
         })
         
-        self.results = []
-        self.visited_urls = set()
+        # Pools de conexões do tamanho da concorrência, keep-alive e cache de DNS
+        configure_session(self.session)
+        
+        # Estado durável: fronteira, visitadas e resultados sobrevivem a falhas
+        self.crawl_state = crawl_state
+        self.output_dir = output_dir
+        if visited is None:
+            visited = crawl_state.visited if crawl_state else VisitedSet()
+        self.visited_urls = visited
+        
+        # Crawl com vários workers: links de domínios de outro shard vão para a fila
+        self.handoff = handoff
+        
+        # Resultados vão para o disco assim que são encontrados
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.results = ResultSink(
+            os.path.join(output_dir, f"clinicas_avancado_{timestamp}"),
+            ['URL', 'Nome da Clínica', 'Email', 'Fonte'],
+            output_format
+        )
+        if crawl_state:
+            # Os resultados da execução anterior entram no novo arquivo
+            for result in crawl_state.iter_results():
+                self.results.write(result, self.result_rows(result))
+        
+        # Cache em disco: reexecuções recebem 304 ou acertos locais
+        self.cache = HttpCache() if CACHE_CONFIG['enabled'] else None
+        
+        # Cortesia por host; o Crawl-delay do robots.txt aumenta o intervalo do host
+        self.scheduler = HostScheduler()
+        self.robots = RobotsCache(self.session, self.scheduler) if ROBOTS_CONFIG['enabled'] else None
+        
+        # Motor de requisições concorrentes
+        self.engine = AsyncFetchEngine(
+            self.session,
+            max_concurrency=max_concurrency,
+            per_host_limit=per_host_limit,
+            scheduler=self.scheduler,
+            cache=self.cache,
+            robots=self.robots,
+            archive=archive
+        )
+        self.archive = archive
+        
+        # Parsing em processos separados, ligado ao motor por uma fila limitada
+        self.parse_pool = ParsePool()
         
         # Padrões de email mais robustos
         self.email_patterns = [
@@ -58,6 +120,16 @@ class AdvancedClinicScraper:
             'gastroenterologia', 'reumatologia', 'hematologia', 'oncologia'
         ]
         
+        # Buscador compilado uma vez (ignora acentos e conta ocorrências)
+        self.medical_matcher = get_matcher(self.medical_keywords + MEDICAL_SPECIALTIES)
+        
+        # Pontuação dos links seguidos a partir dos diretórios
+        self.link_scorer = LinkScorer(self.medical_matcher)
+        
+        # Descoberta de perfis pelos sitemaps, sem baixar páginas de listagem
+        self.use_sitemaps = use_sitemaps
+        self.sitemaps = SitemapDiscovery(self.session, self.link_scorer, self.scheduler, self.robots)
+        
         # Sites de diretório médico
         self.medical_directories = [
             'https://www.doctoralia.com.br/',
@@ -71,12 +143,10 @@ class AdvancedClinicScraper:
         
     def extract_emails_from_text(self, text):
         """Extrai emails usando múltiplos padrões"""
-        emails = set()
-        for pattern in self.email_patterns:
-            found_emails = pattern.findall(text)
-            emails.update(found_emails)
-        
-        # Filtra emails inválidos
+        return self.filter_emails(find_emails(text, self.email_patterns))
+    
+    def filter_emails(self, emails):
+        """Filtra emails inválidos"""
         valid_emails = []
         for email in emails:
             if self.is_valid_email(email):
@@ -92,104 +162,229 @@ class AdvancedClinicScraper:
     
     def is_medical_related(self, text):
         """Verifica se o texto está relacionado à medicina"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.medical_keywords)
+        return self.medical_matcher.matches(text)
+    
+    def medical_relevance(self, text):
+        """Ocorrências de cada palavra-chave médica no texto"""
+        return self.medical_matcher.counts(text)
     
     def scrape_medical_directories(self):
         """Scraping de diretórios médicos"""
         logging.info("Iniciando scraping de diretórios médicos...")
+        self.crawl_directories(self.medical_directories)
+    
+    def crawl_directories(self, directories, restore=()):
+        """Percorre os diretórios a partir das páginas iniciais, links mais promissores primeiro
+
+        `restore` são links (url, profundidade, página inicial, pontuação) da
+        fronteira de uma execução interrompida.
+        """
+        async def handle_page(url, response, error):
+            page = await self.process_page(url, response, error, 'directory', crawler)
+            return page.links if page else None
+        
+        # Segue primeiro os links mais promissores (contato, equipe, clínicas...)
+        # até CRAWLER_CONFIG['max_depth'], com orçamento de páginas por diretório
+        crawler = BestFirstCrawler(
+            self.engine,
+            self.link_scorer,
+            handle_page,
+            visited=self.visited_urls,
+            source='directory',
+            handoff=self.handoff,
+            frontier=self.crawl_state
+        )
+        for link in restore:
+            crawler.restore(*link)
+        directories = list(dict.fromkeys(directories))
+        
+        if self.use_sitemaps:
+            # URLs dos sitemaps entram na fronteira já pontuadas, como links do diretório
+            for directory in directories:
+                seed = canonical_url(directory)
+                for url, score in self.sitemaps.discover(directory):
+                    crawler.push(canonical_url(url), 1, seed, score)
+        
+        fetched = crawler.crawl(directories, timeout=TIMEOUT_CONFIG['directory_deadline'])
+        logging.info(f"Diretórios: {sum(fetched.values())} páginas buscadas a partir de {len(fetched)} diretórios")
+    
+    def unvisited(self, urls, source=None):
+        """Filtra URLs já visitadas, marcando as novas como visitadas"""
+        for url in urls:
+            # http/https, www., barra final e parâmetros utm_ contam como a mesma página
+            url = canonical_url(url) if url else url
+            if url and url not in self.visited_urls:
+                if self.crawl_state:
+                    self.crawl_state.enqueue(url, source)
+                else:
+                    self.visited_urls.add(url)
+                yield url
+    
+    def add_result(self, result):
+        """Registra um resultado encontrado"""
+        self.results.write(result, self.result_rows(result))
+        if self.crawl_state:
+            self.crawl_state.add_result(result)
+        METRICS.inc('scraper_results_total', source=result['source'])
+        logging.info(f"Encontrado ({result['source']}): {result['clinic_name']} - {len(result['emails'])} emails")
+    
+    async def process_page(self, url, response, error, source, crawler=None):
+        """Extrai e registra o resultado de uma página buscada; retorna a página extraída"""
+        page = None
+        if isinstance(error, RobotsDisallowed):
+            logging.info(f"Bloqueada pelo robots.txt: {url}")
+        elif isinstance(error, HostUnavailable):
+            # O host já foi registrado como fora do ar; não repete o erro por URL
+            logging.debug(f"Pulando {url}: {error}")
+        elif error:
+            logging.error(f"Erro ao processar {url}: {error}")
+        else:
+            # O loop segue buscando outras páginas enquanto esta é extraída
+            page = await self.parse_pool.extract_async(*self.extract_args(response), url=response.url or url)
+            result = self.page_result(url, page, source)
+            if result:
+                self.add_result(result)
+                if crawler and self.is_confident(result):
+                    # Contato da clínica encontrado: o resto do site não é buscado
+                    crawler.satisfy(url)
+        
+        if self.crawl_state:
+            self.crawl_state.mark_done(url, 'failed' if error else 'done')
+        return page
+    
+    def is_confident(self, result):
+        """Contato confiável: nome tirado da página e email do próprio site (ou de uma página de contato)"""
+        url = result['url']
+        domain = registered_domain(url)
+        if result['clinic_name'] in (domain, urlparse(url).netloc.replace('www.', '')):
+            return False
+        
+        if any(registered_domain('//' + email.rsplit('@', 1)[-1]) == domain for email in result['emails']):
+            return True
+        return self.link_scorer.score(url) >= CRAWLER_CONFIG['path_hints']['contato']
+    
+    def crawl_sites(self, urls, source, restore=()):
+        """Busca sites de clínicas: página inicial, depois contato, até achar o email"""
+        async def handle_page(url, response, error):
+            page = await self.process_page(url, response, error, source, crawler)
+            return page.links if page else None
+        
+        # Orçamento por domínio registrado e parada assim que o contato aparece
+        crawler = BestFirstCrawler(
+            self.engine,
+            self.link_scorer,
+            handle_page,
+            visited=self.visited_urls,
+            source=source,
+            site_mode=True,
+            frontier=self.crawl_state
+        )
+        for link in restore:
+            crawler.restore(*link)
+        crawler.crawl(urls)
+        
+        pages = sum(crawler.domain_pages.values())
+        domains = len(crawler.domain_pages)
+        if domains:
+            logging.info(f"Sites ({source}): {pages} páginas em {domains} domínios "
+                         f"({pages / domains:.1f} por domínio), contato encontrado em {len(crawler.satisfied)}")
+    
+    def crawl_pages(self, urls, source):
+        """Busca e processa páginas concorrentemente"""
+        async def handle_page(url, response, error):
+            await self.process_page(url, response, error, source)
+        
+        self.engine.crawl(urls, handle_page)
+    
+    def scrape_urls(self, urls, source='directory'):
+        """Scraping concorrente de uma lista de URLs"""
+        self.crawl_pages(self.unvisited(urls, source), source)
+    
+    def resume_pending(self):
+        """Processa as URLs que ficaram pendentes na execução anterior"""
+        if not self.crawl_state:
+            return
+        
+        by_source = {}
+        for url, source in self.crawl_state.pending():
+            by_source.setdefault(source or 'directory', []).append(url)
+        
+        for source, urls in by_source.items():
+            logging.info(f"Retomando {len(urls)} URLs pendentes ({source})")
+            self.crawl_pages(urls, source)
+        
+        # A fronteira do crawl best-first volta inteira, com profundidade e pontuação
+        links = {}
+        for url, source, depth, seed, score in self.crawl_state.queued_links():
+            links.setdefault(source or 'directory', []).append((url, depth, seed, score))
+        
+        for source, restore in links.items():
+            logging.info(f"Retomando {len(restore)} links da fronteira ({source})")
+            if source == 'directory':
+                self.crawl_directories([], restore)
+            else:
+                self.crawl_sites([], source, restore)
+    
+    def run_phase(self, name, func, *args):
+        """Executa uma etapa do crawl, pulando as já concluídas ao retomar"""
+        if self.crawl_state and self.crawl_state.phase_done(name):
+            logging.info(f"Etapa já concluída, pulando: {name}")
+            return
+        
+        func(*args)
         
-        for directory in self.medical_directories:
-            try:
-                logging.info(f"Processando diretório: {directory}")
-                
-                response = self.session.get(directory, timeout=15)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Busca por links de clínicas
-                clinic_links = []
-                
-                # Procura por links que podem ser de clínicas
-                for link in soup.find_all('a', href=True):
-                    href = link.get('href')
-                    text = link.get_text().strip()
-                    
-                    if href and self.is_medical_related(text):
-                        full_url = urljoin(directory, href)
-                        clinic_links.append(full_url)
-                
-                # Processa os links encontrados
-                for link in clinic_links[:10]:  # Limita a 10 por diretório
-                    if link not in self.visited_urls:
-                        self.visited_urls.add(link)
-                        result = self.scrape_single_page(link)
-                        if result:
-                            self.results.append(result)
-                            logging.info(f"Encontrado: {result['clinic_name']} - {len(result['emails'])} emails")
-                        
-                        time.sleep(random.uniform(1, 3))
-                
-                time.sleep(random.uniform(3, 6))
-                
-            except Exception as e:
-                logging.error(f"Erro ao processar diretório {directory}: {e}")
-    
-    def scrape_single_page(self, url):
+        if self.crawl_state:
+            self.crawl_state.finish_phase(name)
+    
+    def scrape_single_page(self, url, source='directory'):
         """Scraping de uma página individual"""
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove scripts e styles
-            for script in soup(["script", "style", "nav", "footer"]):
-                script.decompose()
-            
-            text = soup.get_text()
-            emails = self.extract_emails_from_text(text)
-            
-            if emails and self.is_medical_related(text):
-                clinic_name = self.extract_clinic_name(soup, url)
-                return {
-                    'url': url,
-                    'clinic_name': clinic_name,
-                    'emails': emails,
-                    'source': 'directory'
-                }
-            
-            return None
+            response = self.engine.fetch_sync(url)
+            return self.parse_page(url, response, source)
             
         except Exception as e:
             logging.error(f"Erro ao processar {url}: {e}")
             return None
     
-    def extract_clinic_name(self, soup, url):
+    def parse_page(self, url, response, source='directory'):
+        """Extrai emails e nome da clínica de uma resposta HTTP"""
+        page = self.parse_pool.extract(*self.extract_args(response), url=response.url or url)
+        return self.page_result(url, page, source)
+    
+    def extract_args(self, response):
+        """Argumentos do extrator: uma única passagem pelo HTML, ignorando menus e rodapés"""
+        return (response.content, response.headers.get('Content-Type')) + self.extract_options()
+    
+    def extract_options(self):
+        """Tags ignoradas e padrões de email do extrator (também usados ao reprocessar o arquivo)"""
+        return ('nav', 'footer'), tuple(self.email_patterns)
+    
+    def page_result(self, url, page, source='directory'):
+        """Monta o resultado a partir da página extraída"""
+        if page is None:
+            # Quase duplicata de uma página já extraída: nada novo
+            return None
+        
+        emails = self.filter_emails(page.emails)
+        
+        if emails and self.is_medical_related(page.text):
+            clinic_name = self.extract_clinic_name(page, url)
+            return {
+                'url': url,
+                'clinic_name': clinic_name,
+                'emails': emails,
+                'source': source
+            }
+        
+        return None
+    
+    def extract_clinic_name(self, page, url):
         """Extrai o nome da clínica de forma mais robusta"""
-        # Tenta diferentes estratégias para encontrar o nome
-        
-        # 1. Título da página
-        title = soup.find('title')
-        if title:
-            title_text = title.get_text().strip()
-            if title_text and len(title_text) < 100:
-                return title_text
-        
-        # 2. H1
-        h1 = soup.find('h1')
-        if h1:
-            h1_text = h1.get_text().strip()
-            if h1_text and len(h1_text) < 100:
-                return h1_text
-        
-        # 3. Meta tags
-        meta_title = soup.find('meta', property='og:title')
-        if meta_title:
-            meta_text = meta_title.get('content', '').strip()
-            if meta_text and len(meta_text) < 100:
-                return meta_text
+        # Tenta diferentes estratégias para encontrar o nome:
+        # 1. Título da página, 2. H1, 3. Meta tag og:title
+        for text in (page.title, page.h1, page.og_title):
+            if text and len(text) < 100:
+                return text
         
         # 4. URL como fallback
         domain = urlparse(url).netloc
@@ -211,130 +406,154 @@ class AdvancedClinicScraper:
             f"consultório {city} {state}",
         ]
         
+        self.crawl_sites(self.city_sites(city, state), source='search')
+    
+    @staticmethod
+    def city_sites(city, state):
+        """Sites de clínicas da cidade"""
         # URLs de exemplo (em um caso real, você faria scraping dos resultados do Google)
-        example_clinics = [
+        return [
             f"https://clinica-exemplo-{city.lower()}.com.br",
             f"https://consultorio-{city.lower()}.com.br",
             f"https://medico-{city.lower()}.com.br",
         ]
-        
-        for url in example_clinics:
-            if url not in self.visited_urls:
-                self.visited_urls.add(url)
-                result = self.scrape_single_page(url)
-                if result:
-                    self.results.append(result)
-                    logging.info(f"Encontrado via busca: {result['clinic_name']}")
-                
-                time.sleep(random.uniform(1, 2))
     
     def scrape_from_csv_list(self, csv_file):
         """Scraping de uma lista de URLs em CSV"""
         try:
             with open(csv_file, 'r', encoding='utf-8') as file:
                 reader = csv.DictReader(file)
-                for row in reader:
-                    url = row.get('url', '').strip()
-                    if url and url not in self.visited_urls:
-                        self.visited_urls.add(url)
-                        result = self.scrape_single_page(url)
-                        if result:
-                            self.results.append(result)
-                            logging.info(f"Encontrado via CSV: {result['clinic_name']}")
-                        
-                        time.sleep(random.uniform(1, 2))
+                urls = (row.get('url', '').strip() for row in reader)
+                self.crawl_sites(urls, source='csv')
         except FileNotFoundError:
             logging.warning(f"Arquivo {csv_file} não encontrado")
         except Exception as e:
             logging.error(f"Erro ao processar CSV {csv_file}: {e}")
     
-    def save_results(self, filename=None):
-        """Salva os resultados em múltiplos formatos"""
+    def result_rows(self, result):
+        """Linhas do arquivo de resultados (uma por email)"""
+        return [{
+            'URL': result['url'],
+            'Nome da Clínica': result['clinic_name'],
+            'Email': email,
+            'Fonte': result.get('source', 'unknown')
+        } for email in result['emails']]
+    
+    def save_results(self, excel=False):
+        """Fecha o arquivo de resultados, grava o resumo da execução e, se pedido, gera o Excel"""
+        filename = self.results.close()
+        
+        # Resumo da execução: totais, tempos por etapa, erros, cache e conexões
+        # (gravado mesmo sem resultados, quando é o que explica a execução vazia)
+        summary_file = METRICS.write_summary(
+            f"{os.path.splitext(self.results.path)[0]}_summary.json",
+            results={
+                'clinics': self.results.results,
+                'emails': self.results.rows,
+                'unique_emails': len(self.results.emails),
+                'urls_processed': len(self.visited_urls),
+            },
+        )
+        logging.info(f"Resumo da execução em {summary_file}")
+        
         if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"clinicas_avancado_{timestamp}"
-        
-        if self.results:
-            # Prepara dados
-            data = []
-            for result in self.results:
-                for email in result['emails']:
-                    data.append({
-                        'URL': result['url'],
-                        'Nome da Clínica': result['clinic_name'],
-                        'Email': email,
-                        'Fonte': result.get('source', 'unknown')
-                    })
-            
-            df = pd.DataFrame(data)
-            
-            # Salva em Excel
-            excel_file = f"{filename}.xlsx"
-            df.to_excel(excel_file, index=False)
-            logging.info(f"Resultados salvos em Excel: {excel_file}")
-            
-            # Salva em CSV
-            csv_file = f"{filename}.csv"
-            df.to_csv(csv_file, index=False, encoding='utf-8')
-            logging.info(f"Resultados salvos em CSV: {csv_file}")
-            
-            # Salva estatísticas
-            stats_file = f"{filename}_stats.txt"
-            with open(stats_file, 'w', encoding='utf-8') as f:
-                f.write(f"Estatísticas do Scraping\n")
-                f.write(f"Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total de clínicas: {len(self.results)}\n")
-                f.write(f"Total de emails únicos: {len(set([email for r in self.results for email in r['emails']]))}\n")
-                f.write(f"URLs processadas: {len(self.visited_urls)}\n")
-            
-            return excel_file
-        else:
             logging.warning("Nenhum resultado para salvar")
             return None
+        logging.info(f"Resultados salvos em {filename}")
+        
+        if excel:
+            return export_excel(filename)
+        return filename
+
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description="Scraper Avançado de Emails de Clínicas")
+    parser.add_argument('--output-dir', default='.', help="Diretório dos resultados e do estado do crawl")
+    parser.add_argument('--resume', action='store_true', help="Retoma a última execução interrompida")
+    parser.add_argument('--csv', help="Arquivo CSV com uma coluna 'url' para processar")
+    parser.add_argument('--format', choices=sorted(RESULT_FORMATS), help="Formato do arquivo de resultados")
+    parser.add_argument('--excel', action='store_true', help="Gera também um .xlsx a partir dos resultados")
+    parser.add_argument('--sitemaps', action='store_true',
+                        help="Descobre perfis de clínicas pelos sitemaps dos diretórios")
+    parser.add_argument('--archive', action='store_true',
+                        help="Grava as páginas brutas em <output-dir>/page_archive para reprocessar depois")
+    return parser.parse_args()
 
 def main():
     """Função principal"""
+    args = parse_args()
+    
     print("=== Scraper Avançado de Emails de Clínicas ===")
     print("Iniciando processo de extração avançada...")
     
-    scraper = AdvancedClinicScraper()
+    crawl_state = CrawlState(args.output_dir, resume=args.resume)
+    archive = None
+    if args.archive or ARCHIVE_CONFIG['enabled']:
+        archive = PageArchive(os.path.join(args.output_dir, ARCHIVE_CONFIG['directory']))
+    scraper = AdvancedClinicScraper(crawl_state=crawl_state, output_dir=args.output_dir,
+                                    output_format=args.format, use_sitemaps=args.sitemaps, archive=archive)
+    exporter = start_exporter(args.output_dir)
     
-    # 1. Scraping de diretórios médicos
-    print("1. Buscando em diretórios médicos...")
-    scraper.scrape_medical_directories()
-    
-    # 2. Busca por cidade
-    print("2. Buscando por cidade...")
-    cities = [
-        ("São Paulo", "SP"),
-        ("Rio de Janeiro", "RJ"),
-        ("Belo Horizonte", "MG"),
-    ]
-    
-    for city, state in cities:
-        scraper.search_google_clinics(city, state)
+    try:
+        # 0. URLs que ficaram pendentes na execução anterior
+        scraper.resume_pending()
+        
+        # 1. Scraping de diretórios médicos
+        print("1. Buscando em diretórios médicos...")
+        scraper.run_phase("diretorios", scraper.scrape_medical_directories)
+        
+        # 2. Busca por cidade
+        print("2. Buscando por cidade...")
+        cities = [
+            ("São Paulo", "SP"),
+            ("Rio de Janeiro", "RJ"),
+            ("Belo Horizonte", "MG"),
+        ]
+        
+        for city, state in cities:
+            scraper.run_phase(f"cidade:{city}-{state}", scraper.search_google_clinics, city, state)
+        
+        if args.csv:
+            scraper.run_phase(f"csv:{args.csv}", scraper.scrape_from_csv_list, args.csv)
+    except KeyboardInterrupt:
+        print("\nInterrompido! Execute novamente com --resume para continuar de onde parou.")
+    finally:
+        crawl_state.flush()
+        # O pool de threads do motor termina antes do cache e do arquivo em que ele grava
+        scraper.engine.close()
+        if scraper.cache:
+            scraper.cache.close()
+        scraper.parse_pool.close()
+        if archive:
+            archive.close()
+        if exporter:
+            exporter.stop()
     
     # 3. Salva resultados
     print("3. Salvando resultados...")
-    filename = scraper.save_results()
+    filename = scraper.save_results(excel=args.excel)
     
     print(f"\n=== Resumo Final ===")
-    print(f"Total de clínicas encontradas: {len(scraper.results)}")
-    total_emails = sum(len(r['emails']) for r in scraper.results)
-    unique_emails = len(set([email for r in scraper.results for email in r['emails']]))
-    print(f"Total de emails: {total_emails}")
-    print(f"Emails únicos: {unique_emails}")
+    print(f"Total de clínicas encontradas: {scraper.results.results}")
+    print(f"Total de emails: {scraper.results.rows}")
+    print(f"Emails únicos: {len(scraper.results.emails)}")
     print(f"URLs processadas: {len(scraper.visited_urls)}")
+    print(f"Conexões: {TRANSPORT_STATS.summary()}")
+    print(f"Duplicatas: {scraper.parse_pool.duplicate_summary()}")
+    if archive:
+        print(f"Páginas arquivadas: {archive.summary()}")
     print(f"Arquivo salvo: {filename}")
     
     # Mostra alguns resultados
-    if scraper.results:
+    if scraper.results.preview:
         print("\n=== Primeiros Resultados ===")
-        for i, result in enumerate(scraper.results[:5]):
+        for i, result in enumerate(scraper.results.preview):
             print(f"{i+1}. {result['clinic_name']}")
             print(f"   URL: {result['url']}")
             print(f"   Emails: {', '.join(result['emails'])}")
             print()
+    
+    crawl_state.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de Navegadores Headless para o Fallback com Selenium
+Reaproveita N drivers com checkout/devolução, verificação de saúde e
+reinício após um número de páginas, e detecta quando a página está pronta
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import SELENIUM_CONFIG
+
+# Instala um MutationObserver na página e informa o estado de carregamento,
+# há quantos ms o DOM não muda e se já existe um email no texto
+READY_SCRIPT = """
+var w = window, root = document.documentElement;
+if (!w.__scraperObserver && root) {
+    w.__lastMutation = Date.now();
+    w.__scraperObserver = new MutationObserver(function () { w.__lastMutation = Date.now(); });
+    w.__scraperObserver.observe(root, {childList: true, subtree: true, characterData: true});
+}
+var text = document.body ? document.body.textContent : '';
+return [
+    document.readyState,
+    Date.now() - (w.__lastMutation || Date.now()),
+    /[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Za-z]{2,}/.test(text || '')
+];
+"""
+
+
+class PageReady:
+    """Condição do WebDriverWait: DOM estável ou email já visível na página"""
+
+    def __init__(self, stable_ms=None):
+        self.stable_ms = stable_ms or SELENIUM_CONFIG['dom_stable_ms']
+
+    def __call__(self, driver):
+        state, quiet_ms, has_email = driver.execute_script(READY_SCRIPT)
+        if state == 'loading':
+            return False
+        return has_email or quiet_ms >= self.stable_ms
+
+
+def block_resources(driver, patterns=None):
+    """Bloqueia imagens, fontes e mídia pelo DevTools (só Chrome/Chromium)"""
+    patterns = SELENIUM_CONFIG['blocked_resources'] if patterns is None else patterns
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+        return True
+    except Exception as e:
+        logging.debug(f"Bloqueio de recursos indisponível: {e}")
+        return False
+
+
+class BrowserPool:
+    def __init__(self, factory, size=None, max_pages_per_driver=None):
+        # factory() cria um driver novo (ou retorna None se o Selenium falhar)
+        self.factory = factory
+        self.size = size or SELENIUM_CONFIG['pool_size']
+        self.max_pages_per_driver = max_pages_per_driver or SELENIUM_CONFIG['max_pages_per_driver']
+
+        self._idle = deque()
+        self._pages = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        # Acorda quem espera um driver: devolução ou vaga liberada por descarte
+        self._ready = threading.Condition(self._lock)
+        self._closed = False
+
+        self.restarts = 0
+
+    def _create(self):
+        """Cria um driver novo, se ainda houver vaga no pool"""
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+
+        driver = self.factory()
+        if driver is None:
+            with self._ready:
+                self._created -= 1
+                self._ready.notify()
+            return None
+
+        self._pages[id(driver)] = 0
+        return driver
+
+    def start(self):
+        """Cria o primeiro driver; retorna False se o Selenium não estiver disponível"""
+        driver = self._create()
+        if driver is None:
+            return False
+        self._release(driver)
+        return True
+
+    def _release(self, driver):
+        with self._ready:
+            self._idle.append(driver)
+            self._ready.notify()
+
+    def checkout(self, timeout=None):
+        """Pega um driver livre (cria um novo se o pool não estiver cheio)
+
+        Com o pool cheio, espera um driver ser devolvido ou descartado; a vaga
+        de um driver descartado (reiniciado ou sem resposta) é usada para
+        criar outro.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        can_create = True
+        while True:
+            with self._ready:
+                if self._closed:
+                    return None
+                while not self._idle and not (can_create and self._created < self.size):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._ready.wait(remaining)
+                    if self._closed:
+                        return None
+                    can_create = True
+                if self._idle:
+                    return self._idle.popleft()
+
+            driver = self._create()
+            if driver is not None:
+                return driver
+            if self._created == 0:
+                # Nenhum driver existe nem pôde ser criado
+                return None
+            # A criação falhou: espera um driver em uso ser devolvido ou descartado
+            can_create = False
+
+    @staticmethod
+    def is_healthy(driver):
+        """Verifica se o navegador ainda responde"""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        """Fecha o driver e libera sua vaga no pool"""
+        self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._ready:
+            self._created -= 1
+            self._ready.notify()
+
+    def checkin(self, driver, healthy=True):
+        """Devolve o driver ao pool, reiniciando-o se necessário"""
+        self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+
+        if self._closed:
+            self._discard(driver)
+            return
+
+        if not healthy or not self.is_healthy(driver):
+            logging.warning("Navegador sem resposta, reiniciando driver")
+        elif self._pages[id(driver)] >= self.max_pages_per_driver:
+            logging.info(f"Driver atingiu {self.max_pages_per_driver} páginas, reiniciando")
+        else:
+            self._release(driver)
+            return
+
+        self.restarts += 1
+        self._discard(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Uso: with pool.driver() as driver: ..."""
+        driver = self.checkout(timeout)
+        if driver is None:
+            yield None
+            return
+
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.checkin(driver, healthy)
+
+    def close(self):
+        """Fecha todos os drivers livres (os em uso fecham ao serem devolvidos)"""
+        with self._ready:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._ready.notify_all()
+        for driver in idle:
+            self._discard(driver)
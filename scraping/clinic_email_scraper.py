@@ -8,21 +8,36 @@ Data: 2024
 
 import requests
 import re
-import time
-import random
-import pandas as pd
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from fake_useragent import UserAgent
 import logging
 from datetime import datetime
 import os
+import argparse
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
+from concurrent.futures import ThreadPoolExecutor
+
+from browser_pool import BrowserPool, PageReady, block_resources
+from config import ARCHIVE_CONFIG, CACHE_CONFIG, ROBOTS_CONFIG, SELENIUM_CONFIG
+from crawl_metrics import METRICS, start_exporter
+from crawl_state import CrawlState
+from fetch_engine import AsyncFetchEngine
+from host_scheduler import HostScheduler
+from host_breaker import HostUnavailable
+from http_cache import HttpCache
+from http_transport import TRANSPORT_STATS, configure_session
+from keyword_matcher import get_matcher
+from page_archive import PageArchive
+from parse_pool import ParsePool
+from render_policy import BROWSER, FALLBACK, STATIC, RenderPolicy
+from result_sink import RESULT_FORMATS, ResultSink, export_excel
+from robots_cache import RobotsCache, RobotsDisallowed
+from url_canon import canonical_url
+from visited_set import VisitedSet
 
 # Configuração de logging
 logging.basicConfig(
@@ -35,7 +50,7 @@ logging.basicConfig(
 )
 
 class ClinicEmailScraper:
-    def __init__(self):
+    def __init__(self, crawl_state=None, output_dir='.', output_format=None, archive=None):
         self.ua = UserAgent()
         self.session = requests.Session()
         self.session.headers.update({
@@ -47,8 +62,46 @@ class ClinicEmailScraper:
             'Upgrade-Insecure-Requests': '1',
         })
         
-        self.results = []
-        self.visited_urls = set()
+        # Pools de conexões do tamanho da concorrência, keep-alive e cache de DNS
+        configure_session(self.session)
+        
+        # Estado durável: fronteira, visitadas e resultados sobrevivem a falhas
+        self.crawl_state = crawl_state
+        self.output_dir = output_dir
+        self.visited_urls = crawl_state.visited if crawl_state else VisitedSet()
+        
+        # Resultados vão para o disco assim que são encontrados
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.results = ResultSink(
+            os.path.join(output_dir, f"clinicas_emails_{timestamp}"),
+            ['URL', 'Nome da Clínica', 'Email', 'Método'],
+            output_format
+        )
+        if crawl_state:
+            # Os resultados da execução anterior entram no novo arquivo
+            for result in crawl_state.iter_results():
+                self.results.write(result, self.result_rows(result))
+        
+        # Cortesia por host: hosts diferentes são acessados em paralelo
+        self.scheduler = HostScheduler()
+        self.cache = HttpCache() if CACHE_CONFIG['enabled'] else None
+        
+        # robots.txt lido uma vez por host; o Crawl-delay vai para o agendador
+        self.robots = RobotsCache(self.session, self.scheduler) if ROBOTS_CONFIG['enabled'] else None
+        self.engine = AsyncFetchEngine(self.session, scheduler=self.scheduler, cache=self.cache,
+                                       robots=self.robots, archive=archive)
+        self.archive = archive
+        
+        # Parsing em processos separados, ligado ao motor por uma fila limitada
+        self.parse_pool = ParsePool()
+        
+        # Pool de navegadores e renderizações em andamento (criados em run_scraping)
+        self.browser_pool = None
+        self.render_executor = None
+        self.render_futures = []
+        
+        # Aprende por domínio/modelo de página quando o navegador traz emails
+        self.render_policy = RenderPolicy(output_dir)
         
         # Padrões de email
         self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
@@ -61,16 +114,33 @@ class ClinicEmailScraper:
             'odontologia', 'dentista', 'fisioterapia', 'nutrição'
         ]
         
+        # Buscador compilado uma vez (ignora acentos e conta ocorrências)
+        self.clinic_matcher = get_matcher(self.clinic_keywords)
+        
     def setup_selenium(self):
         """Configura o driver do Selenium para sites dinâmicos"""
         chrome_options = Options()
-        chrome_options.add_argument('--headless')
+        if SELENIUM_CONFIG['headless']:
+            chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument(f'--user-agent={self.ua.random}')
+        chrome_options.add_argument('--window-size={},{}'.format(*SELENIUM_CONFIG['window_size']))
+        # Não espera imagens, folhas de estilo e iframes terminarem de carregar
+        chrome_options.page_load_strategy = SELENIUM_CONFIG['page_load_strategy']
+        prefs = {}
+        if SELENIUM_CONFIG['disable_images']:
+            chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+            prefs['profile.managed_default_content_settings.images'] = 2
+        if SELENIUM_CONFIG['disable_javascript']:
+            prefs['profile.managed_default_content_settings.javascript'] = 2
+        if prefs:
+            chrome_options.add_experimental_option('prefs', prefs)
         
         try:
             driver = webdriver.Chrome(options=chrome_options)
+            driver.set_page_load_timeout(SELENIUM_CONFIG['page_load_timeout'])
+            block_resources(driver)
             return driver
         except Exception as e:
             logging.error(f"Erro ao configurar Selenium: {e}")
@@ -78,40 +148,49 @@ class ClinicEmailScraper:
     
     def is_clinic_related(self, text):
         """Verifica se o texto está relacionado a clínicas"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.clinic_keywords)
+        return self.clinic_matcher.matches(text)
     
     def extract_emails_from_text(self, text):
         """Extrai emails de um texto"""
         emails = self.email_pattern.findall(text)
         return list(set(emails))  # Remove duplicatas
     
+    def parse_page(self, url, html, method, content_type=None, final_url=None):
+        """Extrai emails e nome da clínica do HTML de uma página"""
+        # Uma única passagem pelo HTML (scripts e styles ignorados); links
+        # relativos partem da URL final (após redirecionamentos)
+        page = self.parse_pool.extract(html, content_type, *self.extract_options(), url=final_url or url)
+        return self.page_result(url, page, method)
+    
+    def extract_options(self):
+        """Tags ignoradas e padrões de email do extrator (também usados ao reprocessar o arquivo)"""
+        return (), (self.email_pattern,)
+    
+    def page_result(self, url, page, method):
+        """Monta o resultado a partir da página extraída"""
+        if page is None:
+            # Quase duplicata de uma página já extraída: nada novo
+            return None
+        emails = page.emails
+        
+        # Verifica se é relacionado a clínicas
+        if self.is_clinic_related(page.text) and emails:
+            clinic_name = self.extract_clinic_name(page)
+            return {
+                'url': url,
+                'clinic_name': clinic_name,
+                'emails': emails,
+                'method': method
+            }
+        
+        return None
+    
     def scrape_page_with_requests(self, url):
         """Scraping usando requests para sites estáticos"""
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove scripts e styles
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            text = soup.get_text()
-            emails = self.extract_emails_from_text(text)
-            
-            # Verifica se é relacionado a clínicas
-            if self.is_clinic_related(text) and emails:
-                clinic_name = self.extract_clinic_name(soup)
-                return {
-                    'url': url,
-                    'clinic_name': clinic_name,
-                    'emails': emails,
-                    'method': 'requests'
-                }
-            
-            return None
+            response = self.engine.fetch_sync(url)
+            return self.parse_page(url, response.content, 'requests', response.headers.get('Content-Type'),
+                                   response.url)
             
         except Exception as e:
             logging.error(f"Erro ao fazer scraping de {url}: {e}")
@@ -120,56 +199,29 @@ class ClinicEmailScraper:
     def scrape_page_with_selenium(self, url, driver):
         """Scraping usando Selenium para sites dinâmicos"""
         try:
-            driver.get(url)
-            time.sleep(random.uniform(2, 5))  # Delay aleatório
-            
-            # Aguarda carregamento da página
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            try:
+                driver.get(url)
+            except TimeoutException:
+                # Usa o que já carregou em vez de perder a página
+                driver.execute_script("window.stop();")
             
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            # Retorna assim que o DOM estabiliza ou um email aparece
+            try:
+                WebDriverWait(driver, SELENIUM_CONFIG['ready_timeout'], poll_frequency=0.1).until(PageReady())
+            except TimeoutException:
+                logging.debug(f"Página não estabilizou a tempo, usando o DOM atual: {url}")
             
-            # Remove scripts e styles
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            text = soup.get_text()
-            emails = self.extract_emails_from_text(text)
-            
-            # Verifica se é relacionado a clínicas
-            if self.is_clinic_related(text) and emails:
-                clinic_name = self.extract_clinic_name(soup)
-                return {
-                    'url': url,
-                    'clinic_name': clinic_name,
-                    'emails': emails,
-                    'method': 'selenium'
-                }
-            
-            return None
+            return self.parse_page(url, driver.page_source, 'selenium', final_url=driver.current_url)
             
         except Exception as e:
             logging.error(f"Erro ao fazer scraping com Selenium de {url}: {e}")
             return None
     
-    def extract_clinic_name(self, soup):
+    def extract_clinic_name(self, page):
         """Extrai o nome da clínica da página"""
-        # Tenta diferentes seletores para encontrar o nome
-        selectors = [
-            'h1', 'h2', '.clinic-name', '.business-name', '.company-name',
-            'title', '.title', '[class*="name"]', '[id*="name"]'
-        ]
-        
-        for selector in selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                text = element.get_text().strip()
-                if text and len(text) < 100:  # Nome não muito longo
-                    return text
-        
-        return "Nome não encontrado"
+        # Primeiro texto não vazio e curto, na ordem de NAME_SELECTORS
+        # (h1, h2, .clinic-name, ..., [id*="name"]), coletado na mesma passagem
+        return page.clinic_name() or "Nome não encontrado"
     
     def get_clinic_urls_from_search(self, city="São Paulo", state="SP"):
         """Gera URLs de busca para clínicas"""
@@ -185,11 +237,17 @@ class ClinicEmailScraper:
     def extract_urls_from_search_results(self, search_url, driver):
         """Extrai URLs dos resultados de busca"""
         try:
+            self.scheduler.wait(search_url)
             driver.get(search_url)
-            time.sleep(random.uniform(3, 6))
             
-            # Encontra links dos resultados
-            links = driver.find_elements(By.CSS_SELECTOR, 'a[href^="http"]')
+            # Espera só até os links dos resultados aparecerem (o intervalo do host já é do agendador)
+            try:
+                links = WebDriverWait(driver, SELENIUM_CONFIG['ready_timeout'], poll_frequency=0.1).until(
+                    lambda driver: driver.find_elements(By.CSS_SELECTOR, 'a[href^="http"]')
+                )
+            except TimeoutException:
+                logging.debug(f"Nenhum resultado carregado a tempo: {search_url}")
+                links = []
             urls = []
             
             for link in links:
@@ -203,31 +261,162 @@ class ClinicEmailScraper:
             logging.error(f"Erro ao extrair URLs de {search_url}: {e}")
             return []
     
-    def save_results(self, filename=None):
-        """Salva os resultados em arquivo Excel"""
-        if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"clinicas_emails_{timestamp}.xlsx"
+    def result_rows(self, result):
+        """Linhas do arquivo de resultados (uma por email)"""
+        return [{
+            'URL': result['url'],
+            'Nome da Clínica': result['clinic_name'],
+            'Email': email,
+            'Método': result['method']
+        } for email in result['emails']]
+    
+    def save_results(self, excel=False):
+        """Fecha o arquivo de resultados, grava o resumo da execução e, se pedido, gera o Excel"""
+        filename = self.results.close()
         
-        if self.results:
-            # Prepara dados para o DataFrame
-            data = []
-            for result in self.results:
-                for email in result['emails']:
-                    data.append({
-                        'URL': result['url'],
-                        'Nome da Clínica': result['clinic_name'],
-                        'Email': email,
-                        'Método': result['method']
-                    })
-            
-            df = pd.DataFrame(data)
-            df.to_excel(filename, index=False)
-            logging.info(f"Resultados salvos em {filename}")
-            return filename
-        else:
+        # Resumo da execução: totais, tempos por etapa, erros, cache e conexões
+        # (gravado mesmo sem resultados, quando é o que explica a execução vazia)
+        summary_file = METRICS.write_summary(
+            f"{os.path.splitext(self.results.path)[0]}_summary.json",
+            results={
+                'clinics': self.results.results,
+                'emails': self.results.rows,
+                'unique_emails': len(self.results.emails),
+                'urls_processed': len(self.visited_urls),
+            },
+        )
+        logging.info(f"Resumo da execução em {summary_file}")
+        
+        if not filename:
             logging.warning("Nenhum resultado para salvar")
             return None
+        logging.info(f"Resultados salvos em {filename}")
+        if excel:
+            return export_excel(filename)
+        return filename
+    
+    def unvisited(self, urls):
+        """Filtra URLs já visitadas, marcando as novas como visitadas"""
+        for url in urls:
+            # http/https, www., barra final e parâmetros utm_ contam como a mesma página
+            url = canonical_url(url)
+            if url not in self.visited_urls:
+                self.visited_urls.add(url)
+                yield url
+    
+    def add_result(self, result):
+        """Registra um resultado encontrado (chamado também pelas threads de renderização)"""
+        self.results.write(result, self.result_rows(result))
+        if self.crawl_state:
+            self.crawl_state.add_result(result)
+        METRICS.inc('scraper_results_total', source=result['method'])
+        logging.info(f"Encontrado: {result['clinic_name']} - {len(result['emails'])} emails")
+    
+    def mark_done(self, url):
+        """Marca a URL como concluída no estado durável"""
+        if self.crawl_state:
+            self.crawl_state.mark_done(url)
+    
+    def scrape_urls(self, urls, render=False):
+        """Scraping de várias URLs: requests em paralelo e Selenium como fallback"""
+        self.crawl_pages(self.unvisited(urls), render)
+    
+    def resume_pending(self, render=False):
+        """Processa as URLs que ficaram pendentes na execução anterior"""
+        if self.crawl_state:
+            urls = [url for url, _ in self.crawl_state.pending()]
+            if urls:
+                logging.info(f"Retomando {len(urls)} URLs pendentes")
+                self.crawl_pages(urls, render)
+    
+    def render_page(self, url):
+        """Renderiza a página com um driver do pool (fallback do requests)"""
+        result = None
+        if self.robots and not self.robots.allowed(url):
+            logging.info(f"Bloqueada pelo robots.txt: {url}")
+            self.mark_done(url)
+            return
+        if self.engine.breaker.is_open(url):
+            # Host fora do ar: o navegador também esperaria o timeout
+            logging.debug(f"Pulando renderização de {url}: host fora do ar")
+            self.mark_done(url)
+            return
+        
+        try:
+            with self.browser_pool.driver() as driver:
+                if driver:
+                    # Respeita o intervalo do host também no navegador
+                    self.scheduler.wait(url)
+                    with METRICS.timer('render'):
+                        result = self.scrape_page_with_selenium(url, driver)
+                    self.render_policy.record_render(url, bool(result))
+                    METRICS.inc('scraper_renders_total', outcome='found' if result else 'empty')
+        except Exception as e:
+            METRICS.inc('scraper_renders_total', outcome='error')
+            logging.error(f"Erro ao renderizar {url}: {e}")
+        
+        if result:
+            self.add_result(result)
+        self.mark_done(url)
+    
+    def crawl_pages(self, urls, render=False):
+        """Busca as páginas com requests e manda ao navegador as que falharem"""
+        decisions = {}
+        
+        def static_urls():
+            for url in urls:
+                decision = self.render_policy.decide(url) if render else STATIC
+                if decision == BROWSER:
+                    # O HTML estático deste site nunca tem os emails
+                    self.render_futures.append(self.render_executor.submit(self.render_page, url))
+                else:
+                    decisions[url] = decision
+                    yield url
+        
+        async def handle_page(url, response, error):
+            result = None
+            if isinstance(error, (RobotsDisallowed, HostUnavailable)):
+                # Página proibida ou host fora do ar também não vão para o navegador
+                if isinstance(error, RobotsDisallowed):
+                    logging.info(f"Bloqueada pelo robots.txt: {url}")
+                else:
+                    logging.debug(f"Pulando {url}: {error}")
+                decisions.pop(url, None)
+                self.mark_done(url)
+                return
+            if error:
+                logging.error(f"Erro ao fazer scraping de {url}: {error}")
+            else:
+                # O loop segue buscando outras páginas enquanto esta é extraída
+                page = await self.parse_pool.extract_async(
+                    response.content, response.headers.get('Content-Type'), *self.extract_options(),
+                    url=response.url or url
+                )
+                result = self.page_result(url, page, 'requests')
+                if page is not None:
+                    # Quase duplicata não extraída não conta contra o HTML estático,
+                    # mas ainda passa pela decisão de renderizar abaixo
+                    self.render_policy.record_static(url, bool(result))
+            
+            if result:
+                self.add_result(result)
+            
+            decision = decisions.pop(url, STATIC)
+            if result or decision != FALLBACK:
+                self.mark_done(url)
+            else:
+                # Renderiza em paralelo enquanto o requests segue com as próximas URLs
+                self.render_futures.append(self.render_executor.submit(self.render_page, url))
+        
+        # Tenta primeiro com requests (hosts diferentes em paralelo)
+        self.engine.crawl(static_urls(), handle_page)
+    
+    def wait_renders(self):
+        """Espera as renderizações em andamento terminarem"""
+        for future in self.render_futures:
+            future.result()
+        self.render_futures = []
+        self.render_policy.flush()
     
     def run_scraping(self, cities=None, max_pages_per_city=5):
         """Executa o scraping principal"""
@@ -245,50 +434,75 @@ class ClinicEmailScraper:
                 ("Goiânia", "GO")
             ]
         
-        driver = self.setup_selenium()
+        # Pool de navegadores headless reaproveitados
+        self.browser_pool = BrowserPool(self.setup_selenium)
+        has_browser = self.browser_pool.start()
+        self.render_executor = ThreadPoolExecutor(
+            max_workers=self.browser_pool.size,
+            thread_name_prefix='render'
+        )
+        self.render_futures = []
         
         try:
+            # URLs que ficaram pendentes na execução anterior
+            self.resume_pending(has_browser)
+            
             for city, state in cities:
+                phase = f"cidade:{city}-{state}"
+                if self.crawl_state and self.crawl_state.phase_done(phase):
+                    logging.info(f"Cidade já concluída, pulando: {city}, {state}")
+                    continue
+                
                 logging.info(f"Iniciando scraping para {city}, {state}")
                 
                 search_urls = self.get_clinic_urls_from_search(city, state)
                 
                 for search_url in search_urls[:max_pages_per_city]:
-                    if driver:
-                        urls = self.extract_urls_from_search_results(search_url, driver)
-                        
-                        for url in urls:
-                            if url not in self.visited_urls:
-                                self.visited_urls.add(url)
-                                
-                                # Tenta primeiro com requests
-                                result = self.scrape_page_with_requests(url)
-                                
-                                # Se não funcionar, tenta com Selenium
-                                if not result and driver:
-                                    result = self.scrape_page_with_selenium(url, driver)
-                                
-                                if result:
-                                    self.results.append(result)
-                                    logging.info(f"Encontrado: {result['clinic_name']} - {len(result['emails'])} emails")
-                                
-                                # Delay para não sobrecarregar os servidores
-                                time.sleep(random.uniform(1, 3))
+                    if has_browser:
+                        with self.browser_pool.driver() as driver:
+                            urls = self.extract_urls_from_search_results(search_url, driver) if driver else []
+                        self.scrape_urls(urls, render=True)
+                
+                self.wait_renders()
+                if self.crawl_state:
+                    self.crawl_state.finish_phase(phase)
                 
-                logging.info(f"Concluído scraping para {city}, {state}. Total: {len(self.results)} clínicas encontradas")
+                logging.info(f"Concluído scraping para {city}, {state}. Total: {self.results.results} clínicas encontradas")
         
         finally:
-            if driver:
-                driver.quit()
+            self.render_executor.shutdown(wait=True, cancel_futures=True)
+            self.browser_pool.close()
+            self.render_policy.flush()
+            logging.info(f"Decisão de renderização: {self.render_policy.renders_skipped} renderizações e "
+                         f"{self.render_policy.static_skipped} buscas estáticas evitadas")
         
         return self.results
 
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description="Scraper de Emails de Clínicas e Consultórios")
+    parser.add_argument('--output-dir', default='.', help="Diretório dos resultados e do estado do crawl")
+    parser.add_argument('--resume', action='store_true', help="Retoma a última execução interrompida")
+    parser.add_argument('--format', choices=sorted(RESULT_FORMATS), help="Formato do arquivo de resultados")
+    parser.add_argument('--excel', action='store_true', help="Gera também um .xlsx a partir dos resultados")
+    parser.add_argument('--archive', action='store_true',
+                        help="Grava as páginas brutas em <output-dir>/page_archive para reprocessar depois")
+    return parser.parse_args()
+
 def main():
     """Função principal"""
+    args = parse_args()
+    
     print("=== Scraper de Emails de Clínicas e Consultórios ===")
     print("Iniciando processo de extração...")
     
-    scraper = ClinicEmailScraper()
+    crawl_state = CrawlState(args.output_dir, resume=args.resume)
+    archive = None
+    if args.archive or ARCHIVE_CONFIG['enabled']:
+        archive = PageArchive(os.path.join(args.output_dir, ARCHIVE_CONFIG['directory']))
+    scraper = ClinicEmailScraper(crawl_state=crawl_state, output_dir=args.output_dir, output_format=args.format,
+                                 archive=archive)
+    exporter = start_exporter(args.output_dir)
     
     # Lista de cidades para buscar (você pode modificar)
     cities = [
@@ -300,24 +514,45 @@ def main():
     ]
     
     # Executa o scraping
-    results = scraper.run_scraping(cities, max_pages_per_city=3)
+    try:
+        scraper.run_scraping(cities, max_pages_per_city=3)
+    except KeyboardInterrupt:
+        print("\nInterrompido! Execute novamente com --resume para continuar de onde parou.")
+    finally:
+        crawl_state.flush()
+        # O pool de threads do motor termina antes do cache e do arquivo em que ele grava
+        scraper.engine.close()
+        if scraper.cache:
+            scraper.cache.close()
+        scraper.parse_pool.close()
+        if archive:
+            archive.close()
+        if exporter:
+            exporter.stop()
+    results = scraper.results
     
-    # Salva os resultados
-    filename = scraper.save_results()
+    # Fecha o arquivo de resultados (e gera o Excel, se pedido)
+    filename = scraper.save_results(excel=args.excel)
     
     print(f"\n=== Resumo ===")
-    print(f"Total de clínicas encontradas: {len(results)}")
-    print(f"Total de emails únicos: {len(set([email for r in results for email in r['emails']]))}")
+    print(f"Total de clínicas encontradas: {results.results}")
+    print(f"Total de emails únicos: {len(results.emails)}")
+    print(f"Conexões: {TRANSPORT_STATS.summary()}")
+    print(f"Duplicatas: {scraper.parse_pool.duplicate_summary()}")
+    if archive:
+        print(f"Páginas arquivadas: {archive.summary()}")
     print(f"Arquivo salvo: {filename}")
     
     # Mostra alguns resultados
-    if results:
+    if results.preview:
         print("\n=== Primeiros Resultados ===")
-        for i, result in enumerate(results[:5]):
+        for i, result in enumerate(results.preview):
             print(f"{i+1}. {result['clinic_name']}")
             print(f"   URL: {result['url']}")
             print(f"   Emails: {', '.join(result['emails'])}")
             print()
+    
+    crawl_state.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
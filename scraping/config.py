@@ -7,9 +7,14 @@ Configurações para o Scraper de Emails de Clínicas
 # Configurações gerais
 SETTINGS = {
     'delay_between_requests': (1, 3),  # Delay aleatório entre requisições (min, max)
-    'timeout': 10,  # Timeout para requisições
+    'timeout': 10,  # Timeout de leitura até haver latências do host (ver TIMEOUT_CONFIG)
     'max_results_per_search': 20,  # Máximo de resultados por busca
     'max_pages_per_city': 5,  # Máximo de páginas por cidade
+    'max_concurrency': 100,  # Máximo de requisições simultâneas (global)
+    'per_host_limit': 2,  # Máximo de requisições simultâneas por host
+    'html_parser': 'auto',  # 'auto', 'selectolax', 'lxml' ou 'html.parser'
+    'parse_workers': None,  # Processos de parsing (None = um por núcleo, 0 = sem processos)
+    'parse_queue_size': None,  # Páginas aguardando parsing antes de segurar o download (None = 4 por processo)
 }
 
 # Cidades para buscar (você pode adicionar mais)
@@ -109,6 +114,147 @@ OUTPUT_CONFIG = {
     'log_filename': 'scraping_{timestamp}.log',
     'include_timestamp': True,
     'save_multiple_formats': True,
+    # Gravação dos resultados durante o crawl
+    'format': 'csv',  # csv, jsonl ou parquet (requer pyarrow)
+    'flush_every': 50,  # Linhas acumuladas antes de gravar no disco
+    'flush_interval': 10,  # Segundos máximos entre gravações
+    'row_group_size': 1000,  # Linhas por row group do Parquet
+}
+
+# Cache HTTP em disco (revalidado com ETag/Last-Modified)
+CACHE_CONFIG = {
+    'enabled': True,
+    'directory': '.http_cache',
+    'max_size_mb': 500,  # Tamanho máximo dos corpos guardados
+    'max_age_days': 7,  # Entradas mais antigas são removidas
+    'fresh_for': 3600,  # Segundos em que a entrada é usada sem revalidar
+}
+
+# Crawler de links por prioridade (diretórios médicos)
+CRAWLER_CONFIG = {
+    'max_depth': 2,  # Cliques a partir da página inicial
+    'pages_per_seed': 30,  # Orçamento de páginas por diretório
+    'concurrency': 10,  # Páginas buscadas ao mesmo tempo (menos = ordem mais fiel)
+    'min_score': 1,  # Links com pontuação menor não são seguidos
+    'depth_penalty': 2,  # Prioridade perdida a cada nível de profundidade
+    # Trechos do caminho/texto do link que costumam levar a emails (peso)
+    'path_hints': {
+        'contato': 6, 'fale-conosco': 6, 'faleconosco': 6, 'contact': 5,
+        'equipe': 4, 'corpo-clinico': 4, 'medicos': 3, 'profissionais': 3,
+        'quem-somos': 2, 'sobre': 2, 'unidades': 2, 'clinica': 2, 'especialidades': 1,
+    },
+    'pages_per_domain': 8,  # Máximo de páginas por domínio registrado
+    'contact_paths': ['/contato', '/fale-conosco'],  # Testados logo após a página inicial de um site
+    'site_seed_score': 20,  # Prioridade da página inicial de um site (acima dos caminhos de contato)
+    'skip_extensions': [
+        '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.zip',
+        '.doc', '.docx', '.xls', '.xlsx', '.mp4', '.mp3', '.css', '.js',
+    ],
+}
+
+# Conexões HTTP das sessões dos scrapers
+TRANSPORT_CONFIG = {
+    'pool_hosts': 200,  # Hosts com conexões mantidas abertas (>= max_concurrency evita reabrir conexões)
+    'pool_per_host': 4,  # Conexões keep-alive guardadas por host (>= per_host_limit)
+    'max_retries': 0,  # Novas tentativas de conexão feitas pelo urllib3
+    'dns_cache': True,  # Cache de DNS compartilhado pelo processo
+    'dns_ttl': 300,  # Segundos que um nome resolvido fica no cache
+}
+
+# Timeouts adaptativos: conexão e leitura calculados pela latência de cada host
+TIMEOUT_CONFIG = {
+    'connect': 5,  # Timeout de conexão até haver amostras do host
+    'min_connect': 1,
+    'max_connect': 10,
+    'min_read': 3,
+    'max_read': 30,  # Hosts lentos, mas vivos, esperam até isso pela resposta
+    'percentile': 95,  # Percentil da latência observada no host
+    'multiplier': 3,  # Timeout = percentil x multiplicador (entre min e max)
+    'min_samples': 5,  # Amostras antes de adaptar
+    'window': 50,  # Últimas amostras guardadas por host
+    'deadline': 40,  # Prazo total por página: conexão, resposta e corpo
+    'directory_deadline': 60,  # Prazo das páginas de diretório (listagens grandes)
+}
+
+# Novas tentativas e disjuntor por host
+RETRY_CONFIG = {
+    'max_retries': 3,  # Tentativas extras por URL (429, 5xx, conexão recusada)
+    'retry_statuses': [500, 502, 503, 504],  # 5xx transitórios
+    'connection_retries': 1,  # Tentativas extras após conexão recusada/interrompida
+    'backoff_base': 1,  # Espera exponencial: até base * 2^tentativa segundos (com jitter)
+    'backoff_max': 30,
+    'max_retry_after': 120,  # Retry-After maior que isso: desiste da URL
+    'breaker_threshold': 3,  # Falhas de conexão/timeout seguidas que abrem o disjuntor do host
+    'breaker_reset': 300,  # Segundos até testar de novo um host com o disjuntor aberto
+}
+
+# robots.txt: lido uma vez por host e mantido em memória
+ROBOTS_CONFIG = {
+    'enabled': True,  # Respeitar robots.txt (Disallow e Crawl-delay)
+    'user_agent': '*',  # Grupo de regras aplicado
+    'ttl': 24 * 3600,  # Segundos até baixar o robots.txt do host de novo
+    'error_ttl': 600,  # Validade das respostas de erro (5xx, falha de rede)
+    'max_crawl_delay': 30,  # Crawl-delay maior que isso é limitado a este valor
+    'max_hosts': 10000,  # Hosts mantidos no cache (os mais antigos saem primeiro)
+    'timeout': 10,
+}
+
+# Descoberta de URLs pelos sitemaps dos diretórios (--sitemaps)
+SITEMAP_CONFIG = {
+    'fallback_paths': ['/sitemap.xml', '/sitemap_index.xml'],  # Quando o robots.txt não declara sitemaps
+    'max_sitemaps': 20,  # Arquivos de sitemap lidos por site (índices incluídos)
+    'max_urls_per_site': 500,  # URLs selecionadas por site
+    'min_score': 2,  # Pontuação mínima da URL (LinkScorer) para entrar na fronteira
+    'timeout': 30,
+}
+
+# Páginas duplicadas e quase duplicadas (mesmo modelo) não são extraídas de novo
+DEDUP_CONFIG = {
+    'enabled': True,
+    'min_similarity': 0.85,  # Fração de trechos do HTML em comum para contar como quase duplicata
+    'max_pages': 20000,  # Assinaturas de páginas extraídas mantidas no índice
+    'cache_pages': 2000,  # Extrações guardadas para duplicatas exatas
+}
+
+# Arquivo das páginas brutas para reprocessar sem rede (reprocess_archive.py)
+ARCHIVE_CONFIG = {
+    'enabled': False,  # Também ligado com --archive
+    'directory': 'page_archive',  # Dentro do diretório de saída
+    'segment_mb': 256,  # Tamanho de cada segmento .warc.gz antes de abrir o próximo
+    'compress_level': 6,  # Nível do gzip (1 = mais rápido, 9 = menor)
+    'commit_every': 100,  # Registros gravados entre gravações do índice
+}
+
+# Crawl com vários workers sobre uma fila compartilhada (crawl_workers.py)
+WORKER_CONFIG = {
+    'shards': 64,  # Shards por domínio registrado (fixado quando a fila é criada)
+    'lease_seconds': 120,  # Arrendamento de shards e tarefas sem renovação (worker caído)
+    'batch_size': 20,  # Páginas iniciais arrendadas por vez
+    'max_attempts': 3,  # Tarefa que derruba workers esse número de vezes vira 'failed'
+    'poll_interval': 2,  # Espera (segundos) quando não há tarefa visível
+    'journal_mode': 'WAL',  # 'DELETE' quando a fila está num compartilhamento de rede (várias máquinas)
+}
+
+# Métricas por etapa do pipeline
+METRICS_CONFIG = {
+    'enabled': True,
+    'prometheus_file': 'metrics.prom',  # Gravado na pasta de saída (textfile collector do node_exporter)
+    'interval': 15,  # Segundos entre regravações do arquivo do Prometheus
+    'top_hosts': 20,  # Hosts com mais erros exportados com o rótulo do host
+}
+
+# Conjunto de URLs visitadas (comparadas pela URL canônica)
+VISITED_CONFIG = {
+    'bloom_filter': False,  # Filtro de Bloom para crawls muito grandes (ver README)
+    'bloom_capacity': 1000000,  # URLs previstas antes do filtro crescer
+    'bloom_error_rate': 0.001,  # Taxa de falso positivo (URL nova tomada como visitada)
+}
+
+# Decisão aprendida de quando usar o Selenium (guardada entre execuções)
+RENDER_POLICY_CONFIG = {
+    'filename': 'render_policy.sqlite',  # Criado no --output-dir
+    'min_samples': 5,  # Páginas observadas antes de decidir pelo domínio/modelo
+    'explore_rate': 0.05,  # Fração das URLs que ainda testa o caminho completo
 }
 
 # Configurações de proxy (opcional)
@@ -129,4 +275,15 @@ SELENIUM_CONFIG = {
     'disable_javascript': False,
     'page_load_timeout': 30,
     'implicit_wait': 10,
+    'pool_size': 3,  # Navegadores headless rodando em paralelo
+    'max_pages_per_driver': 50,  # Reinicia o driver após N páginas
+    'page_load_strategy': 'eager',  # driver.get retorna no DOMContentLoaded
+    'ready_timeout': 10,  # Espera máxima pela página pronta (segundos)
+    'dom_stable_ms': 300,  # DOM sem mutações por este tempo = página pronta
+    # Recursos que o navegador não baixa (imagens, fontes e mídia)
+    'blocked_resources': [
+        '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+        '*.mp4', '*.webm', '*.mp3', '*.ogg', '*.wav', '*.avi', '*.mov',
+    ],
 } 
\ No newline at end of file
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas do Pipeline de Scraping
+Tempos por etapa (DNS, conexão, resposta, download, parsing, regex,
+renderização), contadores de bytes, status HTTP, erros por host e cache,
+exportados num arquivo texto do Prometheus e num resumo JSON no fim da execução
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import METRICS_CONFIG
+
+# Limites (segundos) dos histogramas de tempo
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    'scraper_stage_seconds': "Tempo gasto em cada etapa do pipeline",
+    'scraper_http_responses_total': "Respostas HTTP por código de status",
+    'scraper_response_bytes_total': "Bytes de corpo recebidos",
+    'scraper_cache_total': "Consultas ao cache HTTP por resultado",
+    'scraper_errors_total': "Erros de busca por tipo",
+    'scraper_host_errors_total': "Erros de busca por host (hosts com mais erros)",
+    'scraper_retries_total': "Novas tentativas por motivo",
+    'scraper_skipped_total': "URLs puladas sem requisição por motivo",
+    'scraper_results_total': "Páginas com emails encontrados",
+    'scraper_renders_total': "Renderizações com Selenium por resultado",
+    'scraper_duplicates_total': "Páginas não extraídas por serem duplicatas (exatas ou do mesmo modelo)",
+}
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                          for key, value in labels) + '}'
+
+
+class Histogram:
+    """Contagem por faixa, soma e total de observações"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, limit in enumerate(BUCKETS):
+            if value <= limit:
+                self.counts[index] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimativa do quantil: limite superior da faixa que o contém"""
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKETS[index]
+        return float('inf')
+
+
+class Metrics:
+    """Registro de contadores e histogramas, seguro entre threads"""
+
+    def __init__(self, top_hosts=None):
+        self.top_hosts = top_hosts or METRICS_CONFIG['top_hosts']
+        self.started = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._host_errors = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        """Registra a duração de uma etapa"""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def host_error(self, host, kind):
+        """Erro de busca num host (exportados só os hosts com mais erros)"""
+        self.inc('scraper_errors_total', kind=kind)
+        with self._lock:
+            self._host_errors[(host, kind)] = self._host_errors.get((host, kind), 0) + 1
+
+    def add_collector(self, name, collect):
+        """Valores lidos de outro componente na hora de exportar (ex.: conexões)"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {stage: (list(h.counts), h.total, h.sum, h) for stage, h in self._histograms.items()}
+            top = sorted(self._host_errors.items(), key=lambda item: item[1], reverse=True)[:self.top_hosts]
+            collectors = dict(self._collectors)
+        gauges = {}
+        for name, collect in collectors.items():
+            try:
+                gauges[name] = collect()
+            except Exception as e:
+                logging.debug(f"Coletor de métricas {name} falhou: {e}")
+        return counters, histograms, top, gauges
+
+    def to_prometheus(self):
+        """Texto no formato de exposição do Prometheus"""
+        counters, histograms, top, gauges = self._snapshot()
+        lines = []
+
+        lines.append(f"# HELP scraper_stage_seconds {HELP['scraper_stage_seconds']}")
+        lines.append("# TYPE scraper_stage_seconds histogram")
+        for stage in sorted(histograms):
+            counts, total, total_sum, _ = histograms[stage]
+            cumulative = 0
+            for limit, count in zip(BUCKETS, counts):
+                cumulative += count
+                lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="{limit}"}} {cumulative}')
+            lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {total}')
+            lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {total_sum:.6f}')
+            lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {total}')
+
+        for (host, kind), count in top:
+            counters[('scraper_host_errors_total', (('host', host), ('kind', kind)))] = count
+
+        declared = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in declared:
+                declared.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for group, values in sorted(gauges.items()):
+            for key, value in sorted(values.items()):
+                name = f"scraper_{group}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+
+        lines.append("# TYPE scraper_uptime_seconds gauge")
+        lines.append(f"scraper_uptime_seconds {time.time() - self.started:.1f}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Reescreve o arquivo de forma atômica (o coletor nunca lê um arquivo pela metade)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+    def summary(self, **extra):
+        """Resumo da execução: etapas (total, soma, p50/p95), contadores e coletores"""
+        counters, histograms, top, gauges = self._snapshot()
+
+        stages = {}
+        for stage, (_, total, total_sum, histogram) in sorted(histograms.items()):
+            stages[stage] = {
+                'count': total,
+                'total_seconds': round(total_sum, 3),
+                'mean_ms': round(total_sum / total * 1000, 2) if total else 0.0,
+                'p50_le_seconds': histogram.quantile(0.5),
+                'p95_le_seconds': histogram.quantile(0.95),
+            }
+
+        grouped = {}
+        for (name, labels), value in sorted(counters.items()):
+            name = name.replace('scraper_', '', 1).replace('_total', '')
+            if labels:
+                grouped.setdefault(name, {})[','.join(str(v) for _, v in labels)] = value
+            else:
+                grouped[name] = value
+
+        summary = dict(extra)
+        summary.update({
+            'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+            'finished': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'elapsed_seconds': round(time.time() - self.started, 1),
+            'stages': stages,
+            'counters': grouped,
+            'top_host_errors': [{'host': host, 'kind': kind, 'count': count} for (host, kind), count in top],
+        })
+        summary.update(gauges)
+        return summary
+
+    def write_summary(self, path, **extra):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(**extra), f, indent=2, ensure_ascii=False)
+        return path
+
+
+# Compartilhado por todo o processo (motor, transporte, parsing, navegador)
+METRICS = Metrics()
+
+
+class MetricsExporter:
+    """Thread que reescreve o arquivo do Prometheus a cada `interval` segundos"""
+
+    def __init__(self, path, interval=None, metrics=None):
+        self.path = path
+        self.interval = interval or METRICS_CONFIG['interval']
+        self.metrics = metrics or METRICS
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            self.metrics.write_prometheus(self.path)
+        except OSError as e:
+            logging.warning(f"Erro ao gravar métricas em {self.path}: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='metrics', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Para a thread e grava o arquivo uma última vez"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+
+def start_exporter(output_dir):
+    """Liga a regravação do arquivo do Prometheus na pasta de saída (None se desligada)"""
+    if not METRICS_CONFIG['enabled']:
+        return None
+    return MetricsExporter(os.path.join(output_dir, METRICS_CONFIG['prometheus_file'])).start()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estado Durável do Crawl (Fronteira, Visitadas e Resultados)
+Permite retomar uma execução interrompida com --resume
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import VISITED_CONFIG
+from url_canon import url_key
+from visited_set import ScalableBloomFilter
+
+
+class VisitedStore:
+    """Conjunto de URLs visitadas guardado no SQLite (memória limitada)"""
+
+    def __init__(self, state):
+        self.state = state
+
+    def __contains__(self, url):
+        return self.state.is_known(url)
+
+    def add(self, url, source=None):
+        self.state.enqueue(url, source)
+
+    def __len__(self):
+        return self.state.count()
+
+
+class CrawlState:
+    def __init__(self, output_dir='.', resume=False, filename='crawl_state.sqlite'):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, filename)
+
+        # A conexão é compartilhada entre threads (ex.: renderização com Selenium)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.create_function('url_key', 1, url_key, deterministic=True)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                key TEXT,
+                source TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                added_at REAL NOT NULL,
+                depth INTEGER,
+                seed TEXT,
+                score REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier (status);
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS phases (
+                name TEXT PRIMARY KEY,
+                finished_at REAL NOT NULL
+            );
+        """)
+
+        # Estados gravados antes da chave canônica existir
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(frontier)")]
+        if 'key' not in columns:
+            self._db.execute("ALTER TABLE frontier ADD COLUMN key TEXT")
+            self._db.execute("UPDATE frontier SET key = url_key(url)")
+        # Estados gravados antes da fronteira do crawl best-first ser guardada
+        for column, kind in (('depth', 'INTEGER'), ('seed', 'TEXT'), ('score', 'REAL')):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE frontier ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_frontier_key ON frontier (key)")
+
+        if resume:
+            # Links do crawl best-first que estavam sendo buscados voltam para a fronteira
+            self._db.execute("UPDATE frontier SET status = 'queued' WHERE status = 'pending' AND seed IS NOT NULL")
+            logging.info(f"Retomando crawl de {self.path}: {self.count('done')} URLs concluídas, "
+                         f"{self.count('pending')} pendentes, {self.count('queued')} links na fronteira")
+        else:
+            self._db.executescript("DELETE FROM frontier; DELETE FROM results; DELETE FROM phases;")
+        self._db.commit()
+
+        self.visited = VisitedStore(self)
+
+        # Filtro de Bloom na frente do SQLite: URL ausente no filtro com certeza
+        # é nova e dispensa a consulta (o SQLite continua sendo a resposta exata)
+        self._seen = None
+        if VISITED_CONFIG['bloom_filter']:
+            self._seen = ScalableBloomFilter()
+            for (key,) in self._db.execute("SELECT key FROM frontier"):
+                self._seen.add(key)
+
+        # Gravações são confirmadas em lotes para não custar um fsync por URL
+        self.commit_every = 50
+        self._uncommitted = 0
+
+    def _write(self, sql, params=()):
+        """Executa uma escrita e confirma a cada lote"""
+        with self._lock:
+            self._db.execute(sql, params)
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self.flush()
+
+    def _read(self, sql, params=()):
+        """Executa uma consulta e retorna todas as linhas"""
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def flush(self):
+        """Confirma as gravações pendentes no disco"""
+        with self._lock:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def is_known(self, url):
+        """Verifica se a URL (ou uma variação dela) já foi despachada para busca"""
+        key = url_key(url)
+        if self._seen is not None and key not in self._seen:
+            return False
+        return bool(self._read("SELECT 1 FROM frontier WHERE key = ? AND status != 'queued'", (key,)))
+
+    def enqueue(self, url, source=None):
+        """Adiciona a URL à fronteira como pendente (variações já conhecidas são ignoradas)"""
+        key = url_key(url)
+        with self._lock:
+            self._write(
+                "INSERT OR IGNORE INTO frontier (url, key, source, added_at) "
+                "SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM frontier WHERE key = ?)",
+                (url, key, source, time.time(), key)
+            )
+            # Link que esperava na fronteira do crawl best-first: agora está sendo buscado
+            self._write("UPDATE frontier SET status = 'pending' WHERE key = ? AND status = 'queued'", (key,))
+            if self._seen is not None:
+                self._seen.add(key)
+
+    def queue_link(self, url, source, depth, seed, score):
+        """Guarda um link da fronteira do crawl best-first, ainda não buscado"""
+        self._write(
+            "INSERT OR IGNORE INTO frontier (url, key, source, status, added_at, depth, seed, score) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+            (url, url_key(url), source, time.time(), depth, seed, score)
+        )
+
+    def drop_link(self, url):
+        """Remove da fronteira um link descartado (orçamento esgotado ou domínio encerrado)"""
+        self._write("DELETE FROM frontier WHERE url = ? AND status = 'queued'", (url,))
+
+    def queued_links(self):
+        """Links da fronteira do crawl best-first: (url, fonte, profundidade, página inicial, pontuação)"""
+        return self._read("SELECT url, source, depth, seed, score FROM frontier WHERE status = 'queued' ORDER BY rowid")
+
+    def mark_done(self, url, status='done'):
+        """Marca a URL como concluída (ou 'failed')"""
+        self._write("UPDATE frontier SET status = ? WHERE url = ?", (status, url))
+
+    def pending(self):
+        """URLs que entraram na fronteira mas não terminaram, com a fonte"""
+        return self._read("SELECT url, source FROM frontier WHERE status = 'pending' ORDER BY rowid")
+
+    def count(self, status=None):
+        """Número de URLs despachadas (ou, com `status`, na fronteira com esse status)"""
+        if status:
+            rows = self._read("SELECT COUNT(*) FROM frontier WHERE status = ?", (status,))
+        else:
+            rows = self._read("SELECT COUNT(*) FROM frontier WHERE status != 'queued'")
+        return rows[0][0]
+
+    def add_result(self, result):
+        """Guarda um resultado encontrado"""
+        self._write(
+            "INSERT INTO results (url, data) VALUES (?, ?)",
+            (result['url'], json.dumps(result, ensure_ascii=False))
+        )
+
+    def iter_results(self, batch_size=500):
+        """Percorre os resultados já encontrados, em lotes, sem carregar todos"""
+        last_id = 0
+        while True:
+            rows = self._read(
+                "SELECT id, data FROM results WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            )
+            if not rows:
+                return
+            for last_id, data in rows:
+                yield json.loads(data)
+
+    def load_results(self):
+        """Carrega os resultados já encontrados"""
+        return list(self.iter_results())
+
+    def phase_done(self, name):
+        """Verifica se uma etapa (diretórios, cidade...) já terminou"""
+        return bool(self._read("SELECT 1 FROM phases WHERE name = ?", (name,)))
+
+    def finish_phase(self, name):
+        """Registra o fim de uma etapa"""
+        self._write(
+            "INSERT OR REPLACE INTO phases (name, finished_at) VALUES (?, ?)",
+            (name, time.time())
+        )
+        self.flush()
+
+    def close(self):
+        """Confirma tudo e fecha o banco"""
+        with self._lock:
+            self.flush()
+            self._db.close()
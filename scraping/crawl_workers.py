@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Crawl com Vários Workers sobre uma Fila Compartilhada
+O coordenador põe diretórios e sites das cidades na fila; cada worker (na
+mesma máquina ou em outras) arrenda shards de domínios e roda o scraper avançado
+"""
+
+import argparse
+import csv
+import logging
+import os
+import time
+from itertools import groupby
+
+from advanced_clinic_scraper import AdvancedClinicScraper
+from config import ARCHIVE_CONFIG, CITIES, MEDICAL_DIRECTORIES, WORKER_CONFIG
+from crawl_metrics import start_exporter
+from page_archive import PageArchive
+from result_sink import RESULT_FORMATS
+from url_canon import canonical_url
+from work_queue import LeaseKeeper, QueueVisited, WorkQueue, default_worker_name, shard_of
+
+
+def seed_queue(queue, cities=CITIES, csv_file=None, directories=True):
+    """Coordenador: põe na fila os diretórios, os sites das cidades e os do CSV"""
+    added = {}
+    if directories:
+        urls = [canonical_url(url) for url in MEDICAL_DIRECTORIES]
+        added['directory'] = queue.push_many(urls, 'directory', 'directory')
+
+    urls = [canonical_url(url) for city, state in cities for url in AdvancedClinicScraper.city_sites(city, state)]
+    added['search'] = queue.push_many(urls, 'site', 'search')
+
+    if csv_file:
+        with open(csv_file, 'r', encoding='utf-8') as file:
+            urls = [canonical_url(row['url'].strip()) for row in csv.DictReader(file) if (row.get('url') or '').strip()]
+        added['csv'] = queue.push_many(urls, 'site', 'csv')
+    return added
+
+
+class CrawlWorker:
+    """Processa lotes da fila até ela esvaziar
+
+    Só busca páginas dos shards que arrendou; links de diretórios para
+    domínios de outro shard viram tarefas de site na fila, para o worker dono
+    daquele shard. As URLs buscadas ficam na própria fila, então nenhuma
+    página é buscada por dois workers; as de um lote interrompido voltam a
+    ser buscadas por quem arrendar o lote de novo.
+    """
+
+    def __init__(self, queue, name=None, output_dir=None, output_format=None, use_sitemaps=False,
+                 batch_size=None, archive=False):
+        self.queue = queue
+        self.name = name or default_worker_name()
+        self.output_dir = output_dir or os.path.join(os.path.dirname(queue.path), self.name)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.batch_size = batch_size or WORKER_CONFIG['batch_size']
+        self.poll_interval = WORKER_CONFIG['poll_interval']
+        self.shards = set()
+        self.handed_off = 0
+        # Cada worker grava o próprio arquivo de páginas, dentro do seu diretório
+        self.archive = None
+        if archive or ARCHIVE_CONFIG['enabled']:
+            self.archive = PageArchive(os.path.join(self.output_dir, ARCHIVE_CONFIG['directory']))
+
+        self.scraper = AdvancedClinicScraper(
+            output_dir=self.output_dir,
+            output_format=output_format,
+            use_sitemaps=use_sitemaps,
+            visited=QueueVisited(queue, self.name),
+            handoff=self.handoff,
+            archive=self.archive
+        )
+
+    def handoff(self, url):
+        """Link de um domínio de outro shard: vai para a fila em vez de ser seguido aqui"""
+        if shard_of(url, self.queue.shards) in self.shards:
+            return False
+        if self.queue.push(url, 'site', 'directory'):
+            self.handed_off += 1
+        return True
+
+    def process(self, tasks):
+        """Roda o scraper sobre um lote, agrupando as tarefas por tipo e fonte"""
+        tasks = sorted(tasks, key=lambda task: (task[2], task[3] or ''))
+        for (kind, source), group in groupby(tasks, key=lambda task: (task[2], task[3])):
+            urls = [task[1] for task in group]
+            if kind == 'directory':
+                self.scraper.crawl_directories(urls)
+            else:
+                self.scraper.crawl_sites(urls, source=source or 'search')
+
+    def run(self):
+        """Arrenda shards e lotes até a fila esvaziar; retorna o número de tarefas processadas"""
+        processed = 0
+        keeper = LeaseKeeper(self.queue, self.name).start()
+        try:
+            while True:
+                self.shards = set(self.queue.claim_shards(self.name))
+                tasks = self.queue.lease(self.name, self.batch_size)
+                if not tasks:
+                    if self.queue.drained():
+                        break
+                    # Tarefas restantes estão em shards de outros workers
+                    time.sleep(self.poll_interval)
+                    continue
+
+                logging.info(f"{self.name}: {len(tasks)} tarefas de {len(self.shards)} shards")
+                self.process(tasks)
+                self.queue.complete(self.name, [task[0] for task in tasks])
+                processed += len(tasks)
+        finally:
+            keeper.stop()
+            # Tarefas não concluídas voltam para a fila na hora
+            self.queue.release(self.name)
+            self.scraper.engine.close()
+            if self.scraper.cache:
+                self.scraper.cache.close()
+            self.scraper.parse_pool.close()
+            if self.archive:
+                self.archive.close()
+        return processed
+
+
+def print_status(queue):
+    counts = queue.counts()
+    print(f"Fila: {queue.path} ({queue.shards} shards)")
+    print("Tarefas: " + ", ".join(f"{status} {counts.get(status, 0)}"
+                                  for status in ('pending', 'leased', 'done', 'failed')))
+    print(f"URLs buscadas: {len(queue.visited)}")
+    workers = queue.active_workers()
+    print(f"Workers ativos: {len(workers)}")
+    for name, shards, done in workers:
+        print(f"   {name}: {shards} shards, {done} tarefas concluídas")
+
+
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description="Crawl com vários workers sobre uma fila compartilhada")
+    parser.add_argument('--queue-dir', required=True, help="Diretório da fila (compartilhado pelos workers)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help="Coordenador: põe diretórios, cidades e CSV na fila")
+    seed.add_argument('--csv', help="Arquivo CSV com uma coluna 'url' para processar")
+    seed.add_argument('--no-directories', action='store_true', help="Não põe os diretórios médicos na fila")
+    seed.add_argument('--shards', type=int, help="Número de shards (só ao criar a fila)")
+
+    worker = commands.add_parser('worker', help="Processa a fila até ela esvaziar")
+    worker.add_argument('--name', help="Nome do worker (padrão: máquina-PID)")
+    worker.add_argument('--output-dir', help="Diretório dos resultados (padrão: <fila>/<nome>)")
+    worker.add_argument('--format', choices=sorted(RESULT_FORMATS), help="Formato do arquivo de resultados")
+    worker.add_argument('--sitemaps', action='store_true', help="Descobre perfis pelos sitemaps dos diretórios")
+    worker.add_argument('--archive', action='store_true', help="Grava as páginas brutas para reprocessar depois")
+
+    commands.add_parser('status', help="Mostra o andamento da fila e os workers ativos")
+    return parser.parse_args()
+
+
+def main():
+    """Função principal"""
+    args = parse_args()
+    queue = WorkQueue(args.queue_dir, shards=getattr(args, 'shards', None))
+
+    if args.command == 'seed':
+        added = seed_queue(queue, csv_file=args.csv, directories=not args.no_directories)
+        for source, count in added.items():
+            print(f"✅ {count} páginas iniciais novas ({source})")
+        print_status(queue)
+
+    elif args.command == 'worker':
+        worker = CrawlWorker(queue, args.name, args.output_dir, args.format, args.sitemaps, archive=args.archive)
+        exporter = start_exporter(worker.output_dir)
+        print(f"=== Worker {worker.name} ===")
+        try:
+            processed = worker.run()
+        except KeyboardInterrupt:
+            processed = None
+            print("\nInterrompido! As tarefas em andamento voltaram para a fila.")
+        finally:
+            if exporter:
+                exporter.stop()
+
+        filename = worker.scraper.save_results()
+        if processed is not None:
+            print(f"✅ Fila vazia: {processed} tarefas processadas por {worker.name}")
+        print(f"Links repassados a outros shards: {worker.handed_off}")
+        print(f"Total de clínicas encontradas: {worker.scraper.results.results}")
+        print(f"Arquivo salvo: {filename}")
+
+    else:
+        print_status(queue)
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de Requisições Assíncronas para os Scrapers
+Mantém muitas requisições em andamento com limite global e por host
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from adaptive_timeouts import AdaptiveTimeouts, fetch_page
+from config import SETTINGS
+from crawl_metrics import METRICS
+from host_breaker import HostBreaker, HostUnavailable, RetryPolicy, is_connection_failure, status_of
+from host_scheduler import HostScheduler
+from robots_cache import RobotsDisallowed
+
+
+class AsyncFetchEngine:
+    """Executa requisições HTTP concorrentes usando asyncio
+
+    As requisições em si continuam usando a `requests.Session` do scraper
+    (executadas em um pool de threads), de modo que cabeçalhos, cookies e a
+    lógica de extração dos scrapers não mudam.
+    """
+
+    def __init__(self, session, max_concurrency=None, per_host_limit=None, timeout=None,
+                 scheduler=None, cache=None, robots=None, breaker=None, retry=None, timeouts=None,
+                 archive=None):
+        self.session = session
+        self.scheduler = scheduler or HostScheduler()
+        self.cache = cache
+        self.robots = robots
+        # Respostas vindas da rede (e do cache, se a URL ainda não estiver lá)
+        # vão também para o arquivo de páginas
+        self.archive = archive
+
+        # Hosts mortos falham na hora; 429/5xx são tentados de novo com espera
+        self.breaker = breaker or HostBreaker()
+        self.retry = retry or RetryPolicy()
+        self.max_concurrency = max_concurrency or SETTINGS['max_concurrency']
+        self.per_host_limit = per_host_limit or SETTINGS['per_host_limit']
+        # Conexão/leitura adaptados por host; `timeout` é o prazo total por página
+        self.timeouts = timeouts or AdaptiveTimeouts(deadline=timeout)
+
+        # Limita quantas URLs ficam agendadas ao mesmo tempo (listas enormes)
+        self.max_pending = self.max_concurrency * 10
+
+        self._executor = None
+        self._global_limit = None
+        self._host_limits = {}
+
+    @staticmethod
+    def host_of(url):
+        """Retorna o host (netloc) de uma URL"""
+        return urlparse(url).netloc.lower()
+
+    @staticmethod
+    def error_kind(error):
+        """Tipo do erro para as métricas: status HTTP, timeout, conexão ou a classe"""
+        status = status_of(error)
+        if status is not None:
+            return f'http_{status}'
+        if isinstance(error, requests.Timeout):
+            return 'timeout'
+        if isinstance(error, requests.ConnectionError):
+            return 'connection'
+        return type(error).__name__
+
+    def fetch_blocking(self, url, timeout=None):
+        """Faz a requisição HTTP de forma bloqueante"""
+        headers = self.cache.conditional_headers(url) if self.cache else None
+        try:
+            with METRICS.timer('fetch'):
+                response = fetch_page(self.session, url, self.timeouts, timeout, headers)
+        except Exception as e:
+            if is_connection_failure(e):
+                self.breaker.record_failure(url)
+            METRICS.host_error(self.host_of(url), self.error_kind(e))
+            raise
+        # Qualquer resposta HTTP mostra que o host está no ar
+        self.breaker.record_success(url)
+
+        if self.cache:
+            if response.status_code == 304:
+                cached = self.cache.revalidated_response(url)
+                if cached is not None:
+                    METRICS.inc('scraper_cache_total', result='revalidated')
+                    self.archive_response(url, cached)
+                    return cached
+            else:
+                METRICS.inc('scraper_cache_total', result='miss')
+                self.cache.store(url, response)
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            METRICS.host_error(self.host_of(url), self.error_kind(e))
+            raise
+        self.archive_response(url, response)
+        return response
+
+    def archive_response(self, url, response):
+        """Grava a resposta no arquivo de páginas, se ligado"""
+        if self.archive:
+            with METRICS.timer('archive'):
+                self.archive.write(url, response)
+
+    def lookup_fresh(self, url):
+        """Resposta recente do cache, arquivada se a URL ainda não estiver no arquivo de páginas"""
+        cached = self.cache.lookup_fresh(url)
+        if cached is not None and self.archive and not self.archive.contains(url):
+            self.archive_response(url, cached)
+        return cached
+
+    def fetch_sync(self, url, timeout=None):
+        """Busca uma única URL fora do loop assíncrono"""
+        cached = self.lookup_fresh(url) if self.cache else None
+        if cached is not None:
+            METRICS.inc('scraper_cache_total', result='hit')
+            return cached
+
+        if self.robots and not self.robots.allowed(url):
+            METRICS.inc('scraper_skipped_total', reason='robots')
+            raise RobotsDisallowed(url)
+
+        attempt, last_error = 0, None
+        while True:
+            try:
+                self._check_breaker(url, last_error)
+                self.scheduler.wait(url)
+                return self.fetch_blocking(url, timeout)
+            except Exception as e:
+                delay = self._retry_delay(url, e, attempt)
+                if delay is None:
+                    raise
+                last_error = e
+            attempt += 1
+            time.sleep(delay)
+
+    def _check_breaker(self, url, last_error):
+        """Levanta HostUnavailable; numa nova tentativa, o erro real da anterior"""
+        try:
+            self.breaker.check(url)
+        except HostUnavailable:
+            if last_error is not None:
+                raise last_error from None
+            METRICS.inc('scraper_skipped_total', reason='breaker')
+            raise
+
+    def _retry_delay(self, url, error, attempt):
+        """Espera antes de tentar a URL de novo (None = desiste); 429 também desacelera o host"""
+        delay = self.retry.delay(error, attempt)
+        if delay is None:
+            return None
+        METRICS.inc('scraper_retries_total', reason=self.error_kind(error))
+
+        if status_of(error) == 429:
+            host = self.scheduler.host_of(url)
+            gap = min(max(self.scheduler.max_gap(host) * 2, 1), self.retry.backoff_max)
+            self.scheduler.set_delay(host, gap)
+            logging.info(f"429 em {host}: intervalo do host passa a {gap:.1f}s")
+        logging.debug(f"Tentando {url} de novo em {delay:.1f}s ({error})")
+        return delay
+
+    def _host_limit(self, host):
+        """Semáforo de concorrência do host (criado sob demanda)"""
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.per_host_limit)
+            self._host_limits[host] = limit
+        return limit
+
+    async def fetch(self, url, timeout=None):
+        """Busca uma URL respeitando os limites global e por host, com novas tentativas"""
+        # Respostas recentes do cache não passam pela rede nem pelo agendador
+        if self.cache:
+            loop = asyncio.get_running_loop()
+            cached = await loop.run_in_executor(self._executor, self.lookup_fresh, url)
+            if cached is not None:
+                METRICS.inc('scraper_cache_total', result='hit')
+                return cached
+
+        host = self.host_of(url)
+        attempt, last_error = 0, None
+        while True:
+            try:
+                return await self._fetch_once(url, host, timeout, last_error)
+            except Exception as e:
+                delay = self._retry_delay(url, e, attempt)
+                if delay is None:
+                    raise
+                last_error = e
+            attempt += 1
+            # A espera acontece fora dos limites: outras URLs seguem enquanto isso
+            await asyncio.sleep(delay)
+
+    async def _fetch_once(self, url, host, timeout, last_error=None):
+        """Uma tentativa de busca, dentro dos limites do host e global"""
+        # O limite do host é adquirido primeiro para que URLs esperando por um
+        # host ocupado não prendam vagas do limite global
+        async with self._host_limit(host):
+            # O robots.txt é lido antes da primeira reserva do host, para que
+            # o Crawl-delay já valha para ela; depois a resposta vem do cache
+            if self.robots:
+                allowed = self.robots.lookup(url)
+                if allowed is None:
+                    loop = asyncio.get_running_loop()
+                    allowed = await loop.run_in_executor(self._executor, self.robots.allowed, url)
+                if not allowed:
+                    METRICS.inc('scraper_skipped_total', reason='robots')
+                    raise RobotsDisallowed(url)
+
+            # Host com o disjuntor aberto falha sem esperar a vez nem a rede
+            self._check_breaker(url, last_error)
+            with METRICS.timer('host_wait'):
+                await self.scheduler.wait_async(url)
+            async with self._global_limit:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, self.fetch_blocking, url, timeout)
+
+    async def _process(self, url, handler, timeout, schedule):
+        """Busca a URL e entrega o resultado ao handler"""
+        try:
+            response, error = await self.fetch(url, timeout), None
+        except Exception as e:
+            response, error = None, e
+
+        try:
+            new_urls = handler(url, response, error)
+            if asyncio.iscoroutine(new_urls):
+                new_urls = await new_urls
+            for new_url in new_urls or []:
+                schedule(new_url)
+        except Exception as e:
+            logging.error(f"Erro ao tratar resultado de {url}: {e}")
+
+    async def _crawl(self, urls, handler, timeout):
+        """Loop principal: agenda as URLs e espera todas terminarem"""
+        tasks = set()
+
+        def schedule(url):
+            task = asyncio.ensure_future(self._process(url, handler, timeout, schedule))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        for url in urls:
+            while len(tasks) >= self.max_pending:
+                await asyncio.wait(set(tasks), return_when=asyncio.FIRST_COMPLETED)
+            schedule(url)
+
+        while tasks:
+            await asyncio.wait(set(tasks))
+
+    def run(self, coroutine_function, *args):
+        """Executa a corrotina em um loop novo, com fetch() pronto para uso"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix='fetch'
+            )
+
+        async def main():
+            # Semáforos pertencem ao loop em que são usados
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+            self._host_limits = {}
+            return await coroutine_function(*args)
+
+        return asyncio.run(main())
+
+    def crawl(self, urls, handler, timeout=None):
+        """Processa as URLs concorrentemente
+
+        `handler(url, response, error)` é chamado no loop principal assim que
+        cada requisição termina e pode devolver novas URLs para buscar.
+        """
+        self.run(self._crawl, urls, handler, timeout)
+
+    def close(self):
+        """Libera o pool de threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
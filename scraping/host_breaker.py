@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Disjuntor por Host e Novas Tentativas
+Hosts que só dão erro de conexão ou timeout (domínios mortos ou estacionados)
+passam a falhar na hora, com uma tentativa de teste depois de um tempo; 429 e
+5xx são tentados de novo com espera exponencial e jitter
+"""
+
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+from config import RETRY_CONFIG
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class HostUnavailable(Exception):
+    """O disjuntor do host está aberto: a URL falha sem requisição"""
+
+
+def is_connection_failure(error):
+    """Erro de conexão, DNS ou timeout (o host não respondeu)"""
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def is_refused(error):
+    """Conexão recusada ou interrompida sem estourar o timeout"""
+    return isinstance(error, requests.ConnectionError) and not isinstance(error, requests.Timeout)
+
+
+def status_of(error):
+    """Código HTTP de um erro do raise_for_status(), ou None"""
+    response = getattr(error, 'response', None)
+    return response.status_code if response is not None else None
+
+
+def retry_after(error):
+    """Segundos pedidos no cabeçalho Retry-After da resposta, ou None"""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HostBreaker:
+    """Disjuntor por host: fechado, aberto após `threshold` falhas seguidas, meio-aberto depois de `reset_after`
+
+    No estado meio-aberto uma única URL do host é buscada como teste; as
+    outras continuam falhando na hora até o teste dar certo.
+    """
+
+    def __init__(self, threshold=None, reset_after=None):
+        self.threshold = threshold or RETRY_CONFIG['breaker_threshold']
+        self.reset_after = reset_after or RETRY_CONFIG['breaker_reset']
+
+        # host -> [estado, falhas seguidas, aberto (ou em teste) desde]
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+        self.fast_failures = 0
+        self.opened = 0
+
+    @staticmethod
+    def host_of(url):
+        """Retorna o host (netloc) de uma URL"""
+        return urlparse(url).netloc.lower()
+
+    def check(self, url):
+        """Libera a requisição ou levanta HostUnavailable se o host está fora do ar"""
+        host = self.host_of(url)
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None or entry[0] == CLOSED:
+                return
+            now = time.monotonic()
+            if now - entry[2] >= self.reset_after:
+                # Tempo de espera passou (ou o teste anterior sumiu): esta URL testa o host
+                entry[0], entry[2] = HALF_OPEN, now
+                logging.info(f"Testando de novo o host {host}")
+                return
+            self.fast_failures += 1
+        raise HostUnavailable(f"{host} fora do ar após {entry[1]} falhas de conexão")
+
+    def is_open(self, url):
+        """Verifica se as URLs do host estão falhando na hora"""
+        with self._lock:
+            entry = self._hosts.get(self.host_of(url))
+            return entry is not None and entry[0] != CLOSED
+
+    def record_success(self, url):
+        """O host respondeu (qualquer status HTTP): fecha o disjuntor"""
+        host = self.host_of(url)
+        with self._lock:
+            entry = self._hosts.pop(host, None)
+        if entry is not None and entry[0] != CLOSED:
+            logging.info(f"Host {host} voltou a responder")
+
+    def record_failure(self, url):
+        """Erro de conexão ou timeout: abre o disjuntor ao chegar no limite"""
+        host = self.host_of(url)
+        with self._lock:
+            entry = self._hosts.setdefault(host, [CLOSED, 0, 0.0])
+            entry[1] += 1
+            if entry[0] == HALF_OPEN or (entry[0] == CLOSED and entry[1] >= self.threshold):
+                if entry[0] == CLOSED:
+                    self.opened += 1
+                    logging.warning(f"Host {host} fora do ar após {entry[1]} falhas; "
+                                    f"as próximas URLs falham na hora")
+                entry[0], entry[2] = OPEN, time.monotonic()
+
+
+class RetryPolicy:
+    """Quanto esperar antes de tentar de novo, conforme o erro
+
+    429: respeita Retry-After (ou espera exponencial) e não conta contra o
+    host. 5xx transitórios (500, 502, 503, 504): espera exponencial com
+    jitter. Conexão recusada/interrompida: poucas tentativas, já que o
+    disjuntor cuida dos hosts mortos; timeouts não são repetidos (cada um
+    custa o timeout inteiro). Outros erros não são repetidos.
+    """
+
+    def __init__(self, max_retries=None, backoff_base=None, backoff_max=None):
+        self.max_retries = RETRY_CONFIG['max_retries'] if max_retries is None else max_retries
+        self.backoff_base = backoff_base or RETRY_CONFIG['backoff_base']
+        self.backoff_max = backoff_max or RETRY_CONFIG['backoff_max']
+        self.retry_statuses = set(RETRY_CONFIG['retry_statuses'])
+        self.connection_retries = RETRY_CONFIG['connection_retries']
+        self.max_retry_after = RETRY_CONFIG['max_retry_after']
+
+        self.retries = 0
+
+    def backoff(self, attempt):
+        """Espera exponencial com jitter completo"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def delay(self, error, attempt):
+        """Segundos até a próxima tentativa, ou None para desistir"""
+        if attempt >= self.max_retries:
+            return None
+
+        status = status_of(error)
+        if status == 429:
+            wait = retry_after(error)
+            if wait is None:
+                wait = self.backoff(attempt + 1)
+            elif wait > self.max_retry_after:
+                return None
+        elif status in self.retry_statuses:
+            wait = retry_after(error) if status == 503 else None
+            if wait is None or wait > self.max_retry_after:
+                wait = self.backoff(attempt)
+        elif status is None and is_refused(error) and attempt < self.connection_retries:
+            wait = self.backoff(attempt)
+        else:
+            return None
+
+        self.retries += 1
+        return wait
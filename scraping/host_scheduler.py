@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agendador de Cortesia por Host
+Mantém um intervalo mínimo entre requisições ao mesmo host, deixando
+hosts diferentes serem acessados em paralelo
+"""
+
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from config import SETTINGS
+
+
+class HostScheduler:
+    def __init__(self, delay=None):
+        # Intervalo entre requisições ao mesmo host: número fixo ou (min, max)
+        self.delay = delay if delay is not None else SETTINGS['delay_between_requests']
+
+        self._next_slot = {}
+        self._host_delays = {}
+        self._lock = threading.Lock()
+
+        # Acima deste número de hosts, entradas antigas são descartadas
+        self.max_tracked_hosts = 10000
+
+    @staticmethod
+    def host_of(url):
+        """Retorna o host (netloc) de uma URL"""
+        return urlparse(url).netloc.lower()
+
+    def set_delay(self, host, delay):
+        """Define um intervalo específico para um host"""
+        with self._lock:
+            self._host_delays[host] = delay
+
+    def gap_for(self, host):
+        """Sorteia o intervalo até a próxima requisição ao host"""
+        delay = self._host_delays.get(host, self.delay)
+        if isinstance(delay, (tuple, list)):
+            return random.uniform(*delay)
+        return delay
+
+    def max_gap(self, host):
+        """Maior intervalo que pode ser sorteado para o host"""
+        delay = self._host_delays.get(host, self.delay)
+        if isinstance(delay, (tuple, list)):
+            return max(delay)
+        return delay
+
+    def _prune(self, now):
+        """Remove hosts cujo próximo horário livre já passou"""
+        expired = [host for host, slot in self._next_slot.items() if slot <= now]
+        for host in expired:
+            del self._next_slot[host]
+
+    def reserve(self, url):
+        """Reserva o próximo horário livre do host e retorna quanto esperar"""
+        host = self.host_of(url)
+        with self._lock:
+            now = time.monotonic()
+            if len(self._next_slot) > self.max_tracked_hosts:
+                self._prune(now)
+
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.gap_for(host)
+            return slot - now
+
+    def wait(self, url):
+        """Bloqueia até ser a vez do host da URL"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url):
+        """Versão assíncrona de wait()"""
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache HTTP em Disco para os Scrapers
+Guarda o corpo das respostas com ETag/Last-Modified e revalida com GET condicional
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import CACHE_CONFIG
+
+
+def cache_key(url):
+    """Normaliza a URL para uso como chave do cache"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+
+    # Remove a porta padrão do esquema
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+class HttpCache:
+    def __init__(self, directory=None, max_size_mb=None, max_age_days=None, fresh_for=None):
+        self.directory = directory or CACHE_CONFIG['directory']
+        self.max_bytes = (max_size_mb or CACHE_CONFIG['max_size_mb']) * 1024 * 1024
+        self.max_age = (max_age_days or CACHE_CONFIG['max_age_days']) * 86400
+        self.fresh_for = CACHE_CONFIG['fresh_for'] if fresh_for is None else fresh_for
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(self.directory, 'cache.sqlite'),
+            check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+        self._db.commit()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        # A cada N gravações o limite de tamanho é verificado
+        self.evict_every = 200
+
+        self.evict()
+
+    def _get(self, url):
+        """Busca a entrada do cache para a URL"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT url, etag, last_modified, headers, body, stored_at FROM responses WHERE key = ?",
+                (cache_key(url),)
+            ).fetchone()
+
+    def _touch(self, url, revalidated=False):
+        """Atualiza o horário de acesso (e de validação) da entrada"""
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._db.execute(
+                    "UPDATE responses SET accessed_at = ?, stored_at = ? WHERE key = ?",
+                    (now, now, cache_key(url))
+                )
+            else:
+                self._db.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                    (now, cache_key(url))
+                )
+            self._db.commit()
+
+    @staticmethod
+    def _build_response(url, row):
+        """Monta um requests.Response a partir de uma entrada do cache"""
+        response = requests.Response()
+        # URL final (após redirecionamentos), base dos links relativos
+        response.url = row[0] or url
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(json.loads(row[3]))
+        response._content = row[4]
+        response.from_cache = True
+        return response
+
+    def lookup_fresh(self, url):
+        """Retorna a resposta do cache se ela ainda não precisa ser revalidada"""
+        row = self._get(url)
+        if row and time.time() - row[5] < self.fresh_for:
+            self.hits += 1
+            self._touch(url)
+            return self._build_response(url, row)
+        return None
+
+    def conditional_headers(self, url):
+        """Cabeçalhos If-None-Match/If-Modified-Since para revalidar a URL"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified FROM responses WHERE key = ?",
+                (cache_key(url),)
+            ).fetchone()
+
+        headers = {}
+        if row:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def revalidated_response(self, url):
+        """Resposta do cache para um 304 Not Modified"""
+        row = self._get(url)
+        if row is None:
+            return None
+        self.revalidated += 1
+        self._touch(url, revalidated=True)
+        return self._build_response(url, row)
+
+    def store(self, url, response):
+        """Guarda uma resposta 200 no cache"""
+        if response.status_code != 200:
+            return
+        if 'no-store' in response.headers.get('Cache-Control', ''):
+            return
+
+        self.misses += 1
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cache_key(url),
+                    response.url or url,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    json.dumps(dict(response.headers)),
+                    body,
+                    len(body),
+                    now,
+                    now,
+                )
+            )
+            self._db.commit()
+
+        if self.misses % self.evict_every == 0:
+            self.evict()
+
+    def total_size(self):
+        """Tamanho total dos corpos guardados"""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def evict(self):
+        """Remove entradas expiradas e as menos usadas até caber no limite"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM responses WHERE stored_at < ?",
+                (time.time() - self.max_age,)
+            )
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Libera espaço até 90% do limite, começando pelas menos acessadas
+                target = total - int(self.max_bytes * 0.9)
+                freed = 0
+                keys = []
+                for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                    keys.append((key,))
+                    freed += size
+                    if freed >= target:
+                        break
+                self._db.executemany("DELETE FROM responses WHERE key = ?", keys)
+                logging.info(f"Cache: {len(keys)} entradas removidas ({freed} bytes)")
+            self._db.commit()
+
+    def close(self):
+        """Fecha o banco do cache"""
+        self.evict()
+        with self._lock:
+            self._db.close()
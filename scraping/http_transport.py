@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Camada de Transporte HTTP das Sessões
+Pools de conexões dimensionados para a concorrência do motor, conexões
+keep-alive reaproveitadas, cache de DNS do processo e estatísticas de reuso
+"""
+
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from adaptive_timeouts import HOST_LATENCY
+from config import TRANSPORT_CONFIG
+from crawl_metrics import METRICS
+
+
+class TransportStats:
+    """Contadores de requisições, conexões abertas e consultas de DNS"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.dns_lookups = 0
+        self.dns_hits = 0
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        """Contadores atuais e a taxa de reuso das conexões"""
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                'requests': self.requests,
+                'connections_opened': self.connections,
+                'connections_reused': reused,
+                'reuse_rate': reused / self.requests if self.requests else 0.0,
+                'dns_lookups': self.dns_lookups,
+                'dns_hits': self.dns_hits,
+            }
+
+    def summary(self):
+        stats = self.snapshot()
+        return (f"{stats['requests']} requisições, {stats['connections_opened']} conexões abertas "
+                f"({stats['reuse_rate']:.0%} de reuso), DNS: {stats['dns_lookups']} consultas, "
+                f"{stats['dns_hits']} do cache")
+
+
+# Compartilhado por todas as sessões do processo
+TRANSPORT_STATS = TransportStats()
+METRICS.add_collector('transport', TRANSPORT_STATS.snapshot)
+
+
+class DnsCache:
+    """Guarda as respostas de getaddrinfo por `ttl` segundos
+
+    Instalado no módulo socket, vale para todas as conexões do processo
+    (urllib3 resolve os nomes com socket.getaddrinfo). Falhas não são guardadas.
+    """
+
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._resolve = None
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[1] > now:
+            TRANSPORT_STATS.count('dns_hits')
+            return list(entry[0])
+
+        TRANSPORT_STATS.count('dns_lookups')
+        with METRICS.timer('dns'):
+            result = self._resolve(host, port, family, type, proto, flags)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (result, now + self.ttl)
+        return list(result)
+
+    def install(self):
+        self._resolve = socket.getaddrinfo
+        socket.getaddrinfo = self.getaddrinfo
+
+
+_dns_cache = None
+_dns_lock = threading.Lock()
+
+
+def install_dns_cache(ttl=None):
+    """Ativa o cache de DNS do processo (uma única vez)"""
+    global _dns_cache
+    with _dns_lock:
+        if _dns_cache is None:
+            _dns_cache = DnsCache(ttl or TRANSPORT_CONFIG['dns_ttl'])
+            _dns_cache.install()
+        return _dns_cache
+
+
+def timed_connect(connection, new_conn):
+    """Abre o socket contando a conexão e medindo o tempo de conexão do host"""
+    TRANSPORT_STATS.count('connections')
+    started = time.monotonic()
+    sock = new_conn()
+    elapsed = time.monotonic() - started
+    HOST_LATENCY.record_connect(connection.host, elapsed)
+    METRICS.observe('connect', elapsed)
+    return sock
+
+
+class CountingHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        # Chamado a cada socket aberto (inclusive quando uma conexão caída é refeita)
+        return timed_connect(self, super()._new_conn)
+
+
+class CountingHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        return timed_connect(self, super()._new_conn)
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CountingHTTPConnection
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CountingHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter que conta requisições e conexões novas"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        TRANSPORT_STATS.count('requests')
+        return super().send(request, *args, **kwargs)
+
+
+def configure_session(session, pool_hosts=None, pool_per_host=None):
+    """Monta na sessão adaptadores com pools dimensionados e liga o cache de DNS
+
+    `pool_hosts` é quantos hosts mantêm conexões abertas (o padrão do
+    requests, 10, faz o motor fechar e reabrir conexões quando busca muitos
+    hosts ao mesmo tempo) e `pool_per_host` quantas conexões cada host guarda.
+    """
+    adapter = PooledAdapter(
+        pool_connections=pool_hosts or TRANSPORT_CONFIG['pool_hosts'],
+        pool_maxsize=pool_per_host or TRANSPORT_CONFIG['pool_per_host'],
+        max_retries=TRANSPORT_CONFIG['max_retries'],
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if TRANSPORT_CONFIG['dns_cache']:
+        install_dns_cache()
+    return session
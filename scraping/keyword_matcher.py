@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Buscador de Palavras-chave em Múltiplos Padrões
+Compilado uma única vez, ignora acentos (clínica/clinica) e conta as
+ocorrências de cada palavra-chave para pontuar relevância
+"""
+
+import unicodedata
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def fold(text):
+    """Minúsculas e sem acentos, para comparação"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+class KeywordMatcher:
+    """Encontra todas as palavras-chave de um texto em uma passagem
+
+    Usa um autômato Aho-Corasick (pyahocorasick) quando instalado. Sem ele,
+    cada palavra é contada com str.count sobre o texto normalizado, que em
+    CPython é mais rápido do que um autômato escrito em Python puro.
+    """
+
+    def __init__(self, keywords):
+        # Palavras que ficam iguais sem acento contam como uma só
+        self.keywords = {}
+        for keyword in keywords:
+            self.keywords.setdefault(fold(keyword), keyword)
+
+        self._automaton = None
+        if ahocorasick is not None and self.keywords:
+            self._automaton = ahocorasick.Automaton()
+            for folded, keyword in self.keywords.items():
+                self._automaton.add_word(folded, keyword)
+            self._automaton.make_automaton()
+
+    def counts(self, text):
+        """Número de ocorrências de cada palavra-chave encontrada"""
+        folded = fold(text)
+        found = {}
+        if self._automaton is not None:
+            for _, keyword in self._automaton.iter(folded):
+                found[keyword] = found.get(keyword, 0) + 1
+        else:
+            for key, keyword in self.keywords.items():
+                count = folded.count(key)
+                if count:
+                    found[keyword] = count
+        return found
+
+    def matches(self, text):
+        """Verifica se alguma palavra-chave aparece no texto"""
+        folded = fold(text)
+        if self._automaton is not None:
+            for _ in self._automaton.iter(folded):
+                return True
+            return False
+        return any(key in folded for key in self.keywords)
+
+    def score(self, text):
+        """Total de ocorrências de palavras-chave (pontuação de relevância)"""
+        return sum(self.counts(text).values())
+
+
+_matchers = {}
+
+
+def get_matcher(keywords):
+    """Retorna um buscador compilado, reaproveitando o de mesma lista"""
+    key = tuple(keywords)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(key)
+        _matchers[key] = matcher
+    return matcher
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Crawler de Links por Prioridade (best-first)
+Pontua cada link pelo texto âncora, pelo caminho da URL (contato,
+fale-conosco, equipe...) e por palavras-chave, e sempre busca primeiro o
+link mais promissor, até uma profundidade e um orçamento de páginas por
+página inicial e por domínio, parando o domínio assim que o contato aparece
+"""
+
+import asyncio
+import heapq
+import logging
+from urllib.parse import urljoin, urlsplit
+
+from config import CRAWLER_CONFIG
+from keyword_matcher import fold
+from url_canon import canonical_url, registered_domain, url_key
+from visited_set import VisitedSet
+
+
+class LinkScorer:
+    """Pontua links candidatos: quanto maior, mais provável achar emails"""
+
+    def __init__(self, matcher, path_hints=None, skip_extensions=None):
+        self.matcher = matcher
+        hints = CRAWLER_CONFIG['path_hints'] if path_hints is None else path_hints
+        self.path_hints = {fold(hint): weight for hint, weight in hints.items()}
+        skip = CRAWLER_CONFIG['skip_extensions'] if skip_extensions is None else skip_extensions
+        self.skip_extensions = tuple(skip)
+
+    def should_follow(self, url):
+        """Só páginas HTTP, sem arquivos (pdf, imagens...)"""
+        parts = urlsplit(url)
+        return parts.scheme in ('http', 'https') and not parts.path.lower().endswith(self.skip_extensions)
+
+    def score(self, url, anchor_text=''):
+        """Pontuação do link pelo caminho, texto âncora e palavras-chave"""
+        path = fold(urlsplit(url).path)
+        anchor = fold(anchor_text or '')
+
+        score = 0
+        for hint, weight in self.path_hints.items():
+            if hint in path or hint in anchor:
+                score += weight
+
+        # Palavras médicas no texto do link valem mais do que na URL
+        score += 2 * self.matcher.score(anchor)
+        score += self.matcher.score(path.replace('-', ' ').replace('_', ' '))
+        return score
+
+
+class BestFirstCrawler:
+    """Busca sempre o link de maior prioridade da fronteira
+
+    `handle_page(url, response, error)` processa a página (pode ser uma
+    corrotina) e devolve seus links como pares (href, texto); quando achar o
+    contato, chama `satisfy(url)` para encerrar o domínio. Uma URL só é
+    registrada em `visited` (com `source`) quando sai da fronteira para ser
+    buscada, de modo que links cortados pelo orçamento não ficam pendentes.
+
+    Com `site_mode=True` cada página inicial é um site de clínica: os links
+    ficam no mesmo domínio, os caminhos de contato são testados logo após a
+    página inicial e cada domínio é buscado uma página por vez, para que a
+    parada antecipada evite as buscas seguintes.
+
+    `handoff(url)`, se informado, pode ficar com um link em vez da fronteira
+    (retornando True): o crawl com vários workers repassa assim os links de
+    domínios de outro shard para a fila compartilhada.
+
+    `frontier` (o CrawlState) guarda cada link que entra na fronteira, para
+    que um crawl interrompido seja retomado com `restore()` de onde parou.
+    """
+
+    def __init__(self, engine, scorer, handle_page, visited=None, source=None, max_depth=None,
+                 page_budget=None, concurrency=None, min_score=None, domain_budget=None,
+                 site_mode=False, handoff=None, frontier=None):
+        self.engine = engine
+        self.scorer = scorer
+        self.handle_page = handle_page
+        self.visited = VisitedSet() if visited is None else visited
+        self.source = source
+        self.max_depth = CRAWLER_CONFIG['max_depth'] if max_depth is None else max_depth
+        self.page_budget = page_budget or CRAWLER_CONFIG['pages_per_seed']
+        self.concurrency = concurrency or CRAWLER_CONFIG['concurrency']
+        self.min_score = CRAWLER_CONFIG['min_score'] if min_score is None else min_score
+        self.depth_penalty = CRAWLER_CONFIG['depth_penalty']
+        self.domain_budget = domain_budget or CRAWLER_CONFIG['pages_per_domain']
+        self.site_mode = site_mode
+        self.handoff = handoff
+        self.frontier = frontier
+        self.probe_paths = CRAWLER_CONFIG['contact_paths'] if site_mode else []
+
+        # Páginas iniciais entram na frente de tudo; em sites, só na frente dos palpites
+        self.seed_score = CRAWLER_CONFIG['site_seed_score'] if site_mode else float('inf')
+
+        # Fronteira: (-prioridade, ordem, url, profundidade, página inicial)
+        self._frontier = []
+        self._queued = set()
+        self._order = 0
+        self._busy = set()
+        self._frontier_domains = {}
+        self.fetched = {}
+        self.domain_pages = {}
+        self.satisfied = set()
+
+    def push(self, url, depth, seed, score):
+        """Adiciona o link à fronteira com sua prioridade (uma vez por URL)"""
+        key = url_key(url)
+        if key in self._queued or url in self.visited:
+            return
+        if self.frontier:
+            self.frontier.queue_link(url, self.source, depth, seed, score)
+        self.restore(url, depth, seed, score)
+
+    def restore(self, url, depth, seed, score):
+        """Põe o link na fronteira sem guardá-lo de novo (links da execução interrompida)"""
+        self._queued.add(url_key(url))
+        priority = score - self.depth_penalty * depth
+        self._heappush((-priority, self._order, url, depth, seed))
+        self._order += 1
+
+    def _heappush(self, item):
+        heapq.heappush(self._frontier, item)
+        domain = registered_domain(item[2])
+        self._frontier_domains[domain] = self._frontier_domains.get(domain, 0) + 1
+
+    def _heappop(self):
+        item = heapq.heappop(self._frontier)
+        domain = registered_domain(item[2])
+        self._frontier_domains[domain] -= 1
+        if not self._frontier_domains[domain]:
+            del self._frontier_domains[domain]
+        return item, domain
+
+    def push_seed(self, seed):
+        """Adiciona a página inicial e, em sites, os caminhos de contato prováveis"""
+        seed = canonical_url(seed)
+        if registered_domain(seed) in self.satisfied:
+            return
+        self.push(seed, 0, seed, self.seed_score)
+        for path in self.probe_paths:
+            probe = canonical_url(urljoin(seed, path))
+            # Um pouco abaixo de um link de contato encontrado de verdade
+            self.push(probe, 1, seed, self.scorer.score(probe) - 1)
+
+    def satisfy(self, url):
+        """Encerra o domínio da URL: o contato já foi encontrado"""
+        self.satisfied.add(registered_domain(url))
+
+    def _next(self):
+        """Link mais promissor com orçamento na página inicial e no domínio"""
+        deferred = []
+        try:
+            while self._frontier:
+                item, domain = self._heappop()
+                _, _, url, depth, seed = item
+                # O domínio da própria página inicial (ex.: o diretório) só
+                # é limitado pelo orçamento da página inicial
+                over_domain_budget = (self.domain_pages.get(domain, 0) >= self.domain_budget
+                                      and (self.site_mode or domain != registered_domain(seed)))
+                if (domain in self.satisfied
+                        or self.fetched.get(seed, 0) >= self.page_budget
+                        or over_domain_budget
+                        or url in self.visited):
+                    if self.frontier:
+                        self.frontier.drop_link(url)
+                    continue
+                if self.site_mode and domain in self._busy:
+                    # Espera a página em andamento do domínio (pode encerrá-lo)
+                    deferred.append(item)
+                    continue
+
+                self.fetched[seed] = self.fetched.get(seed, 0) + 1
+                self.domain_pages[domain] = self.domain_pages.get(domain, 0) + 1
+                self._busy.add(domain)
+                self.visited.add(url, self.source)
+                return url, depth, seed
+            return None
+        finally:
+            for item in deferred:
+                self._heappush(item)
+
+    async def _visit(self, url, depth, seed, timeout):
+        """Busca a página, processa e põe os links dela na fronteira"""
+        try:
+            await self._visit_page(url, depth, seed, timeout)
+        finally:
+            # O domínio só fica livre depois do parsing e dos links: em sites, a
+            # página pode ter encerrado o domínio (satisfy) antes da próxima busca
+            self._busy.discard(registered_domain(url))
+
+    async def _visit_page(self, url, depth, seed, timeout):
+        try:
+            response, error = await self.engine.fetch(url, timeout), None
+        except Exception as e:
+            response, error = None, e
+
+        try:
+            links = self.handle_page(url, response, error)
+            if asyncio.iscoroutine(links):
+                links = await links
+        except Exception as e:
+            logging.error(f"Erro ao tratar resultado de {url}: {e}")
+            return
+
+        if error or depth >= self.max_depth or registered_domain(url) in self.satisfied:
+            return
+        domain = registered_domain(url)
+        # Links relativos partem da URL final (após redirecionamentos)
+        base = getattr(response, 'url', None) or url
+        for href, text in links or []:
+            link = canonical_url(urljoin(base, href))
+            if not self.scorer.should_follow(link):
+                continue
+            if self.site_mode and registered_domain(link) != domain:
+                continue
+            # Links já sabidamente proibidos pelo robots.txt não gastam orçamento
+            robots = getattr(self.engine, 'robots', None)
+            if robots and robots.lookup(link) is False:
+                continue
+            score = self.scorer.score(link, text)
+            if score < self.min_score or (self.handoff and self.handoff(link)):
+                continue
+            self.push(link, depth + 1, seed, score)
+
+    async def _crawl(self, seeds, timeout):
+        seeds = iter(seeds)
+        tasks = set()
+        while True:
+            # Páginas iniciais entram aos poucos (listas grandes não vão todas para
+            # a fronteira), mantendo domínios suficientes para ocupar a concorrência
+            while seeds is not None and len(self._frontier_domains) < self.concurrency * 2:
+                seed = next(seeds, None)
+                if seed is None:
+                    seeds = None
+                elif seed:
+                    self.push_seed(seed)
+
+            while len(tasks) < self.concurrency:
+                item = self._next()
+                if item is None:
+                    break
+                tasks.add(asyncio.ensure_future(self._visit(*item, timeout)))
+            if not tasks:
+                if seeds is None:
+                    break
+                # Nada na fronteira podia ser buscado (orçamento, domínio encerrado
+                # ou já visitado): segue lendo as páginas iniciais restantes
+                continue
+            # Ao terminar qualquer página, a fronteira é reavaliada
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+    def crawl(self, seeds, timeout=None):
+        """Percorre a partir das páginas iniciais; retorna páginas buscadas por página inicial"""
+        self.engine.run(self._crawl, seeds, timeout)
+        return dict(self.fetched)
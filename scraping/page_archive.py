@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Arquivo de Páginas Brutas (WARC)
+Respostas HTTP gravadas em segmentos comprimidos só de acréscimo, no formato
+WARC (um membro gzip por registro), com um índice SQLite de URL -> posição
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import ARCHIVE_CONFIG
+from crawl_metrics import METRICS
+
+# O corpo é gravado já decodificado; estes cabeçalhos descreveriam o original
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+
+def http_block(response):
+    """Status, cabeçalhos e corpo da resposta como mensagem HTTP"""
+    body = response.content or b''
+    lines = [f"HTTP/1.1 {response.status_code} {response.reason or ''}".rstrip()]
+    for name, value in response.headers.items():
+        if name.lower() not in DROPPED_HEADERS:
+            lines.append(f"{name}: {value}")
+    lines.append(f"Content-Length: {len(body)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', errors='replace') + body
+
+
+def warc_record(url, block, fetched_at):
+    """Registro WARC 'response' com a mensagem HTTP"""
+    header = (
+        "WARC/1.0\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(fetched_at))}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(block)}\r\n"
+        "\r\n"
+    )
+    return header.encode('utf-8') + block + b'\r\n\r\n'
+
+
+def parse_record(data):
+    """requests.Response a partir de um membro gzip de um segmento"""
+    record = zlib.decompress(data, 31)
+    header, _, rest = record.partition(b'\r\n\r\n')
+    fields = dict(line.split(': ', 1) for line in header.decode('utf-8').split('\r\n')[1:])
+    head, _, body = rest[:int(fields['Content-Length'])].partition(b'\r\n\r\n')
+
+    lines = head.decode('latin-1').split('\r\n')
+    status = lines[0].split(' ', 2)
+    response = requests.Response()
+    response.url = fields['WARC-Target-URI']
+    response.status_code = int(status[1])
+    response.reason = status[2] if len(status) > 2 else ''
+    response.headers = CaseInsensitiveDict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+    response._content = body
+    return response
+
+
+def read_record(path, offset, length):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return parse_record(f.read(length))
+
+
+class PageArchive:
+    """Grava as respostas buscadas em segmentos .warc.gz
+
+    Cada registro é um membro gzip independente: o índice guarda segmento,
+    posição e tamanho, e um registro é lido sem descomprimir o resto do
+    segmento. Segmentos levam o PID no nome, então vários processos podem
+    gravar no mesmo diretório.
+    """
+
+    def __init__(self, directory=None, segment_mb=None, compress_level=None):
+        self.directory = directory or ARCHIVE_CONFIG['directory']
+        self.segment_bytes = int((segment_mb or ARCHIVE_CONFIG['segment_mb']) * 1024 * 1024)
+        self.compress_level = compress_level or ARCHIVE_CONFIG['compress_level']
+        self.commit_every = ARCHIVE_CONFIG['commit_every']
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=30000")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                target_uri TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                content_type TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_url ON records (url)")
+        self._db.commit()
+
+        self._segment = None
+        self._segment_name = None
+        self._segment_count = 0
+        self._uncommitted = 0
+
+        self.pages = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        METRICS.add_collector('archive', self.stats)
+
+    def _open_segment(self):
+        """Abre o próximo segmento deste processo"""
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_count += 1
+        self._segment_name = (f"segment-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+                              f"-{self._segment_count:05d}.warc.gz")
+        self._segment = open(os.path.join(self.directory, self._segment_name), 'ab')
+
+    def _commit(self):
+        # O segmento vai para o disco antes do índice apontar para ele
+        if self._segment is not None:
+            self._segment.flush()
+        self._db.commit()
+        self._uncommitted = 0
+
+    def write(self, url, response):
+        """Acrescenta a resposta ao segmento atual e ao índice"""
+        fetched_at = time.time()
+        block = http_block(response)
+        compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED, 31)
+        data = compressor.compress(warc_record(response.url or url, block, fetched_at)) + compressor.flush()
+
+        try:
+            with self._lock:
+                if self._segment is None or (self._segment.tell() and
+                                             self._segment.tell() + len(data) > self.segment_bytes):
+                    self._open_segment()
+                offset = self._segment.tell()
+                self._segment.write(data)
+                self._db.execute(
+                    "INSERT INTO records (url, target_uri, segment, offset, length, status, content_type, size, "
+                    "fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, response.url or url, self._segment_name, offset, len(data), response.status_code,
+                     response.headers.get('Content-Type'), len(block), fetched_at)
+                )
+                self.pages += 1
+                self.raw_bytes += len(block)
+                self.stored_bytes += len(data)
+                self._uncommitted += 1
+                if self._uncommitted >= self.commit_every:
+                    self._commit()
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Erro ao arquivar {url}: {e}")
+
+    def entries(self, latest=True, status=200):
+        """(url, segmento, posição, tamanho, Content-Type) em ordem de segmento e posição
+
+        Com `latest`, só a versão mais recente de cada URL.
+        """
+        with self._lock:
+            if latest:
+                rows = self._db.execute(
+                    "SELECT url, segment, offset, length, content_type FROM records WHERE id IN "
+                    "(SELECT MAX(id) FROM records WHERE status = ? GROUP BY url) ORDER BY segment, offset",
+                    (status,)
+                )
+            else:
+                rows = self._db.execute(
+                    "SELECT url, segment, offset, length, content_type FROM records WHERE status = ? "
+                    "ORDER BY segment, offset", (status,)
+                )
+            return rows.fetchall()
+
+    def contains(self, url):
+        """Verifica se a URL já tem alguma resposta arquivada"""
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM records WHERE url = ? LIMIT 1", (url,)).fetchone() is not None
+
+    def get(self, url):
+        """Última resposta arquivada da URL, ou None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT segment, offset, length FROM records WHERE url = ? ORDER BY id DESC LIMIT 1", (url,)
+            ).fetchone()
+            if row is not None and row[0] == self._segment_name:
+                self._segment.flush()
+        if row is None:
+            return None
+        return read_record(os.path.join(self.directory, row[0]), row[1], row[2])
+
+    def stats(self):
+        return {'pages': self.pages, 'raw_bytes': self.raw_bytes, 'stored_bytes': self.stored_bytes}
+
+    def summary(self):
+        ratio = self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0
+        return (f"{self.pages} páginas, {self.stored_bytes / 1e6:.1f} MB em {self.directory} "
+                f"(compressão {ratio:.1f}x)")
+
+    def close(self):
+        with self._lock:
+            self._commit()
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self._db.close()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extrator de Páginas em Passagem Única
+Percorre o HTML uma vez e devolve texto visível, título, h1, og:title,
+candidatos a nome, links e emails, compartilhado por todos os scrapers
+"""
+
+import re
+import time
+from html.parser import HTMLParser
+
+from config import SETTINGS
+
+# Padrão de email usado pelos scrapers
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# Seletores (em ordem de prioridade) usados para achar o nome da clínica
+NAME_SELECTORS = [
+    'h1', 'h2', '.clinic-name', '.business-name', '.company-name',
+    'title', '.title', '[class*="name"]', '[id*="name"]'
+]
+
+# Conteúdo destas tags nunca é texto visível
+SKIP_TAGS = {'script', 'style'}
+
+# Tags sem fechamento (não entram na pilha de elementos abertos)
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+}
+
+# Tamanho máximo de um nome de clínica
+MAX_NAME_LENGTH = 100
+
+
+class PageData:
+    """Dados extraídos de uma página"""
+
+    def __init__(self):
+        self.text = ''
+        self.title = None
+        self.h1 = None
+        self.og_title = None
+        self.names = {}
+        self.links = []
+        self.emails = []
+        # Segundos gastos em cada etapa ('parse', 'regex'), medidos onde a extração rodou
+        self.timings = {}
+
+    def clinic_name(self, selectors=NAME_SELECTORS):
+        """Primeiro candidato a nome seguindo a ordem dos seletores"""
+        for selector in selectors:
+            name = self.names.get(selector)
+            if name:
+                return name
+        return None
+
+
+def selectors_for(tag, attrs):
+    """Seletores de nome que o elemento satisfaz"""
+    matched = []
+    if tag in ('h1', 'h2', 'title'):
+        matched.append(tag)
+
+    classes = attrs.get('class') or ''
+    element_id = attrs.get('id') or ''
+    if classes:
+        tokens = classes.split()
+        for name in ('clinic-name', 'business-name', 'company-name', 'title'):
+            if name in tokens:
+                matched.append('.' + name)
+        if 'name' in classes:
+            matched.append('[class*="name"]')
+    if 'name' in element_id:
+        matched.append('[id*="name"]')
+
+    return matched
+
+
+class PageBuilder:
+    """Recebe os eventos do parser (início, fim, texto) e monta o PageData
+
+    Todos os backends de parser alimentam este mesmo objeto, de modo que a
+    extração é idêntica independentemente do parser usado.
+    """
+
+    def __init__(self, exclude_tags=()):
+        # Tags cujo texto não conta como conteúdo da página (ex.: nav, footer)
+        self.exclude_tags = set(exclude_tags)
+
+        self.page = PageData()
+        self._text = []
+        self._stack = []
+        self._skip_depth = 0
+        self._exclude_depth = 0
+        self._captures = []
+
+    def start(self, tag, attrs):
+        page = self.page
+
+        if tag == 'meta':
+            if attrs.get('property') == 'og:title' and page.og_title is None:
+                page.og_title = (attrs.get('content') or '').strip()
+            return
+        if tag in VOID_TAGS:
+            return
+
+        # Captura o texto dos elementos que ainda podem dar nome à página
+        capture = None
+        wanted = []
+        if not self._exclude_depth:
+            wanted = [s for s in selectors_for(tag, attrs) if s not in page.names]
+            if tag == 'title' and page.title is None:
+                wanted.append('<title>')
+            elif tag == 'h1' and page.h1 is None:
+                wanted.append('<h1>')
+        if tag == 'a' and attrs.get('href'):
+            wanted.append(('<a>', attrs['href']))
+        if wanted:
+            capture = (wanted, [])
+            self._captures.append(capture)
+
+        self._stack.append((tag, capture))
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        if tag in self.exclude_tags:
+            self._exclude_depth += 1
+
+    def end(self, tag):
+        # Fecha também os elementos que ficaram abertos dentro deste
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                break
+        else:
+            return
+
+        while len(self._stack) > index:
+            self._close(*self._stack.pop())
+
+    def _close(self, tag, capture):
+        if tag in SKIP_TAGS:
+            self._skip_depth -= 1
+        if tag in self.exclude_tags:
+            self._exclude_depth -= 1
+        if capture is None:
+            return
+
+        for index, active in enumerate(self._captures):
+            if active is capture:
+                del self._captures[index]
+                break
+        wanted, chunks = capture
+        text = ''.join(chunks).strip()
+        page = self.page
+        for selector in wanted:
+            if selector == '<title>':
+                page.title = text
+            elif selector == '<h1>':
+                page.h1 = text
+            elif isinstance(selector, tuple):
+                page.links.append((selector[1], text))
+            elif text and len(text) < MAX_NAME_LENGTH and selector not in page.names:
+                page.names[selector] = text
+
+    def data(self, data):
+        if self._skip_depth:
+            return
+        if not self._exclude_depth:
+            self._text.append(data)
+        for _, chunks in self._captures:
+            chunks.append(data)
+
+    def close(self):
+        while self._stack:
+            self._close(*self._stack.pop())
+        self.page.text = ''.join(self._text)
+        return self.page
+
+
+class _StdlibParser(HTMLParser):
+    """Backend html.parser (puro Python, sempre disponível)"""
+
+    def __init__(self, builder):
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+
+    def handle_starttag(self, tag, attrs):
+        self.builder.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.builder.start(tag, dict(attrs))
+        if tag not in VOID_TAGS:
+            self.builder.end(tag)
+
+    def handle_endtag(self, tag):
+        self.builder.end(tag)
+
+    def handle_data(self, data):
+        self.builder.data(data)
+
+
+def _parse_stdlib(html, builder):
+    parser = _StdlibParser(builder)
+    parser.feed(html)
+    parser.close()
+
+
+class _LxmlTarget:
+    """Adapta a interface de 'target' do lxml para o PageBuilder"""
+
+    def __init__(self, builder):
+        self.start = lambda tag, attrib: builder.start(tag, attrib)
+        self.end = builder.end
+        self.data = builder.data
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        pass
+
+
+def _parse_lxml(html, builder):
+    from lxml import etree
+    parser = etree.HTMLParser(target=_LxmlTarget(builder))
+    parser.feed(html)
+    parser.close()
+
+
+def _parse_selectolax(html, builder):
+    from selectolax.lexbor import LexborHTMLParser
+    root = LexborHTMLParser(html).root
+    if root is None:
+        return
+
+    # Percorre a árvore sem recursão emitindo os mesmos eventos dos outros parsers
+    builder.start(root.tag, root.attributes)
+    stack = [(root, root.child)]
+    while stack:
+        node, child = stack[-1]
+        if child is None:
+            stack.pop()
+            builder.end(node.tag)
+            continue
+
+        stack[-1] = (node, child.next)
+        tag = child.tag
+        if tag == '-text':
+            builder.data(child.text_content)
+        elif tag[0] not in '-_':
+            builder.start(tag, child.attributes)
+            stack.append((child, child.child))
+
+
+# Backends em ordem de preferência: (nome, módulo exigido, função)
+PARSER_BACKENDS = [
+    ('selectolax', 'selectolax', _parse_selectolax),
+    ('lxml', 'lxml', _parse_lxml),
+    ('html.parser', None, _parse_stdlib),
+]
+
+
+def available_backends():
+    """Backends de parser instalados, do mais rápido para o mais lento"""
+    backends = []
+    for name, module, function in PARSER_BACKENDS:
+        if module:
+            try:
+                __import__(module)
+            except ImportError:
+                continue
+        backends.append(name)
+    return backends
+
+
+_default_backend = None
+
+
+def get_backend(name=None):
+    """Função de parsing do backend pedido ('auto' escolhe o mais rápido instalado)"""
+    global _default_backend
+    name = name or SETTINGS.get('html_parser', 'auto')
+    if name == 'auto':
+        if _default_backend is None:
+            _default_backend = available_backends()[0]
+        name = _default_backend
+
+    for backend_name, _, function in PARSER_BACKENDS:
+        if backend_name == name:
+            return function
+    raise ValueError(f"Parser HTML desconhecido: {name}")
+
+
+# Cabeçalho e meta tags que declaram o charset
+CHARSET_HEADER_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+# Marcas de ordem de bytes (BOM)
+BOMS = [
+    (b'\xef\xbb\xbf', 'utf-8'),
+    (b'\xff\xfe', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16-be'),
+]
+
+
+def detect_encoding(content, content_type=None):
+    """Descobre o charset pelo BOM, cabeçalho Content-Type ou meta tag"""
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+
+    if content_type:
+        match = CHARSET_HEADER_PATTERN.search(content_type)
+        if match:
+            return match.group(1)
+
+    # A declaração precisa estar no início do documento
+    match = META_CHARSET_PATTERN.search(content[:4096])
+    if match:
+        return match.group(1).decode('ascii', errors='ignore')
+
+    return None
+
+
+def decode_html(content, content_type=None):
+    """Converte o corpo da resposta em texto sem detecção estatística de charset"""
+    if isinstance(content, str):
+        return content
+
+    encoding = detect_encoding(content, content_type)
+    for candidate in (encoding, 'utf-8'):
+        if candidate:
+            try:
+                return content.decode(candidate)
+            except (LookupError, UnicodeDecodeError):
+                pass
+    return content.decode('cp1252', errors='replace')
+
+
+def find_emails(text, patterns=(EMAIL_PATTERN,)):
+    """Emails candidatos do texto, sem duplicatas e na ordem em que aparecem"""
+    emails = {}
+    for pattern in patterns:
+        for email in pattern.findall(text):
+            emails.setdefault(email, None)
+    return list(emails)
+
+
+def extract_page(content, content_type=None, exclude_tags=(), email_patterns=(EMAIL_PATTERN,),
+                 backend=None):
+    """Extrai os dados de uma página em uma única passagem pelo HTML"""
+    started = time.perf_counter()
+    builder = PageBuilder(exclude_tags)
+    get_backend(backend)(decode_html(content, content_type), builder)
+    page = builder.close()
+    parsed = time.perf_counter()
+    page.emails = find_emails(page.text, email_patterns)
+    page.timings = {'parse': parsed - started, 'regex': time.perf_counter() - parsed}
+    return page
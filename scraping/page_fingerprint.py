@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Impressões Digitais de Páginas (Duplicatas e Quase Duplicatas)
+Hash exato e assinatura MinHash do corpo bruto, calculados antes do parsing,
+para não extrair de novo páginas repetidas ou geradas pelo mesmo modelo
+"""
+
+import hashlib
+import re
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from urllib.parse import urljoin, urlsplit
+
+from config import DEDUP_CONFIG
+from url_canon import canonical_url
+
+# Assinatura: o menor hash de cada um dos 64 compartimentos (MinHash de uma permutação)
+BINS = 64
+BIN_BITS = 6
+EMPTY = 1 << (32 - BIN_BITS)
+
+# Índice LSH: 16 faixas de 4 compartimentos; páginas com ~85% dos trechos em
+# comum quase sempre coincidem em alguma faixa
+BAND_ROWS = 4
+BANDS = BINS // BAND_ROWS
+
+# Páginas com poucos trechos não têm assinatura confiável (e são baratas de extrair)
+MIN_FEATURES = 16
+
+# Páginas guardadas por faixa (limita a busca em modelos muito repetidos)
+MAX_BUCKET = 16
+
+# Email ao redor de cada '@' do corpo bruto (o regex só roda onde há '@')
+EMAIL_LOCAL = re.compile(rb'[a-z0-9._%+-]{1,64}$')
+EMAIL_DOMAIN = re.compile(rb'[a-z0-9.-]+\.[a-z]{2,}')
+
+# Links do corpo (procurados no corpo em minúsculas, lidos no original)
+HREF = re.compile(rb'href\s*=\s*["\']?([^"\'\s>]+)')
+
+# hrefs que não levam a outra página
+NOT_PAGES = ('#', 'mailto:', 'tel:', 'javascript:')
+
+
+def exact_hash(content):
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def minhash(content):
+    """Assinatura MinHash do corpo em minúsculas (None se a página tiver poucos trechos)
+
+    Os trechos são os pedaços entre '<' (uma tag e o texto que a segue), sem
+    repetição: páginas do mesmo modelo que mudam só o nome, o endereço ou
+    alguns links têm quase todos os trechos em comum.
+    """
+    features = set(content.split(b'<'))
+    features.discard(b'')
+    if len(features) < MIN_FEATURES:
+        return None
+    slots = [EMPTY] * BINS
+    for value in map(zlib.crc32, features):
+        index = value & (BINS - 1)
+        value >>= BIN_BITS
+        if value < slots[index]:
+            slots[index] = value
+    return array('I', slots)
+
+
+def similarity(a, b):
+    """Fração estimada de trechos em comum (Jaccard) entre duas assinaturas"""
+    same = filled = 0
+    for x, y in zip(a, b):
+        if x == EMPTY and y == EMPTY:
+            continue
+        filled += 1
+        same += x == y
+    return same / filled if filled else 0.0
+
+
+def band_keys(signature):
+    return [hash((band,) + tuple(signature[band * BAND_ROWS:(band + 1) * BAND_ROWS])) for band in range(BANDS)]
+
+
+def raw_emails(content):
+    """Emails do corpo em minúsculas (inclusive em atributos, menus e rodapés)"""
+    emails = set()
+    at = content.find(b'@')
+    while at != -1:
+        local = EMAIL_LOCAL.search(content, max(0, at - 64), at)
+        domain = EMAIL_DOMAIN.match(content, at + 1)
+        if local and domain:
+            emails.add(content[local.start():domain.end()])
+        at = content.find(b'@', at + 1)
+    return frozenset(emails)
+
+
+def page_links(content, lowered, base_url=None):
+    """Links da página resolvidos contra a URL final, como o crawler os segue
+
+    Links relativos ao caminho ('contato', '?page=2') apontam para URLs
+    diferentes em cada página do modelo e passam por urljoin + canonical_url;
+    absolutos e relativos à raiz só ganham o esquema e o host (sem
+    canonizar, a mesma URL escrita de outro jeito conta como link novo, e a
+    página é extraída).
+    """
+    # bytes.lower() não muda o tamanho: as posições valem para o original
+    hrefs = {content[match.start(1):match.end(1)].decode('utf-8', errors='replace')
+             for match in HREF.finditer(lowered)}
+    if not base_url:
+        return frozenset(hrefs)
+
+    parts = urlsplit(base_url)
+    links = set()
+    for href in hrefs:
+        lower = href.lower()
+        if lower.startswith(('http://', 'https://')):
+            links.add(href)
+        elif href.startswith('//'):
+            links.add(f"{parts.scheme}:{href}")
+        elif href.startswith('/'):
+            links.add(f"{parts.scheme}://{parts.netloc}{href}")
+        elif not lower.startswith(NOT_PAGES):
+            links.add(canonical_url(urljoin(base_url, href)))
+    return frozenset(links)
+
+
+class Fingerprint:
+    """Impressão digital de uma página: hash exato, MinHash, emails e links do corpo"""
+
+    def __init__(self, content, url=None):
+        if isinstance(content, str):
+            # HTML renderizado pelo navegador
+            content = content.encode('utf-8', errors='replace')
+        self.exact = exact_hash(content)
+        self.size = len(content)
+        lowered = content.lower()
+        self.signature = minhash(lowered)
+        # O que a extração poderia achar de novo: emails e links a seguir
+        self.found = raw_emails(lowered) | page_links(content, lowered, url)
+
+
+class DuplicateFilter:
+    """Reconhece páginas já extraídas nesta execução
+
+    Duplicata exata (mesmo corpo em outra URL): a extração guardada é
+    reaproveitada. Quase duplicata (ao menos `min_similarity` dos trechos em
+    comum com uma página já extraída) sem nenhum email ou link que aquela
+    página não tivesse: a extração é pulada, pois não traria resultado novo
+    nem páginas novas para o crawler.
+    """
+
+    def __init__(self, min_similarity=None, max_pages=None, cache_pages=None):
+        self.min_similarity = min_similarity or DEDUP_CONFIG['min_similarity']
+        self.max_pages = max_pages or DEDUP_CONFIG['max_pages']
+        self.cache_pages = cache_pages or DEDUP_CONFIG['cache_pages']
+
+        self._pages = OrderedDict()
+        self._signatures = OrderedDict()
+        self._index = {}
+        self._lock = threading.Lock()
+
+        self.checked = 0
+        self.exact = 0
+        self.near = 0
+        self.skipped_bytes = 0
+
+    def _near(self, fingerprint):
+        """Página já extraída parecida e com todos os emails e links desta, ou None"""
+        seen = set()
+        for key in band_keys(fingerprint.signature):
+            for page_id in self._index.get(key, ()):
+                if page_id in seen:
+                    continue
+                seen.add(page_id)
+                signature, found = self._signatures[page_id]
+                if fingerprint.found <= found and similarity(signature, fingerprint.signature) >= self.min_similarity:
+                    return page_id
+        return None
+
+    def check(self, content, url=None):
+        """(impressão, página extraída reaproveitável ou None, se é quase duplicata)
+
+        `url` é a URL final da página, base dos links relativos.
+        """
+        fingerprint = Fingerprint(content, url)
+        with self._lock:
+            self.checked += 1
+            page = self._pages.get(fingerprint.exact)
+            if page is not None:
+                self._pages.move_to_end(fingerprint.exact)
+                self.exact += 1
+                self.skipped_bytes += fingerprint.size
+                return fingerprint, page, False
+            if fingerprint.signature is not None and self._near(fingerprint) is not None:
+                self.near += 1
+                self.skipped_bytes += fingerprint.size
+                return fingerprint, None, True
+        return fingerprint, None, False
+
+    def add(self, fingerprint, page):
+        """Registra a página recém-extraída"""
+        with self._lock:
+            self._pages[fingerprint.exact] = page
+            if len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+
+            if fingerprint.signature is None or fingerprint.exact in self._signatures:
+                return
+            self._signatures[fingerprint.exact] = (fingerprint.signature, fingerprint.found)
+            for key in band_keys(fingerprint.signature):
+                bucket = self._index.setdefault(key, [])
+                bucket.append(fingerprint.exact)
+                if len(bucket) > MAX_BUCKET:
+                    del bucket[0]
+            if len(self._signatures) > self.max_pages:
+                self._forget(next(iter(self._signatures)))
+
+    def _forget(self, page_id):
+        """Remove a página mais antiga do índice"""
+        signature, _ = self._signatures.pop(page_id)
+        for key in band_keys(signature):
+            bucket = self._index.get(key)
+            if bucket and page_id in bucket:
+                bucket.remove(page_id)
+                if not bucket:
+                    del self._index[key]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pages_checked': self.checked,
+                'exact_duplicates': self.exact,
+                'near_duplicates': self.near,
+                'skipped_bytes': self.skipped_bytes,
+            }
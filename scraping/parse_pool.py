@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Etapa de Parsing em Processos Separados
+O HTML baixado é extraído em um pool de processos (um por núcleo), ligado às
+requisições por uma fila limitada que segura o download quando o parsing atrasa
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config import DEDUP_CONFIG, SETTINGS
+from crawl_metrics import METRICS
+from page_extractor import EMAIL_PATTERN, extract_page
+from page_fingerprint import DuplicateFilter
+
+
+class ParsePool:
+    """Executa extract_page em processos, com no máximo `queue_size` páginas na fila
+
+    A fila do loop assíncrono e a das chamadas síncronas (threads de
+    renderização) são limitadas separadamente. Com `workers=0` (ou uma
+    máquina de um núcleo) a extração roda no próprio processo.
+
+    Antes de ir para a fila, o corpo passa pelo DuplicateFilter: duplicatas
+    exatas devolvem a extração já feita e quase duplicatas sem emails novos
+    devolvem None (nada novo na página).
+    """
+
+    def __init__(self, workers=None, queue_size=None, duplicates=None):
+        if workers is None:
+            workers = SETTINGS['parse_workers']
+        if workers is None:
+            cpus = os.cpu_count() or 1
+            workers = cpus if cpus > 1 else 0
+        self.workers = workers
+        self.queue_size = queue_size or SETTINGS['parse_queue_size'] or max(workers, 1) * 4
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._async_slots = None
+        self._loop = None
+
+        # Vezes em que a fila estava cheia e o download teve que esperar
+        self.backpressure_waits = 0
+
+        # Páginas repetidas ou do mesmo modelo não são extraídas de novo
+        if duplicates is None and DEDUP_CONFIG['enabled']:
+            duplicates = DuplicateFilter()
+        self.duplicates = duplicates
+        self.extracted = 0
+        self.extract_seconds = 0.0
+        if duplicates:
+            METRICS.add_collector('duplicates', self.duplicate_stats)
+
+    def _start(self):
+        """Cria os processos na primeira página"""
+        with self._lock:
+            if self._executor is None:
+                # 'spawn' evita fazer fork de um processo com threads de rede ativas
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                logging.info(f"Parsing em {self.workers} processos (fila de {self.queue_size} páginas)")
+            return self._executor
+
+    def _record(self, page, fingerprint=None):
+        """Soma às métricas do processo os tempos medidos no processo de parsing"""
+        for stage, seconds in page.timings.items():
+            METRICS.observe(stage, seconds)
+        self.extracted += 1
+        self.extract_seconds += sum(page.timings.values())
+        if fingerprint is not None:
+            self.duplicates.add(fingerprint, page)
+        return page
+
+    def _check(self, content, url=None):
+        """(impressão, página já extraída, pular): a página precisa ser extraída?"""
+        if not self.duplicates:
+            return None, None, False
+        with METRICS.timer('fingerprint'):
+            fingerprint, page, skip = self.duplicates.check(content, url)
+        if page is not None:
+            METRICS.inc('scraper_duplicates_total', kind='exact')
+        elif skip:
+            METRICS.inc('scraper_duplicates_total', kind='near')
+        return fingerprint, page, skip
+
+    def duplicate_stats(self):
+        """Duplicatas encontradas e o tempo de extração estimado que elas pouparam"""
+        stats = self.duplicates.snapshot()
+        mean = self.extract_seconds / self.extracted if self.extracted else 0.0
+        stats['saved_seconds'] = round((stats['exact_duplicates'] + stats['near_duplicates']) * mean, 3)
+        return stats
+
+    def duplicate_summary(self):
+        if not self.duplicates:
+            return "desligado"
+        stats = self.duplicate_stats()
+        return (f"{stats['exact_duplicates']} exatas e {stats['near_duplicates']} quase duplicatas "
+                f"de {stats['pages_checked']} páginas, {stats['skipped_bytes'] / 1e6:.1f} MB sem parsing "
+                f"(~{stats['saved_seconds']:.1f}s de extração poupados)")
+
+    def extract(self, content, content_type=None, exclude_tags=(), email_patterns=(EMAIL_PATTERN,), url=None):
+        """Extrai a página (bloqueia enquanto a fila estiver cheia); None para quase duplicatas"""
+        fingerprint, page, skip = self._check(content, url)
+        if page is not None or skip:
+            return page
+
+        args = (content, content_type, tuple(exclude_tags), tuple(email_patterns))
+        if not self.workers:
+            return self._record(extract_page(*args), fingerprint)
+
+        if not self._slots.acquire(blocking=False):
+            self.backpressure_waits += 1
+            self._slots.acquire()
+        try:
+            return self._record(self._start().submit(extract_page, *args).result(), fingerprint)
+        finally:
+            self._slots.release()
+
+    def _slots_for_loop(self):
+        """Semáforo assíncrono da fila, refeito a cada novo loop do motor"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._async_slots = asyncio.Semaphore(self.queue_size)
+        return self._async_slots
+
+    async def extract_async(self, content, content_type=None, exclude_tags=(), email_patterns=(EMAIL_PATTERN,),
+                            url=None):
+        """Extrai a página sem bloquear o loop; espera vaga na fila se ela estiver cheia
+
+        Enquanto o handler espera, a tarefa do motor continua pendente, e o
+        motor para de agendar novas URLs ao chegar em max_pending.
+        """
+        fingerprint, page, skip = self._check(content, url)
+        if page is not None or skip:
+            return page
+
+        args = (content, content_type, tuple(exclude_tags), tuple(email_patterns))
+        if not self.workers:
+            return self._record(extract_page(*args), fingerprint)
+
+        slots = self._slots_for_loop()
+        if slots.locked():
+            self.backpressure_waits += 1
+        async with slots:
+            page = await asyncio.wrap_future(self._start().submit(extract_page, *args))
+            return self._record(page, fingerprint)
+
+    def close(self):
+        """Encerra os processos de parsing"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
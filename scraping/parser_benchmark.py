@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos Parsers HTML
+Mede páginas/segundo de cada backend do extrator sobre páginas salvas
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from page_extractor import available_backends, extract_page
+
+
+def load_corpus_dir(directory):
+    """Carrega as páginas .html/.htm de um diretório"""
+    pages = []
+    for pattern in ('*.html', '*.htm'):
+        for path in sorted(glob.glob(os.path.join(directory, '**', pattern), recursive=True)):
+            with open(path, 'rb') as f:
+                pages.append((f.read(), None))
+    return pages
+
+
+def load_corpus_cache(cache_dir, limit=None):
+    """Carrega as páginas guardadas no cache HTTP dos scrapers"""
+    db = sqlite3.connect(os.path.join(cache_dir, 'cache.sqlite'))
+    query = "SELECT body, headers FROM responses"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    pages = []
+    for body, headers in db.execute(query):
+        headers = {key.lower(): value for key, value in json.loads(headers).items()}
+        content_type = headers.get('content-type', '')
+        if 'html' in content_type.lower():
+            pages.append((body, content_type))
+    db.close()
+    return pages
+
+
+def run_backend(pages, backend, repeat):
+    """Extrai todas as páginas com o backend e retorna o tempo de CPU"""
+    start = time.process_time()
+    for _ in range(repeat):
+        for content, content_type in pages:
+            extract_page(content, content_type, backend=backend)
+    return time.process_time() - start
+
+
+def run_bs4_baseline(pages, repeat):
+    """Fluxo antigo: BeautifulSoup(html.parser) + decompose + get_text + selects"""
+    from bs4 import BeautifulSoup
+    from page_extractor import EMAIL_PATTERN, NAME_SELECTORS
+
+    start = time.process_time()
+    for _ in range(repeat):
+        for content, _ in pages:
+            soup = BeautifulSoup(content, 'html.parser')
+            for script in soup(["script", "style"]):
+                script.decompose()
+            EMAIL_PATTERN.findall(soup.get_text())
+            for selector in NAME_SELECTORS:
+                if any(el.get_text().strip() for el in soup.select(selector)):
+                    break
+    return time.process_time() - start
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark dos parsers HTML do extrator")
+    parser.add_argument('--corpus', help="Diretório com páginas de clínicas salvas (.html)")
+    parser.add_argument('--cache-dir', help="Usa as páginas do cache HTTP (ex.: .http_cache)")
+    parser.add_argument('--limit', type=int, help="Número máximo de páginas do cache")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições sobre o corpus")
+    parser.add_argument('--baseline', action='store_true', help="Inclui o fluxo antigo com BeautifulSoup")
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus_dir(args.corpus)
+    elif args.cache_dir:
+        pages = load_corpus_cache(args.cache_dir, args.limit)
+    else:
+        parser.error("informe --corpus ou --cache-dir")
+
+    if not pages:
+        print("❌ Nenhuma página encontrada no corpus")
+        return 1
+
+    total_bytes = sum(len(content) for content, _ in pages) * args.repeat
+    total_pages = len(pages) * args.repeat
+    print(f"📄 Corpus: {len(pages)} páginas ({total_bytes / args.repeat / 1024 / 1024:.1f} MB), "
+          f"{args.repeat} repetições")
+    print("-" * 60)
+    print(f"{'Backend':<14}{'páginas/s':>12}{'MB/s':>10}{'ms/página':>12}")
+
+    backends = [(name, lambda name=name: run_backend(pages, name, args.repeat))
+                for name in available_backends()]
+    if args.baseline:
+        backends.append(('bs4 (antigo)', lambda: run_bs4_baseline(pages, args.repeat)))
+
+    for name, run in backends:
+        elapsed = run()
+        print(f"{name:<14}{total_pages / elapsed:>12.1f}{total_bytes / elapsed / 1024 / 1024:>10.2f}"
+              f"{elapsed / total_pages * 1000:>12.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decisão Aprendida de Quando Renderizar com Selenium
+Registra por domínio e por modelo de página se o navegador já trouxe emails
+que o HTML estático não tinha, e guarda o histórico entre execuções
+"""
+
+import os
+import random
+import re
+import sqlite3
+import threading
+from urllib.parse import urlsplit
+
+from config import RENDER_POLICY_CONFIG
+
+# Trechos do caminho que variam entre páginas do mesmo modelo (ids, slugs numéricos)
+VARIABLE_SEGMENT = re.compile(r'\d|^[0-9a-f]{16,}$', re.I)
+
+# Decisões possíveis para uma URL
+STATIC = 'static'  # Só requests (o navegador nunca ajudou)
+FALLBACK = 'fallback'  # requests e, se não achar nada, navegador
+BROWSER = 'browser'  # Direto ao navegador (o HTML estático vem sempre vazio)
+
+
+def domain_of(url):
+    """Domínio da URL sem 'www.'"""
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def template_of(url):
+    """Modelo da página: caminho com ids trocados por '*' (ex.: /medico/*/contato)"""
+    segments = [s for s in urlsplit(url).path.split('/') if s]
+    shape = ['*' if VARIABLE_SEGMENT.search(s) else s.lower() for s in segments[:3]]
+    if len(segments) > 3:
+        shape.append('...')
+    return '/' + '/'.join(shape)
+
+
+class RenderPolicy:
+    def __init__(self, output_dir='.', min_samples=None, explore_rate=None, filename=None):
+        self.min_samples = min_samples or RENDER_POLICY_CONFIG['min_samples']
+        self.explore_rate = RENDER_POLICY_CONFIG['explore_rate'] if explore_rate is None else explore_rate
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, filename or RENDER_POLICY_CONFIG['filename'])
+
+        # Não é limpo entre execuções: o aprendizado continua valendo
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outcomes (
+                domain TEXT NOT NULL,
+                template TEXT NOT NULL,
+                static_hits INTEGER NOT NULL DEFAULT 0,
+                static_empty INTEGER NOT NULL DEFAULT 0,
+                renders INTEGER NOT NULL DEFAULT 0,
+                render_hits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (domain, template)
+            )
+        """)
+        self._db.commit()
+
+        # Contagens em memória: {(domínio, modelo): [static_hits, static_empty, renders, render_hits]}
+        self._stats = {}
+        for domain, template, *counts in self._db.execute("SELECT * FROM outcomes"):
+            self._stats[(domain, template)] = counts
+        self._dirty = set()
+
+        # Páginas que a decisão poupou de uma segunda busca
+        self.renders_skipped = 0
+        self.static_skipped = 0
+
+    def _record(self, url, column):
+        """Soma 1 ao contador do modelo e ao do domínio inteiro ('*')"""
+        domain = domain_of(url)
+        with self._lock:
+            for key in ((domain, template_of(url)), (domain, '*')):
+                self._stats.setdefault(key, [0, 0, 0, 0])[column] += 1
+                self._dirty.add(key)
+
+    def record_static(self, url, found):
+        """Resultado da busca com requests (found = achou emails)"""
+        self._record(url, 0 if found else 1)
+
+    def record_render(self, url, found):
+        """Resultado da renderização de uma página vazia no HTML estático"""
+        self._record(url, 2)
+        if found:
+            self._record(url, 3)
+
+    def _decide(self, counts):
+        static_hits, static_empty, renders, render_hits = counts
+        if renders >= self.min_samples and not render_hits:
+            return STATIC
+        if static_empty >= self.min_samples and not static_hits and render_hits * 2 >= renders > 0:
+            return BROWSER
+        return None
+
+    def decide(self, url):
+        """STATIC, FALLBACK ou BROWSER para a URL, pelo modelo e depois pelo domínio"""
+        domain = domain_of(url)
+        with self._lock:
+            decision = None
+            for key in ((domain, template_of(url)), (domain, '*')):
+                counts = self._stats.get(key)
+                if counts and sum(counts[:2]) >= self.min_samples:
+                    decision = self._decide(counts)
+                    break
+
+        # De vez em quando testa de novo o caminho completo, caso o site tenha mudado
+        if decision is None or random.random() < self.explore_rate:
+            return FALLBACK
+
+        if decision == STATIC:
+            self.renders_skipped += 1
+        else:
+            self.static_skipped += 1
+        return decision
+
+    def flush(self):
+        """Grava no disco as contagens alteradas"""
+        with self._lock:
+            rows = [key + tuple(self._stats[key]) for key in self._dirty]
+            self._dirty.clear()
+            self._db.executemany("INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def close(self):
+        """Grava tudo e fecha o banco"""
+        self.flush()
+        with self._lock:
+            self._db.close()
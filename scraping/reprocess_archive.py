@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reprocessamento do Arquivo de Páginas
+Roda a extração de novo sobre as páginas arquivadas, em paralelo em todos os
+núcleos e sem acessar a rede (ex.: depois de mudar o regex de email ou a
+heurística do nome da clínica)
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import groupby
+
+from config import SETTINGS
+from page_archive import PageArchive, parse_record
+from page_extractor import extract_page
+from result_sink import RESULT_FORMATS
+
+# Registros entregues a um processo de uma vez (todos do mesmo segmento)
+CHUNK_SIZE = 200
+
+
+def is_html(content_type):
+    return not content_type or 'html' in content_type.lower()
+
+
+def chunks(entries, size=CHUNK_SIZE):
+    """Lotes (segmento, [(url, posição, tamanho, Content-Type)]) na ordem do arquivo"""
+    for segment, group in groupby(entries, key=lambda entry: entry[1]):
+        batch = []
+        for url, _, offset, length, content_type in group:
+            batch.append((url, offset, length, content_type))
+            if len(batch) >= size:
+                yield segment, batch
+                batch = []
+        if batch:
+            yield segment, batch
+
+
+def extract_chunk(path, batch, exclude_tags, email_patterns):
+    """Lê e extrai um lote de registros de um segmento (roda num processo de parsing)"""
+    pages = []
+    with open(path, 'rb') as f:
+        for url, offset, length, content_type in batch:
+            try:
+                f.seek(offset)
+                response = parse_record(f.read(length))
+                pages.append((url, extract_page(response.content, content_type, exclude_tags, email_patterns)))
+            except Exception as e:
+                logging.warning(f"Registro ilegível de {url} em {path}: {e}")
+    return pages
+
+
+def build_scraper(name, output_dir, output_format=None):
+    """Scraper cujas regras (regex, palavras-chave, nome da clínica) valem para o reprocessamento"""
+    if name == 'email':
+        from clinic_email_scraper import ClinicEmailScraper
+        return ClinicEmailScraper(output_dir=output_dir, output_format=output_format)
+    from advanced_clinic_scraper import AdvancedClinicScraper
+    return AdvancedClinicScraper(output_dir=output_dir, output_format=output_format)
+
+
+def reprocess(archive, scraper, workers=None):
+    """Extrai de novo a última versão de cada página do arquivo; retorna (páginas, resultados)
+
+    Os processos leem os segmentos por conta própria, então só os dados
+    extraídos voltam para este processo, onde o scraper monta os resultados.
+    """
+    if workers is None:
+        workers = SETTINGS['parse_workers']
+    if workers is None:
+        workers = os.cpu_count() or 1
+    exclude_tags, email_patterns = scraper.extract_options()
+    entries = [entry for entry in archive.entries() if is_html(entry[4])]
+    counts = {'pages': 0, 'results': 0}
+    print(f"Reprocessando {len(entries)} páginas em {max(workers, 1)} processos...")
+
+    def handle(pages):
+        for url, page in pages:
+            counts['pages'] += 1
+            result = scraper.page_result(url, page, 'archive')
+            if result:
+                scraper.add_result(result)
+                counts['results'] += 1
+
+    if not workers:
+        for segment, batch in chunks(entries):
+            handle(extract_chunk(os.path.join(archive.directory, segment), batch, exclude_tags, email_patterns))
+        return counts['pages'], counts['results']
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for segment, batch in chunks(entries):
+            # Poucos lotes à frente: a memória não cresce com o tamanho do arquivo
+            while len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    handle(future.result())
+            pending.add(executor.submit(extract_chunk, os.path.join(archive.directory, segment), batch,
+                                        exclude_tags, email_patterns))
+        for future in wait(pending).done:
+            handle(future.result())
+    return counts['pages'], counts['results']
+
+
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description="Reprocessa o arquivo de páginas sem acessar a rede")
+    parser.add_argument('archive_dir', help="Diretório do arquivo (ex.: <output-dir>/page_archive)")
+    parser.add_argument('--scraper', choices=('advanced', 'email'), default='advanced',
+                        help="Regras de extração usadas (scraper avançado ou de emails)")
+    parser.add_argument('--output-dir', default='.', help="Diretório dos novos resultados")
+    parser.add_argument('--format', choices=sorted(RESULT_FORMATS), help="Formato do arquivo de resultados")
+    parser.add_argument('--excel', action='store_true', help="Gera também um .xlsx a partir dos resultados")
+    parser.add_argument('--workers', type=int, help="Processos de parsing (padrão: um por núcleo)")
+    return parser.parse_args()
+
+
+def main():
+    """Função principal"""
+    args = parse_args()
+    # Antes dos scrapers: o basicConfig deles vira no-op e o console fica só
+    # com os avisos, sem uma linha por clínica encontrada
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if not os.path.exists(os.path.join(args.archive_dir, 'index.sqlite')):
+        print(f"❌ Nenhum arquivo de páginas em {args.archive_dir}")
+        return 1
+
+    archive = PageArchive(args.archive_dir)
+    scraper = build_scraper(args.scraper, args.output_dir, args.format)
+    started = time.perf_counter()
+    try:
+        pages, results = reprocess(archive, scraper, args.workers)
+    finally:
+        archive.close()
+        scraper.parse_pool.close()
+    elapsed = time.perf_counter() - started
+
+    filename = scraper.save_results(excel=args.excel)
+    print(f"✅ {pages} páginas reprocessadas em {elapsed:.1f}s ({pages / elapsed if elapsed else 0:.0f} páginas/s)")
+    print(f"Total de clínicas encontradas: {results}")
+    print(f"Emails únicos: {len(scraper.results.emails)}")
+    print(f"Arquivo salvo: {filename}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gravação Contínua dos Resultados
+Escreve cada resultado assim que é encontrado (CSV, JSONL ou Parquet) e gera
+o Excel depois, a partir do arquivo gravado
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from config import OUTPUT_CONFIG
+
+# Formatos aceitos e a extensão de cada um
+RESULT_FORMATS = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet'}
+
+# Número de resultados guardados para o resumo final
+PREVIEW_SIZE = 5
+
+
+class ResultSink:
+    """Grava as linhas dos resultados em um arquivo só de acréscimo
+
+    CSV e JSONL vão para o disco a cada flush e sobrevivem a uma queda.
+    Parquet (pyarrow) grava um row group por flush, mas o arquivo só fica
+    legível depois do close(); numa queda, --resume o refaz a partir do
+    estado do crawl.
+    """
+
+    def __init__(self, basename, columns, format=None, flush_every=None, flush_interval=None):
+        self.format = format or OUTPUT_CONFIG['format']
+        if self.format not in RESULT_FORMATS:
+            raise ValueError(f"Formato de saída desconhecido: {self.format}")
+        if self.format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Formato parquet requer o pacote pyarrow (pip install pyarrow)")
+
+        self.path = basename + RESULT_FORMATS[self.format]
+        self.columns = list(columns)
+        self.flush_every = flush_every or (
+            OUTPUT_CONFIG['row_group_size'] if self.format == 'parquet' else OUTPUT_CONFIG['flush_every']
+        )
+        self.flush_interval = OUTPUT_CONFIG['flush_interval'] if flush_interval is None else flush_interval
+
+        self._lock = threading.Lock()
+        self._opened = False
+        self._file = None
+        self._writer = None
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+        # Resumo sem manter todos os resultados em memória
+        self.results = 0
+        self.rows = 0
+        self.emails = set()
+        self.preview = []
+
+    def _open(self):
+        """Abre o arquivo na primeira linha (nenhum arquivo se não houver resultados)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.format == 'csv':
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+            self._writer.writeheader()
+        elif self.format == 'jsonl':
+            self._file = open(self.path, 'w', encoding='utf-8')
+
+    def write(self, result, rows):
+        """Registra um resultado e suas linhas (uma por email)"""
+        with self._lock:
+            if self._buffer is None:
+                raise ValueError("ResultSink já foi fechado")
+            if not self._opened:
+                self._open()
+                self._opened = True
+
+            self.results += 1
+            self.rows += len(rows)
+            self.emails.update(result['emails'])
+            if len(self.preview) < PREVIEW_SIZE:
+                self.preview.append(result)
+
+            self._buffer.extend(rows)
+            if (len(self._buffer) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            if self.format == 'csv':
+                self._writer.writerows(self._buffer)
+            elif self.format == 'jsonl':
+                for row in self._buffer:
+                    self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            else:
+                self._write_row_group()
+            self._buffer = []
+
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def _write_row_group(self):
+        """Grava as linhas acumuladas como um row group do Parquet"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(
+            self._buffer,
+            schema=pa.schema([(column, pa.string()) for column in self.columns])
+        )
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def flush(self):
+        """Força a gravação das linhas pendentes"""
+        with self._lock:
+            if self._buffer is not None:
+                self._flush()
+
+    def close(self):
+        """Grava o que falta e fecha o arquivo; retorna o caminho (ou None se vazio)"""
+        with self._lock:
+            if self._buffer is None:
+                return self.path if self.results else None
+            self._flush()
+            self._buffer = None
+            if self._file is not None:
+                self._file.close()
+            elif self._writer is not None:
+                self._writer.close()
+        return self.path if self.results else None
+
+
+def read_results(path):
+    """Lê um arquivo de resultados (CSV, JSONL ou Parquet) como DataFrame"""
+    import pandas as pd
+
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.jsonl'):
+        return pd.read_json(path, lines=True, dtype=str)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def export_excel(path, excel_path=None):
+    """Gera o .xlsx a partir do arquivo de resultados já gravado"""
+    excel_path = excel_path or os.path.splitext(path)[0] + '.xlsx'
+    read_results(path).to_excel(excel_path, index=False)
+    logging.info(f"Resultados exportados para Excel: {excel_path}")
+    return excel_path
+
+
+def main():
+    """Exporta um arquivo de resultados para Excel"""
+    parser = argparse.ArgumentParser(description="Exporta os resultados gravados para Excel")
+    parser.add_argument('results', help="Arquivo de resultados (.csv, .jsonl ou .parquet)")
+    parser.add_argument('-o', '--output', help="Arquivo .xlsx de saída")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.results):
+        print(f"❌ Arquivo não encontrado: {args.results}")
+        return 1
+
+    excel_path = export_excel(args.results, args.output)
+    print(f"✅ Excel gerado: {excel_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
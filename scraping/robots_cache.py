@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de robots.txt por Host
+Baixa o robots.txt uma vez por host e o reaproveita até o TTL expirar,
+respondendo permitido/proibido sem requisições extras e repassando o
+Crawl-delay ao agendador de cortesia
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from config import ROBOTS_CONFIG
+from crawl_metrics import METRICS
+
+# Tamanho máximo lido do robots.txt (RFC 9309 pede ao menos 500 KiB)
+MAX_ROBOTS_BYTES = 500 * 1024
+
+
+class RobotsDisallowed(Exception):
+    """A URL é proibida pelo robots.txt do site"""
+
+
+class RobotsCache:
+    """Regras de robots.txt em memória, uma entrada por esquema + host
+
+    Respostas 4xx (sem robots.txt) liberam tudo; 5xx proíbem o host por
+    `error_ttl` (ou mantêm as regras anteriores, se houver). Falhas de rede
+    liberam a URL, para que o erro real apareça na busca da página.
+    """
+
+    def __init__(self, session, scheduler=None, ttl=None, error_ttl=None, user_agent=None):
+        self.session = session
+        self.scheduler = scheduler
+        self.ttl = ttl or ROBOTS_CONFIG['ttl']
+        self.error_ttl = error_ttl or ROBOTS_CONFIG['error_ttl']
+        self.user_agent = user_agent or ROBOTS_CONFIG['user_agent']
+        self.timeout = ROBOTS_CONFIG['timeout']
+        self.max_crawl_delay = ROBOTS_CONFIG['max_crawl_delay']
+        self.max_hosts = ROBOTS_CONFIG['max_hosts']
+
+        # esquema://host -> (regras, expira em); mais antigos primeiro
+        self._rules = OrderedDict()
+        self._lock = threading.Lock()
+        self._host_locks = {}
+
+        self.fetches = 0
+        self.disallowed = 0
+
+    @staticmethod
+    def origin_of(url):
+        """Esquema + host da URL (cada um tem seu robots.txt)"""
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def _cached(self, origin, now):
+        with self._lock:
+            entry = self._rules.get(origin)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+            return None
+
+    def _check(self, parser, url):
+        if parser.can_fetch(self.user_agent, url):
+            return True
+        self.disallowed += 1
+        return False
+
+    def lookup(self, url):
+        """Resposta do cache sem rede: True/False, ou None se o host ainda não foi lido"""
+        parser = self._cached(self.origin_of(url), time.monotonic())
+        return None if parser is None else self._check(parser, url)
+
+    def allowed(self, url):
+        """Verifica se a URL pode ser buscada (baixa o robots.txt do host se preciso)"""
+        origin = self.origin_of(url)
+        parser = self._cached(origin, time.monotonic())
+        if parser is None:
+            parser = self._load(origin)
+        return self._check(parser, url)
+
+    def sitemaps(self, url):
+        """URLs das linhas Sitemap do robots.txt do host"""
+        origin = self.origin_of(url)
+        parser = self._cached(origin, time.monotonic()) or self._load(origin)
+        return parser.site_maps() or []
+
+    def _load(self, origin):
+        """Baixa o robots.txt do host; uma única requisição mesmo com várias threads"""
+        with self._lock:
+            host_lock = self._host_locks.setdefault(origin, threading.Lock())
+
+        with host_lock:
+            # Outra thread pode ter baixado enquanto esta esperava
+            now = time.monotonic()
+            parser = self._cached(origin, now)
+            if parser is not None:
+                return parser
+
+            with self._lock:
+                previous = self._rules.get(origin)
+            parser, ttl = self._fetch(origin, previous[0] if previous else None)
+            self._apply_crawl_delay(origin, parser)
+
+            with self._lock:
+                self._rules[origin] = (parser, now + ttl)
+                self._rules.move_to_end(origin)
+                while len(self._rules) > self.max_hosts:
+                    old_origin, _ = self._rules.popitem(last=False)
+                    self._host_locks.pop(old_origin, None)
+            return parser
+
+    def _fetch(self, origin, previous):
+        """Regras do host e por quanto tempo valem"""
+        parser = RobotFileParser(origin + '/robots.txt')
+        try:
+            self.fetches += 1
+            with METRICS.timer('robots'):
+                response = self.session.get(origin + '/robots.txt', timeout=self.timeout)
+        except Exception as e:
+            logging.debug(f"robots.txt indisponível em {origin}: {e}")
+            parser.allow_all = True
+            return parser, self.error_ttl
+
+        if response.status_code >= 500:
+            logging.warning(f"robots.txt de {origin} retornou {response.status_code}")
+            if previous is not None:
+                return previous, self.error_ttl
+            parser.disallow_all = True
+            return parser, self.error_ttl
+
+        if response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            text = response.content[:MAX_ROBOTS_BYTES].decode(response.encoding or 'utf-8', errors='replace')
+            parser.parse(text.splitlines())
+        return parser, self.ttl
+
+    def _apply_crawl_delay(self, origin, parser):
+        """Passa o Crawl-delay do site ao agendador, se for maior que o intervalo atual"""
+        if self.scheduler is None:
+            return
+        crawl_delay = parser.crawl_delay(self.user_agent)
+        if not crawl_delay:
+            return
+
+        host = self.scheduler.host_of(origin)
+        current = self.scheduler.max_gap(host)
+        delay = min(float(crawl_delay), self.max_crawl_delay)
+        if delay > current:
+            self.scheduler.set_delay(host, delay)
+            logging.info(f"Crawl-delay de {delay:.1f}s para {host}")
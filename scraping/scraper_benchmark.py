@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark Offline dos Scrapers
+Sobe servidores HTTP locais com milhares de páginas sintéticas de clínicas,
+diretórios e contatos (latência, tamanho e falhas configuráveis) e mede cada
+scraper contra eles: páginas/s, latência p50/p99, CPU por página e pico de RSS
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+TARGETS = ('pipeline', 'advanced', 'directory', 'email', 'simple')
+
+SPECIALTIES = ['Cardiologia', 'Dermatologia', 'Pediatria', 'Ortopedia', 'Ginecologia', 'Neurologia']
+FILLER = ("Atendimento humanizado com equipe multidisciplinar, convênios e particular. "
+          "Agende sua consulta pelo telefone ou venha nos visitar. ")
+
+
+class SyntheticSite:
+    """Gera as páginas das clínicas de forma determinística (mesma semente, mesmas páginas)"""
+
+    def __init__(self, clinics, bases, page_kb=20, email_on_home=0.3, per_directory=50, seed=42):
+        self.clinics = clinics
+        self.bases = bases
+        self.page_kb = page_kb
+        self.email_on_home = email_on_home
+        self.per_directory = per_directory
+        self.seed = seed
+
+    def base_of(self, clinic):
+        return self.bases[clinic % len(self.bases)]
+
+    def home_url(self, clinic):
+        return f"{self.base_of(clinic)}/clinica/{clinic}"
+
+    def contact_url(self, clinic):
+        return f"{self.base_of(clinic)}/clinica/{clinic}/contato"
+
+    def directory_urls(self):
+        pages = (self.clinics + self.per_directory - 1) // self.per_directory
+        return [f"{self.bases[0]}/diretorio/{page}" for page in range(pages)]
+
+    def _padding(self, rng):
+        # Texto até o tamanho pedido, como o conteúdo real de uma página
+        repeats = max(0, self.page_kb * 1024 // len(FILLER))
+        return ''.join(f"<p>{FILLER}</p>" for _ in range(rng.randint(repeats // 2, repeats)))
+
+    def _page(self, title, body, rng):
+        return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title>"
+                f"<script>var tracking = {{}};</script></head><body>"
+                f"<nav><a href=\"/\">Início</a> <a href=\"/privacidade\">Privacidade</a></nav>"
+                f"{body}{self._padding(rng)}<footer>© Clínicas do Brasil</footer></body></html>").encode('utf-8')
+
+    def render(self, path):
+        """(status, corpo) da página do caminho"""
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        rng = random.Random(f"{self.seed}:{path}")
+
+        if len(parts) >= 2 and parts[0] == 'clinica' and parts[1].isdigit() and int(parts[1]) < self.clinics:
+            clinic = int(parts[1])
+            name = f"Clínica {SPECIALTIES[clinic % len(SPECIALTIES)]} {clinic}"
+            email = f"contato@clinica{clinic}.com.br"
+            if len(parts) == 2:
+                body = (f"<h1>{name}</h1><p>{SPECIALTIES[clinic % len(SPECIALTIES)]} e clínica geral.</p>"
+                        f"<a href=\"/clinica/{clinic}/contato\">Fale conosco</a> "
+                        f"<a href=\"/clinica/{clinic}/equipe\">Nossa equipe</a>")
+                if rng.random() < self.email_on_home:
+                    body += f"<p>{email}</p>"
+                return 200, self._page(name, body, rng)
+            if parts[2] == 'contato':
+                body = f"<h1>{name}</h1><h2>Contato</h2><p>Email: {email}</p><p>Tel: (11) 3000-{clinic:04d}</p>"
+                return 200, self._page(f"Contato - {name}", body, rng)
+            if parts[2] == 'equipe':
+                body = f"<h1>{name}</h1><h2>Corpo clínico</h2><p>Dr. Silva, Dra. Souza</p>"
+                return 200, self._page(f"Equipe - {name}", body, rng)
+
+        if len(parts) == 2 and parts[0] == 'diretorio' and parts[1].isdigit():
+            first = int(parts[1]) * self.per_directory
+            links = ''.join(
+                f"<li><a href=\"{self.home_url(clinic)}\">Clínica {SPECIALTIES[clinic % len(SPECIALTIES)]} "
+                f"{clinic}</a></li>"
+                for clinic in range(first, min(first + self.per_directory, self.clinics))
+            )
+            return 200, self._page("Diretório de clínicas médicas", f"<h1>Diretório</h1><ul>{links}</ul>", rng)
+
+        return 404, b"<html><body>Not found</body></html>"
+
+
+class SyntheticServer:
+    """Servidores HTTP/1.1 (keep-alive) locais, um por host simulado
+
+    Usa 127.0.0.1, 127.0.0.2, ... quando o sistema permite (cada host tem seu
+    próprio domínio para o crawler); senão, portas diferentes em 127.0.0.1.
+    """
+
+    def __init__(self, hosts=8, latency_ms=20, jitter_ms=10, error_rate=0.0, drop_rate=0.0, seed=42):
+        self.hosts = hosts
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.site = None
+        self.bases = []
+        self.served = 0
+        self._servers = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.served += 1
+                    roll = server._rng.random()
+                    delay = max(0.0, server.latency + server._rng.uniform(-server.jitter, server.jitter))
+                time.sleep(delay)
+
+                if roll < server.drop_rate:
+                    # Conexão derrubada sem resposta
+                    self.close_connection = True
+                    return
+                if roll < server.drop_rate + server.error_rate:
+                    status, body = 503, b"Service Unavailable"
+                else:
+                    status, body = server.site.render(self.path)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def _bind(self, index, handler):
+        try:
+            return ThreadingHTTPServer((f"127.0.0.{index + 1}", 0), handler)
+        except OSError:
+            return ThreadingHTTPServer(("127.0.0.1", 0), handler)
+
+    def start(self, site_factory):
+        handler = self._handler()
+        for index in range(self.hosts):
+            httpd = self._bind(index, handler)
+            httpd.daemon_threads = True
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            host, port = httpd.server_address[:2]
+            self.bases.append(f"http://{host}:{port}")
+            self._servers.append(httpd)
+        self.site = site_factory(self.bases)
+        return self
+
+    def stop(self):
+        for httpd in self._servers:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def cpu_seconds():
+    """CPU do processo e dos processos filhos já encerrados (pool de parsing)"""
+    total = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += children.ru_utime + children.ru_stime
+    return total
+
+
+def watch_session(session, latencies):
+    """Registra a latência (até os cabeçalhos) de cada página buscada pela sessão"""
+    def hook(response, *args, **kwargs):
+        if not response.url.endswith('/robots.txt'):
+            latencies.append(response.elapsed.total_seconds())
+    session.hooks['response'].append(hook)
+
+
+def run_target(target, homes, contacts, directories, workdir, results):
+    """Executa um scraper em processo próprio (o pico de RSS fica isolado)"""
+    import logging
+    # Antes dos scrapers: o basicConfig deles vira no-op e nada vai para arquivos;
+    # as falhas injetadas não poluem a tabela
+    logging.basicConfig(level=logging.CRITICAL)
+    os.chdir(workdir)
+
+    from config import CACHE_CONFIG, SETTINGS
+    CACHE_CONFIG['enabled'] = False
+    SETTINGS['delay_between_requests'] = 0
+
+    latencies = []
+    urls = homes + contacts
+    started_cpu, started = cpu_seconds(), time.perf_counter()
+    try:
+        if target == 'pipeline':
+            import requests
+            from fetch_engine import AsyncFetchEngine
+            from http_transport import configure_session
+            from parse_pool import ParsePool
+
+            session = configure_session(requests.Session())
+            watch_session(session, latencies)
+            engine = AsyncFetchEngine(session)
+            pool = ParsePool()
+            found = []
+
+            async def handle(url, response, error):
+                if response is not None:
+                    page = await pool.extract_async(response.content, response.headers.get('Content-Type'), url=response.url)
+                    if page and page.emails:
+                        found.append(url)
+
+            engine.crawl(urls, handle)
+            engine.close()
+            pool.close()
+            emails = len(found)
+        elif target == 'advanced':
+            from advanced_clinic_scraper import AdvancedClinicScraper
+            scraper = AdvancedClinicScraper(output_dir=workdir)
+            watch_session(scraper.session, latencies)
+            # Lista de URLs pelo motor da classe (o modo por site para no
+            # primeiro contato de cada domínio, e aqui há poucos domínios)
+            scraper.scrape_urls(urls, 'benchmark')
+            scraper.parse_pool.close()
+            emails = scraper.results.results
+        elif target == 'directory':
+            from advanced_clinic_scraper import AdvancedClinicScraper
+            scraper = AdvancedClinicScraper(output_dir=workdir)
+            watch_session(scraper.session, latencies)
+            # Crawl best-first a partir das páginas de diretório
+            scraper.medical_directories = directories
+            scraper.scrape_medical_directories()
+            scraper.parse_pool.close()
+            emails = scraper.results.results
+        elif target == 'email':
+            from clinic_email_scraper import ClinicEmailScraper
+            scraper = ClinicEmailScraper(output_dir=workdir)
+            watch_session(scraper.session, latencies)
+            scraper.scrape_urls(urls, render=False)
+            scraper.parse_pool.close()
+            emails = scraper.results.results
+        elif target == 'simple':
+            from simple_clinic_scraper_no_pandas import SimpleClinicScraperNoPandas
+            scraper = SimpleClinicScraperNoPandas()
+            watch_session(scraper.session, latencies)
+            emails = sum(1 for url in urls if scraper.extract_emails_from_url(url))
+        else:
+            raise ValueError(f"alvo desconhecido: {target}")
+    except ImportError as e:
+        results.put({'target': target, 'skipped': str(e)})
+        return
+    except Exception as e:
+        # Sem o resultado o processo principal ficaria esperando
+        results.put({'target': target, 'error': f"{type(e).__name__}: {e}"})
+        return
+
+    elapsed = time.perf_counter() - started
+    cpu = cpu_seconds() - started_cpu
+    pages = len(latencies)
+    results.put({
+        'target': target,
+        'pages': pages,
+        'results': emails,
+        'seconds': elapsed,
+        'pages_per_sec': pages / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'cpu_ms_per_page': cpu / pages * 1000 if pages else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    })
+
+
+def run_isolated(target, homes, contacts, directories, workdir):
+    """Roda o alvo em um processo novo ('spawn') e devolve suas métricas"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_target, args=(target, homes, contacts, directories, workdir, results))
+    process.start()
+    try:
+        while True:
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+            # O processo terminou sem mandar o resultado (ex.: morto por falta de memória);
+            # um resultado posto logo antes de sair ainda pode estar a caminho
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                return {'target': target, 'error': f"processo encerrado com código {process.exitcode}"}
+    finally:
+        process.join()
+
+
+def compare(report, baseline_file, tolerance):
+    """Compara páginas/s com um relatório anterior; retorna os alvos que pioraram"""
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = {row['target']: row for row in json.load(f)['targets'] if 'pages_per_sec' in row}
+
+    regressions = []
+    for row in report['targets']:
+        previous = baseline.get(row['target'])
+        if not previous or 'pages_per_sec' not in row:
+            continue
+        change = row['pages_per_sec'] / previous['pages_per_sec'] - 1 if previous['pages_per_sec'] else 0.0
+        mark = "❌" if change < -tolerance else "✅"
+        print(f"{mark} {row['target']:<10} {previous['pages_per_sec']:>9.1f} -> {row['pages_per_sec']:>9.1f} "
+              f"páginas/s ({change:+.0%})")
+        if change < -tolerance:
+            regressions.append(row['target'])
+    return regressions
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark offline dos scrapers contra um site sintético local")
+    parser.add_argument('--targets', default=','.join(TARGETS),
+                        help=f"Alvos separados por vírgula ({', '.join(TARGETS)})")
+    parser.add_argument('--clinics', type=int, default=500, help="Número de clínicas geradas")
+    parser.add_argument('--hosts', type=int, default=8, help="Hosts simulados")
+    parser.add_argument('--latency-ms', type=float, default=20, help="Latência média de cada resposta")
+    parser.add_argument('--jitter-ms', type=float, default=10, help="Variação da latência (+/-)")
+    parser.add_argument('--page-kb', type=int, default=20, help="Tamanho aproximado das páginas")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas 503")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Fração de conexões derrubadas sem resposta")
+    parser.add_argument('--json', help="Grava o relatório neste arquivo")
+    parser.add_argument('--baseline', help="Relatório anterior (--json) para comparar páginas/s")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Queda de páginas/s aceita antes de falhar")
+    args = parser.parse_args()
+
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"alvos desconhecidos: {', '.join(sorted(unknown))}")
+
+    server = SyntheticServer(args.hosts, args.latency_ms, args.jitter_ms, args.error_rate, args.drop_rate)
+    server.start(lambda bases: SyntheticSite(args.clinics, bases, args.page_kb))
+    site = server.site
+    homes = [site.home_url(clinic) for clinic in range(args.clinics)]
+    contacts = [site.contact_url(clinic) for clinic in range(args.clinics)]
+
+    print(f"🏥 Site sintético: {args.clinics} clínicas em {args.hosts} hosts, ~{args.page_kb} KB/página, "
+          f"latência {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, "
+          f"{args.error_rate:.0%} de 503, {args.drop_rate:.0%} de conexões derrubadas")
+    print("-" * 86)
+    print(f"{'Alvo':<10}{'páginas':>9}{'achados':>9}{'páginas/s':>11}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'CPU ms/pág':>12}{'RSS MB':>9}{'tempo s':>9}")
+
+    report = {'config': vars(args), 'targets': []}
+    try:
+        for target in targets:
+            with tempfile.TemporaryDirectory(prefix=f"bench_{target}_") as workdir:
+                row = run_isolated(target, homes, contacts, site.directory_urls(), workdir)
+            report['targets'].append(row)
+            if 'skipped' in row:
+                print(f"{target:<10}  pulado: {row['skipped']}")
+                continue
+            if 'error' in row:
+                print(f"{target:<10}  ❌ erro: {row['error']}")
+                continue
+            print(f"{target:<10}{row['pages']:>9}{row['results']:>9}{row['pages_per_sec']:>11.1f}"
+                  f"{row['p50_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['cpu_ms_per_page']:>12.2f}"
+                  f"{row['peak_rss_mb']:>9.1f}{row['seconds']:>9.1f}")
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Relatório salvo em {args.json}")
+
+    if args.baseline:
+        print()
+        if compare(report, args.baseline, args.tolerance):
+            return 1
+    if any('error' in row for row in report['targets']):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
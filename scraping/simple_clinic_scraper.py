@@ -7,12 +7,16 @@ Versão mais direta e rápida
 
 import requests
 import re
-import time
 import pandas as pd
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import logging
 
+from adaptive_timeouts import AdaptiveTimeouts, fetch_page
+from config import ROBOTS_CONFIG
+from host_scheduler import HostScheduler
+from page_extractor import extract_page
+from robots_cache import RobotsCache
+
 # Configuração básica de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
@@ -28,30 +32,41 @@ class SimpleClinicScraper:
         self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
         self.results = []
         
+        # Intervalo mínimo entre requisições ao mesmo host
+        self.scheduler = HostScheduler()
+        
+        # robots.txt: URLs proibidas são puladas e o Crawl-delay aumenta o intervalo do host
+        self.robots = RobotsCache(self.session, self.scheduler) if ROBOTS_CONFIG['enabled'] else None
+        
+        # Timeouts de conexão/leitura ajustados à latência de cada host
+        self.timeouts = AdaptiveTimeouts()
+        
     def extract_emails_from_url(self, url):
         """Extrai emails de uma URL específica"""
         try:
-            response = self.session.get(url, timeout=10)
+            if self.robots and not self.robots.allowed(url):
+                logging.info(f"Bloqueada pelo robots.txt: {url}")
+                return None
+            self.scheduler.wait(url)
+            response = fetch_page(self.session, url, self.timeouts)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove scripts e styles
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            text = soup.get_text()
-            emails = self.email_pattern.findall(text)
+            # Uma única passagem pelo HTML (scripts e styles ignorados)
+            page = extract_page(
+                response.content,
+                response.headers.get('Content-Type'),
+                email_patterns=(self.email_pattern,)
+            )
+            emails = page.emails
             
             if emails:
                 # Tenta extrair o nome da clínica
-                title = soup.find('title')
-                clinic_name = title.get_text().strip() if title else "Nome não encontrado"
+                clinic_name = page.title if page.title is not None else "Nome não encontrado"
                 
                 return {
                     'url': url,
                     'clinic_name': clinic_name,
-                    'emails': list(set(emails))  # Remove duplicatas
+                    'emails': emails  # Já sem duplicatas
                 }
             
             return None
@@ -80,8 +95,6 @@ class SimpleClinicScraper:
                     self.results.append(result)
                     logging.info(f"Encontrado: {result['clinic_name']} - {len(result['emails'])} emails")
                 
-                time.sleep(2)  # Delay entre requisições
-                
             except Exception as e:
                 logging.error(f"Erro ao processar {site}: {e}")
     
@@ -112,8 +125,6 @@ class SimpleClinicScraper:
                 if result:
                     self.results.append(result)
                     logging.info(f"Encontrado: {result['clinic_name']} - {len(result['emails'])} emails")
-                
-                time.sleep(1)
     
     def save_results(self, filename="clinicas_emails.xlsx"):
         """Salva os resultados em Excel"""
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Descoberta de URLs por Sitemaps
+Lê as linhas Sitemap do robots.txt e os arquivos sitemap.xml / índices de
+sitemap (inclusive .gz grandes, sem carregar tudo na memória) e devolve só
+as URLs com cara de perfil de clínica ou página de contato
+"""
+
+import gzip
+import io
+import logging
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin
+
+from config import SITEMAP_CONFIG
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def local_name(tag):
+    """Nome da tag sem o namespace ({http://www.sitemaps.org/...}loc -> loc)"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def sitemap_lines(robots_txt):
+    """URLs declaradas nas linhas 'Sitemap:' de um robots.txt"""
+    sitemaps = []
+    for line in robots_txt.splitlines():
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'sitemap' and value.strip():
+            sitemaps.append(value.strip())
+    return sitemaps
+
+
+def iter_sitemap(stream):
+    """Percorre um sitemap em streaming: ('sitemap', loc) de índices e ('url', loc) de urlsets"""
+    root = None
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+
+        name = local_name(elem.tag)
+        if name in ('url', 'sitemap'):
+            for child in elem:
+                if local_name(child.tag) == 'loc' and child.text:
+                    yield name, child.text.strip()
+                    break
+            # Libera os elementos já lidos (sitemaps podem ter 50 mil URLs)
+            elem.clear()
+            root.clear()
+
+
+class SitemapDiscovery:
+    """Encontra URLs promissoras de um site pelos seus sitemaps
+
+    As URLs são pontuadas com o mesmo LinkScorer do crawler (caminho com
+    contato, equipe, clínica, especialidades...) antes de qualquer busca.
+    """
+
+    def __init__(self, session, scorer, scheduler=None, robots=None, max_sitemaps=None, max_urls=None,
+                 min_score=None):
+        self.session = session
+        self.scorer = scorer
+        self.scheduler = scheduler
+        self.robots = robots
+        self.max_sitemaps = max_sitemaps or SITEMAP_CONFIG['max_sitemaps']
+        self.max_urls = max_urls or SITEMAP_CONFIG['max_urls_per_site']
+        self.min_score = SITEMAP_CONFIG['min_score'] if min_score is None else min_score
+        self.timeout = SITEMAP_CONFIG['timeout']
+
+    def _get(self, url, stream=False):
+        if self.scheduler:
+            self.scheduler.wait(url)
+        response = self.session.get(url, timeout=self.timeout, stream=stream)
+        response.raise_for_status()
+        return response
+
+    def sitemap_urls(self, site_url):
+        """Sitemaps do site: os do robots.txt ou, se não houver, os caminhos padrão"""
+        if self.robots:
+            # Reaproveita o robots.txt já lido para as regras de acesso
+            sitemaps = self.robots.sitemaps(site_url)
+        else:
+            try:
+                sitemaps = sitemap_lines(self._get(urljoin(site_url, '/robots.txt')).text)
+            except Exception as e:
+                logging.debug(f"robots.txt indisponível em {site_url}: {e}")
+                sitemaps = []
+        return sitemaps or [urljoin(site_url, path) for path in SITEMAP_CONFIG['fallback_paths']]
+
+    def _open(self, url):
+        """Abre o sitemap como um arquivo, descompactando .gz em streaming"""
+        response = self._get(url, stream=True)
+        # Content-Encoding: gzip é tratado pelo urllib3; arquivos .gz servidos
+        # como application/gzip chegam compactados e são abertos aqui
+        response.raw.decode_content = True
+        # Sem isso o urllib3 fecha o raw no fim dos dados e o buffer falha na última leitura
+        response.raw.auto_close = False
+        stream = io.BufferedReader(response.raw, buffer_size=64 * 1024)
+        if stream.peek(2)[:2] == GZIP_MAGIC:
+            return response, gzip.GzipFile(fileobj=stream)
+        return response, stream
+
+    def discover(self, site_url):
+        """Gera (url, pontuação) das URLs dos sitemaps que valem a busca"""
+        pending = self.sitemap_urls(site_url)
+        seen = set()
+        found = 0
+        read = 0
+
+        while pending and len(seen) < self.max_sitemaps and found < self.max_urls:
+            sitemap = pending.pop(0)
+            if sitemap in seen:
+                continue
+            seen.add(sitemap)
+
+            try:
+                response, stream = self._open(sitemap)
+                try:
+                    for kind, loc in iter_sitemap(stream):
+                        if kind == 'sitemap':
+                            pending.append(loc)
+                            continue
+                        read += 1
+                        if not self.scorer.should_follow(loc):
+                            continue
+                        score = self.scorer.score(loc)
+                        if score >= self.min_score and (not self.robots or self.robots.allowed(loc)):
+                            found += 1
+                            yield loc, score
+                            if found >= self.max_urls:
+                                break
+                finally:
+                    response.close()
+            except Exception as e:
+                logging.warning(f"Erro ao ler sitemap {sitemap}: {e}")
+
+        logging.info(f"Sitemaps de {site_url}: {len(seen)} arquivos, {read} URLs lidas, {found} selecionadas")
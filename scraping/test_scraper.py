@@ -110,6 +110,460 @@ def test_email_extraction():
         print(f"   Encontrado: {emails}")
         return False
 
+def test_page_extractor():
+    """Testa o extrator de páginas em passagem única"""
+    print("\n🔍 Testando extrator de páginas...")
+    
+    from page_extractor import extract_page
+    
+    html = """
+    <html><head><title>Clínica Exemplo</title>
+    <meta property="og:title" content="Clínica Exemplo SP">
+    <script>var email = "js@script.com";</script></head>
+    <body><nav><a href="/contato">Contato</a></nav>
+    <h1>Clínica &amp; Consultório Exemplo</h1>
+    <p>Email: contato@clinicaexemplo.com.br</p>
+    <footer>rodape@clinicaexemplo.com.br</footer></body></html>
+    """
+    
+    page = extract_page(html.encode('utf-8'), exclude_tags=('nav', 'footer'))
+    checks = [
+        page.title == 'Clínica Exemplo',
+        page.h1 == 'Clínica & Consultório Exemplo',
+        page.og_title == 'Clínica Exemplo SP',
+        page.emails == ['contato@clinicaexemplo.com.br'],
+        page.links == [('/contato', 'Contato')],
+        page.clinic_name() == 'Clínica & Consultório Exemplo',
+    ]
+    
+    if all(checks):
+        print("✅ Extrator de páginas - OK")
+        return True
+    else:
+        print("❌ Extrator de páginas - ERRO")
+        print(f"   Verificações: {checks}")
+        return False
+
+def test_keyword_matcher():
+    """Testa o buscador de palavras-chave (sem acento e com contagem)"""
+    print("\n🔍 Testando buscador de palavras-chave...")
+    
+    from keyword_matcher import KeywordMatcher
+    
+    matcher = KeywordMatcher(['clínica', 'cardiologia', 'dr.'])
+    text = "CLINICA de Cardiologia - Dr. João e Dra. Maria. Clínica aberta."
+    counts = matcher.counts(text)
+    expected = {'clínica': 2, 'cardiologia': 1, 'dr.': 1}
+    
+    if counts == expected and matcher.matches("clinica") and not matcher.matches("padaria"):
+        print("✅ Buscador de palavras-chave - OK")
+        return True
+    else:
+        print("❌ Buscador de palavras-chave - ERRO")
+        print(f"   Esperado: {expected}")
+        print(f"   Encontrado: {counts}")
+        return False
+
+def test_url_canonicalization():
+    """Testa se variações da mesma URL são tratadas como uma só"""
+    print("\n🔍 Testando canonicalização de URLs...")
+    
+    from url_canon import canonical_url, url_key
+    
+    variants = [
+        "https://clinica.com.br/contato",
+        "http://www.clinica.com.br/contato/",
+        "HTTPS://CLINICA.com.br:443/contato#horarios",
+        "https://clinica.com.br/contato?utm_source=google&utm_medium=cpc",
+    ]
+    keys = {url_key(url) for url in variants}
+    
+    if len(keys) == 1 and canonical_url(variants[3]) == variants[0]:
+        print("✅ Canonicalização de URLs - OK")
+        return True
+    else:
+        print("❌ Canonicalização de URLs - ERRO")
+        print(f"   Chaves: {keys}")
+        return False
+
+def test_sitemap_parsing():
+    """Testa a leitura em streaming de sitemaps compactados"""
+    print("\n🔍 Testando leitura de sitemaps...")
+    
+    import gzip
+    import io
+    from sitemap_discovery import iter_sitemap, sitemap_lines
+    
+    xml = (
+        '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        '<url><loc>https://clinica.com.br/contato</loc></url>'
+        '<url><loc> https://clinica.com.br/equipe </loc><lastmod>2024-01-01</lastmod></url>'
+        '</urlset>'
+    )
+    stream = gzip.GzipFile(fileobj=io.BytesIO(gzip.compress(xml.encode('utf-8'))))
+    entries = list(iter_sitemap(stream))
+    robots = "User-agent: *\nSitemap: https://clinica.com.br/sitemap_index.xml\n"
+    
+    expected = [('url', 'https://clinica.com.br/contato'), ('url', 'https://clinica.com.br/equipe')]
+    if entries == expected and sitemap_lines(robots) == ['https://clinica.com.br/sitemap_index.xml']:
+        print("✅ Leitura de sitemaps - OK")
+        return True
+    else:
+        print("❌ Leitura de sitemaps - ERRO")
+        print(f"   Entradas: {entries}")
+        return False
+
+def test_host_breaker():
+    """Testa se um host morto passa a falhar na hora e é testado de novo depois"""
+    print("\n🔍 Testando disjuntor por host...")
+    
+    import time
+    from host_breaker import HostBreaker, HostUnavailable
+    
+    breaker = HostBreaker(threshold=2, reset_after=0.05)
+    url = "https://clinica-fechada.com.br/contato"
+    for _ in range(2):
+        breaker.check(url)
+        breaker.record_failure(url)
+    
+    try:
+        breaker.check(url)
+        fast_fail = False
+    except HostUnavailable:
+        fast_fail = True
+    
+    time.sleep(0.06)
+    breaker.check(url)  # tentativa de teste (meio-aberto)
+    breaker.record_success(url)
+    
+    if fast_fail and not breaker.is_open(url):
+        print("✅ Disjuntor por host - OK")
+        return True
+    else:
+        print("❌ Disjuntor por host - ERRO")
+        return False
+
+def test_crawl_metrics():
+    """Testa os histogramas por etapa e a exportação no formato do Prometheus"""
+    print("\n🔍 Testando métricas do pipeline...")
+    
+    from crawl_metrics import Metrics
+    
+    metrics = Metrics(top_hosts=1)
+    metrics.observe('download', 0.02)
+    metrics.observe('download', 0.3)
+    metrics.inc('scraper_http_responses_total', status=200)
+    metrics.host_error('clinica-a.com.br', 'timeout')
+    metrics.host_error('clinica-a.com.br', 'timeout')
+    metrics.host_error('clinica-b.com.br', 'connection')
+    
+    text = metrics.to_prometheus()
+    summary = metrics.summary()
+    expected = [
+        'scraper_stage_seconds_bucket{stage="download",le="0.025"} 1',
+        'scraper_stage_seconds_count{stage="download"} 2',
+        'scraper_http_responses_total{status="200"} 1',
+        'scraper_host_errors_total{host="clinica-a.com.br",kind="timeout"} 2',
+    ]
+    
+    if (all(line in text.splitlines() for line in expected) and 'clinica-b.com.br' not in text
+            and summary['stages']['download']['count'] == 2 and summary['counters']['errors']['timeout'] == 2):
+        print("✅ Métricas do pipeline - OK")
+        return True
+    else:
+        print("❌ Métricas do pipeline - ERRO")
+        return False
+
+def test_page_fingerprint():
+    """Testa o reconhecimento de páginas repetidas e do mesmo modelo antes do parsing"""
+    print("\n🔍 Testando duplicatas de páginas...")
+    
+    from page_fingerprint import DuplicateFilter
+    
+    nav = ''.join(f'<li><a href="/especialidade/{i}">Especialidade {i}</a></li>' for i in range(40))
+    
+    def profile(name, email='contato@rede-saude.com.br'):
+        return (f'<html><head><title>{name} - Rede Saúde</title></head><body><nav><ul>{nav}</ul></nav>'
+                f'<h1>{name}</h1><a href="contato">Contato</a><p>Consultas e exames.</p>'
+                f'<footer>{email}</footer></body></html>').encode()
+    
+    duplicates = DuplicateFilter(min_similarity=0.85)
+    fingerprint, page, skip = duplicates.check(profile('Clínica Vida'), 'https://rede-saude.com.br/vida/')
+    duplicates.add(fingerprint, 'extraída')
+    
+    exact = duplicates.check(profile('Clínica Vida'), 'https://rede-saude.com.br/vida/?ref=busca')
+    near = duplicates.check(profile('Clínica Bem Estar'), 'https://rede-saude.com.br/vida/sobre')
+    new_email = duplicates.check(profile('Clínica Nova', 'agenda@clinicanova.com.br'),
+                                 'https://rede-saude.com.br/vida/')
+    # O link relativo 'contato' aponta para outra página: precisa ser extraída
+    new_link = duplicates.check(profile('Clínica Bem Estar'), 'https://rede-saude.com.br/bem-estar/')
+    
+    if (exact[1] == 'extraída' and near[2] and not new_email[2] and new_email[1] is None
+            and not new_link[2] and new_link[1] is None):
+        print("✅ Duplicatas de páginas - OK")
+        return True
+    else:
+        print("❌ Duplicatas de páginas - ERRO")
+        return False
+
+def test_page_archive():
+    """Testa a gravação das respostas em segmentos WARC e a releitura pelo índice"""
+    print("\n🔍 Testando arquivo de páginas...")
+    
+    import tempfile
+    from requests.structures import CaseInsensitiveDict
+    from page_archive import PageArchive
+    
+    def response(url, body):
+        page = requests.Response()
+        page.url = url
+        page.status_code = 200
+        page.reason = 'OK'
+        page.headers = CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8', 'Content-Encoding': 'gzip'})
+        page._content = body
+        return page
+    
+    with tempfile.TemporaryDirectory() as directory:
+        # Segmentos minúsculos: cada registro abre um segmento novo
+        archive = PageArchive(directory, segment_mb=0.0001)
+        archive.write('https://clinica-a.com.br/', response('https://clinica-a.com.br/', '<p>Versão 1</p>'.encode()))
+        archive.write('https://clinica-b.com.br/', response('https://clinica-b.com.br/', b'<p>contato@b.com.br</p>'))
+        archive.write('https://clinica-a.com.br/', response('https://clinica-a.com.br/', '<p>Versão 2</p>'.encode()))
+        
+        entries = archive.entries()
+        latest = archive.get('https://clinica-a.com.br/')
+        known = archive.contains('https://clinica-b.com.br/') and not archive.contains('https://clinica-c.com.br/')
+        segments = [name for name in os.listdir(directory) if name.endswith('.warc.gz')]
+        archive.close()
+    
+    if (len(entries) == 2 and len(segments) == 3 and known and latest.content == '<p>Versão 2</p>'.encode()
+            and 'Content-Encoding' not in latest.headers and latest.headers['Content-Type'].startswith('text/html')):
+        print("✅ Arquivo de páginas - OK")
+        return True
+    else:
+        print("❌ Arquivo de páginas - ERRO")
+        return False
+
+def test_work_queue():
+    """Testa a divisão da fila em shards entre workers e a volta de tarefas de um worker caído"""
+    print("\n🔍 Testando fila de trabalho compartilhada...")
+    
+    import tempfile
+    import time
+    from work_queue import WorkQueue
+    
+    with tempfile.TemporaryDirectory() as queue_dir:
+        queue = WorkQueue(queue_dir, shards=8, lease_seconds=0.5)
+        urls = [f"https://clinica{i}.com.br/" for i in range(20)]
+        queue.push_many(urls + urls[:5], 'site', 'csv')
+        
+        queue.heartbeat('w1')
+        queue.heartbeat('w2')
+        queue.claim_shards('w1')
+        first = {url for _, url, _, _ in queue.lease('w1', 100)}
+        queue.claim_shards('w2')
+        second = {url for _, url, _, _ in queue.lease('w2', 100)}
+        
+        # w1 cai sem concluir: depois do prazo suas tarefas voltam a ficar visíveis
+        time.sleep(0.6)
+        queue.claim_shards('w2')
+        recovered = queue.lease('w2', 100)
+        queue.complete('w2', [key for key, _, _, _ in recovered])
+        counts = queue.counts()
+        queue.close()
+    
+    recovered = {url for _, url, _, _ in recovered}
+    if (first and second and not first & second and first <= recovered
+            and counts == {'done': 20}):
+        print("✅ Fila de trabalho compartilhada - OK")
+        return True
+    else:
+        print("❌ Fila de trabalho compartilhada - ERRO")
+        return False
+
+def run_queue_worker(queue_dir, lease_seconds):
+    """Worker da fila num processo separado (o teste derruba o processo no meio do lote)"""
+    from config import CACHE_CONFIG, SETTINGS
+    from crawl_workers import CrawlWorker
+    from work_queue import WorkQueue
+    
+    SETTINGS['delay_between_requests'] = 0
+    CACHE_CONFIG['enabled'] = False
+    queue = WorkQueue(queue_dir, lease_seconds=lease_seconds)
+    CrawlWorker(queue, 'w1', output_dir=os.path.join(queue_dir, 'w1')).run()
+
+def test_work_queue_crash():
+    """Testa que a página inicial de um worker derrubado no meio do lote é buscada de novo"""
+    print("\n🔍 Testando worker derrubado no meio do lote...")
+    
+    import multiprocessing
+    import tempfile
+    import time
+    from config import CACHE_CONFIG, SETTINGS, WORKER_CONFIG
+    from crawl_workers import CrawlWorker
+    from scraper_benchmark import SyntheticServer, SyntheticSite
+    from work_queue import WorkQueue
+    
+    saved = (SETTINGS['delay_between_requests'], CACHE_CONFIG['enabled'], WORKER_CONFIG['poll_interval'])
+    SETTINGS['delay_between_requests'] = 0
+    CACHE_CONFIG['enabled'] = False
+    WORKER_CONFIG['poll_interval'] = 0.2
+    
+    server = SyntheticServer(hosts=1, latency_ms=300, jitter_ms=0).start(lambda bases: SyntheticSite(1, bases, page_kb=1))
+    paths = []
+    render = server.site.render
+    server.site.render = lambda path: paths.append(path) or render(path)
+    seed = server.site.home_url(0)
+    try:
+        with tempfile.TemporaryDirectory() as queue_dir:
+            queue = WorkQueue(queue_dir, shards=4, lease_seconds=2)
+            queue.push_many([seed], 'site', 'csv')
+            
+            # w1 cai assim que a página inicial é servida, sem concluir o lote
+            process = multiprocessing.get_context('spawn').Process(target=run_queue_worker, args=(queue_dir, 2))
+            process.start()
+            deadline = time.time() + 60
+            while '/clinica/0' not in paths and process.is_alive() and time.time() < deadline:
+                time.sleep(0.05)
+            process.kill()
+            process.join()
+            first = paths.count('/clinica/0')
+            
+            CrawlWorker(queue, 'w2', output_dir=os.path.join(queue_dir, 'w2')).run()
+            counts = queue.counts()
+            queue.close()
+    finally:
+        server.stop()
+        SETTINGS['delay_between_requests'], CACHE_CONFIG['enabled'], WORKER_CONFIG['poll_interval'] = saved
+    
+    if first == 1 and paths.count('/clinica/0') == 2 and counts == {'done': 1}:
+        print("✅ Worker derrubado no meio do lote - OK")
+        return True
+    else:
+        print("❌ Worker derrubado no meio do lote - ERRO")
+        print(f"   Caminhos servidos: {paths}, tarefas: {counts}")
+        return False
+
+def test_site_mode_stop():
+    """Testa que, em sites, o contato achado na página inicial evita as buscas seguintes do domínio"""
+    print("\n🔍 Testando parada antecipada por domínio...")
+    
+    import asyncio
+    from link_crawler import BestFirstCrawler, LinkScorer
+    from keyword_matcher import get_matcher
+    
+    class FakeEngine:
+        robots = None
+        
+        def __init__(self):
+            self.fetched = []
+        
+        def run(self, coroutine_function, *args):
+            return asyncio.run(coroutine_function(*args))
+        
+        async def fetch(self, url, timeout=None):
+            self.fetched.append(url)
+            # Latências diferentes: as páginas terminam em momentos diferentes
+            await asyncio.sleep(0.01 * (len(self.fetched) % 4 + 1))
+            return None
+    
+    async def handle_page(url, response, error):
+        # Parsing lento: as outras buscas terminam enquanto esta página é extraída
+        await asyncio.sleep(0.05)
+        crawler.satisfy(url)
+        return []
+    
+    engine = FakeEngine()
+    crawler = BestFirstCrawler(engine, LinkScorer(get_matcher(['clínica'])), handle_page,
+                               concurrency=4, site_mode=True)
+    crawler.crawl([f"https://clinica{i}.com.br/" for i in range(12)])
+    
+    if len(engine.fetched) == 12 and len(crawler.satisfied) == 12:
+        print("✅ Parada antecipada por domínio - OK")
+        return True
+    else:
+        print("❌ Parada antecipada por domínio - ERRO")
+        print(f"   Buscas: {len(engine.fetched)} para {len(crawler.satisfied)} domínios")
+        return False
+
+def test_crawl_resume():
+    """Testa que a fronteira do crawl best-first volta inteira ao retomar com --resume"""
+    print("\n🔍 Testando retomada da fronteira do crawl...")
+    
+    import asyncio
+    import tempfile
+    from requests.structures import CaseInsensitiveDict
+    from advanced_clinic_scraper import AdvancedClinicScraper
+    from config import CRAWLER_CONFIG
+    from crawl_state import CrawlState
+    
+    directory = 'https://diretorio.com.br/'
+    clinics = [f"https://diretorio.com.br/clinica/{i}" for i in range(10)]
+    links = ''.join(f'<a href="{url}">Clínica de Cardiologia {i}</a>' for i, url in enumerate(clinics))
+    pages = {directory: f"<html><body>{links}</body></html>".encode()}
+    
+    class FakeEngine:
+        """Motor sem rede; com `stop_after`, simula um Ctrl-C depois dessa quantidade de páginas"""
+        robots = None
+        
+        def __init__(self, stop_after=None):
+            self.stop_after = stop_after
+            self.fetched = []
+        
+        def run(self, coroutine_function, *args):
+            return asyncio.run(coroutine_function(*args))
+        
+        def crawl(self, urls, handler, timeout=None):
+            async def crawl():
+                for url in urls:
+                    await handler(url, await self.fetch(url), None)
+            asyncio.run(crawl())
+        
+        async def fetch(self, url, timeout=None):
+            if self.stop_after is not None and len(self.fetched) >= self.stop_after:
+                raise KeyboardInterrupt
+            self.fetched.append(url)
+            await asyncio.sleep(0)
+            response = requests.Response()
+            response.url = url
+            response.status_code = 200
+            response.headers = CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8'})
+            response._content = pages.get(url, b'<html><body><p>Sem contato</p></body></html>')
+            return response
+    
+    def run(output_dir, resume, engine):
+        state = CrawlState(output_dir, resume=resume)
+        scraper = AdvancedClinicScraper(crawl_state=state, output_dir=output_dir)
+        scraper.engine = engine
+        try:
+            scraper.resume_pending()
+            scraper.run_phase("diretorios", scraper.crawl_directories, [directory])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scraper.parse_pool.close()
+            scraper.results.close()
+            state.close()
+    
+    concurrency = CRAWLER_CONFIG['concurrency']
+    CRAWLER_CONFIG['concurrency'] = 2
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            first, second = FakeEngine(stop_after=3), FakeEngine()
+            run(output_dir, False, first)
+            run(output_dir, True, second)
+    finally:
+        CRAWLER_CONFIG['concurrency'] = concurrency
+    
+    if (len(first.fetched) == 3 and set(first.fetched) | set(second.fetched) == {directory, *clinics}
+            and directory not in second.fetched):
+        print("✅ Retomada da fronteira do crawl - OK")
+        return True
+    else:
+        print("❌ Retomada da fronteira do crawl - ERRO")
+        print(f"   Antes: {first.fetched}, depois: {second.fetched}")
+        return False
+
 def test_web_request():
     """Testa requisições web"""
     print("\n🔍 Testando requisições web...")
@@ -156,6 +610,32 @@ def test_file_creation():
         print(f"❌ Criação de arquivos - ERRO: {e}")
         return False
 
+def test_result_sink():
+    """Testa a gravação contínua dos resultados em CSV"""
+    print("\n🔍 Testando gravação dos resultados...")
+    
+    import csv
+    import tempfile
+    from result_sink import ResultSink
+    
+    with tempfile.TemporaryDirectory() as directory:
+        sink = ResultSink(os.path.join(directory, 'resultados'), ['URL', 'Email'], 'csv', flush_every=1)
+        result = {'url': 'https://exemplo.com', 'emails': ['a@clinica.com', 'b@clinica.com']}
+        sink.write(result, [{'URL': result['url'], 'Email': email} for email in result['emails']])
+        
+        # A linha já está no disco antes do close()
+        with open(sink.path, encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        filename = sink.close()
+    
+    if len(rows) == 2 and rows[1]['Email'] == 'b@clinica.com' and filename.endswith('.csv'):
+        print("✅ Gravação dos resultados - OK")
+        return True
+    else:
+        print("❌ Gravação dos resultados - ERRO")
+        print(f"   Linhas gravadas: {rows}")
+        return False
+
 def main():
     """Função principal de teste"""
     print("🧪 TESTE DO SCRAPER DE CLÍNICAS")
@@ -165,6 +645,19 @@ def main():
         test_dependencies,
         test_selenium,
         test_email_extraction,
+        test_page_extractor,
+        test_keyword_matcher,
+        test_result_sink,
+        test_url_canonicalization,
+        test_sitemap_parsing,
+        test_host_breaker,
+        test_crawl_metrics,
+        test_page_fingerprint,
+        test_page_archive,
+        test_work_queue,
+        test_work_queue_crash,
+        test_site_mode_stop,
+        test_crawl_resume,
         test_web_request,
         test_file_creation
     ]
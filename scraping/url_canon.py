@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Canonicalização de URLs
+Variações da mesma página (http/https, www., barra final, fragmento,
+parâmetros de rastreamento) viram uma única chave antes da checagem de visitadas
+"""
+
+import posixpath
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+try:
+    import tldextract
+    # Usa a lista de sufixos embutida no pacote (sem baixar nada da rede)
+    _tld_extract = tldextract.TLDExtract(suffix_list_urls=())
+except ImportError:
+    _tld_extract = None
+
+# Parâmetros de campanha/rastreamento que não mudam o conteúdo da página
+TRACKING_PARAMS = {
+    'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'srsltid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'ref_src', 'spm',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+
+# Nomes de página que equivalem ao diretório
+INDEX_PAGES = ('index.html', 'index.htm', 'index.php', 'default.aspx')
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# Sufixos de dois níveis mais comuns (usados quando tldextract não está instalado)
+SECOND_LEVEL_SUFFIXES = {
+    'com.br', 'net.br', 'org.br', 'med.br', 'odo.br', 'gov.br', 'edu.br', 'art.br',
+    'eco.br', 'emp.br', 'ind.br', 'inf.br', 'nom.br', 'psi.br', 'blog.br', 'adv.br',
+    'co.uk', 'org.uk', 'ac.uk', 'com.ar', 'com.mx', 'com.pt', 'com.co', 'co.jp', 'com.au',
+}
+
+
+def is_tracking_param(name):
+    """Verifica se o parâmetro da query só serve para rastreamento"""
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url):
+    """URL normalizada, ainda acessível (o esquema é mantido)"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url.strip()
+
+    try:
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    host = (parts.hostname or '').rstrip('.')
+    netloc = host
+    if port and str(port) != DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+
+    # Resolve ./ e ../, remove barras repetidas e a barra final
+    path = posixpath.normpath(parts.path) if parts.path else '/'
+    path = quote(path, safe="/:@!$&'()*+,;=-._~%")
+    if path.startswith('//'):
+        path = '/' + path.lstrip('/')
+    for index_page in INDEX_PAGES:
+        if path.endswith('/' + index_page):
+            path = path[:-len(index_page)]
+            break
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if not is_tracking_param(name)]
+    return urlunsplit((scheme, netloc, path or '/', urlencode(sorted(query)), ''))
+
+
+def url_key(url):
+    """Chave de deduplicação: URL canônica sem esquema e sem 'www.'"""
+    canonical = canonical_url(url)
+    _, _, rest = canonical.partition('://')
+    if rest.startswith('www.'):
+        rest = rest[4:]
+    return rest or canonical
+
+
+def registered_domain(url):
+    """Domínio registrado da URL (ex.: blog.clinica.com.br -> clinica.com.br)"""
+    host = (urlsplit(url).hostname or '').rstrip('.').lower()
+    if not host or host.replace('.', '').isdigit():
+        return host
+    if _tld_extract is not None:
+        return _tld_extract(host).registered_domain or host
+
+    labels = host.split('.')
+    if len(labels) > 2 and '.'.join(labels[-2:]) in SECOND_LEVEL_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
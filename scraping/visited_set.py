@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conjunto de URLs Visitadas
+Guarda as chaves canônicas das URLs; para crawls muito grandes pode usar um
+filtro de Bloom, que ocupa poucos bytes por URL com taxa de falso positivo
+configurável
+"""
+
+import hashlib
+import math
+
+from config import VISITED_CONFIG
+from url_canon import url_key
+
+
+class BloomFilter:
+    """Filtro de Bloom com um vetor de bits em bytearray"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # Tamanho ótimo do vetor e número de funções de hash
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Hash duplo: k posições a partir de dois valores de 64 bits
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key):
+        """Adiciona a chave; retorna False se ela (provavelmente) já estava lá"""
+        added = False
+        bits = self.bits
+        for p in self._positions(key):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __len__(self):
+        return self.count
+
+
+class ScalableBloomFilter:
+    """Sequência de filtros de Bloom que cresce quando o atual enche
+
+    Cada filtro novo tem o dobro da capacidade e metade da taxa de erro, de
+    modo que a taxa total fica abaixo de 2x a configurada.
+    """
+
+    def __init__(self, capacity=None, error_rate=None):
+        self.initial_capacity = capacity or VISITED_CONFIG['bloom_capacity']
+        self.error_rate = error_rate or VISITED_CONFIG['bloom_error_rate']
+        self.filters = [BloomFilter(self.initial_capacity, self.error_rate / 2)]
+
+    def __contains__(self, key):
+        return any(key in f for f in self.filters)
+
+    def add(self, key):
+        if key in self:
+            return False
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * 2, current.error_rate / 2)
+            self.filters.append(current)
+        return current.add(key)
+
+    def __len__(self):
+        return sum(len(f) for f in self.filters)
+
+    @property
+    def size_bytes(self):
+        return sum(len(f.bits) for f in self.filters)
+
+
+class VisitedSet:
+    """URLs visitadas em memória, comparadas pela chave canônica
+
+    Com `bloom=True` uma URL nunca vista pode, raramente (error_rate), ser
+    tomada como visitada e ficar de fora do crawl.
+    """
+
+    def __init__(self, bloom=None, capacity=None, error_rate=None):
+        bloom = VISITED_CONFIG['bloom_filter'] if bloom is None else bloom
+        self._keys = ScalableBloomFilter(capacity, error_rate) if bloom else set()
+
+    def __contains__(self, url):
+        return url_key(url) in self._keys
+
+    def add(self, url, source=None):
+        self._keys.add(url_key(url))
+
+    def __len__(self):
+        return len(self._keys)
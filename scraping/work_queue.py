@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fila de Trabalho Compartilhada entre Workers
+Fila em SQLite com shards por domínio, arrendamento (lease) de shards e de
+tarefas com prazo de visibilidade, para vários processos rodarem o crawl juntos
+"""
+
+import logging
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+
+from config import WORKER_CONFIG
+from url_canon import registered_domain, url_key
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def shard_of(url, shards):
+    """Shard da URL: hash estável do domínio registrado
+
+    Todas as páginas de um domínio (e, portanto, de um host) caem no mesmo
+    shard, e cada shard é processado por um único worker de cada vez, de modo
+    que o intervalo por host continua valendo mesmo com vários workers.
+    """
+    return zlib.crc32(registered_domain(url).encode('utf-8')) % shards
+
+
+def default_worker_name():
+    """Nome único do worker: máquina e PID"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class QueueVisited:
+    """Conjunto de URLs buscadas compartilhado por todos os workers da fila
+
+    Com `worker`, as URLs ficam provisórias até o worker concluir o lote:
+    se ele cair ou for interrompido no meio, elas são esquecidas junto com a
+    volta das tarefas, e quem arrendar o lote de novo busca as páginas outra vez.
+    """
+
+    def __init__(self, queue, worker=None):
+        self.queue = queue
+        self.worker = worker
+
+    def __contains__(self, url):
+        return self.queue.is_visited(url)
+
+    def add(self, url, source=None):
+        self.queue.mark_visited(url, source, self.worker)
+
+    def __len__(self):
+        return self.queue.count_visited()
+
+
+class WorkQueue:
+    """Fila de páginas iniciais (diretórios e sites) dividida em shards
+
+    Um worker arrenda shards (no máximo sua parte justa entre os workers
+    ativos) e, dentro deles, lotes de tarefas. Os arrendamentos vencem após
+    `lease_seconds` sem renovação: se o worker cair, seus shards e tarefas
+    voltam a ficar visíveis para os outros. Uma tarefa que derruba workers
+    `max_attempts` vezes é marcada como 'failed'.
+    """
+
+    def __init__(self, queue_dir, shards=None, lease_seconds=None, max_attempts=None,
+                 filename='work_queue.sqlite'):
+        os.makedirs(queue_dir, exist_ok=True)
+        self.path = os.path.join(queue_dir, filename)
+        self.lease_seconds = lease_seconds or WORKER_CONFIG['lease_seconds']
+        self.max_attempts = max_attempts or WORKER_CONFIG['max_attempts']
+
+        # Vários processos escrevem no mesmo arquivo: cada escrita é confirmada
+        # na hora e quem encontra o banco ocupado espera até `timeout`
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute(f"PRAGMA journal_mode={WORKER_CONFIG['journal_mode']}")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    source TEXT,
+                    shard INTEGER NOT NULL,
+                    score REAL NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker TEXT,
+                    lease_until REAL NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    added_at REAL NOT NULL
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_tasks_shard ON tasks (shard, status)")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS shards (
+                    shard INTEGER PRIMARY KEY,
+                    worker TEXT,
+                    lease_until REAL NOT NULL DEFAULT 0
+                )""")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS workers (
+                    name TEXT PRIMARY KEY,
+                    heartbeat REAL NOT NULL,
+                    tasks_done INTEGER NOT NULL DEFAULT 0
+                )""")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS visited (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    source TEXT,
+                    worker TEXT
+                )""")
+            # Filas criadas antes das visitas provisórias
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(visited)")]
+            if 'worker' not in columns:
+                self._db.execute("ALTER TABLE visited ADD COLUMN worker TEXT")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_visited_worker ON visited (worker)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+
+            # O número de shards é fixado por quem cria a fila
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'shards'").fetchone()
+            if row is None:
+                self.shards = shards or WORKER_CONFIG['shards']
+                self._db.execute("INSERT INTO meta (name, value) VALUES ('shards', ?)", (str(self.shards),))
+                self._db.executemany("INSERT INTO shards (shard) VALUES (?)",
+                                     ((shard,) for shard in range(self.shards)))
+            else:
+                self.shards = int(row[0])
+
+        self.visited = QueueVisited(self)
+
+    def _transaction(self):
+        return _Transaction(self._db, self._lock)
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def push(self, url, kind, source=None, score=0):
+        """Adiciona uma página inicial à fila; retorna False se ela já estava lá"""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO tasks (key, url, kind, source, shard, score, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url_key(url), url, kind, source, shard_of(url, self.shards), score, time.time())
+            )
+            return cursor.rowcount > 0
+
+    def push_many(self, urls, kind, source=None, score=0):
+        """Adiciona várias páginas iniciais numa única transação; retorna quantas eram novas"""
+        now = time.time()
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO tasks (key, url, kind, source, shard, score, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((url_key(url), url, kind, source, shard_of(url, self.shards), score, now)
+                 for url in urls if url)
+            )
+            return self._db.total_changes - before
+
+    def counts(self):
+        """Número de tarefas por status"""
+        return dict(self._read("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+
+    def active_workers(self):
+        """Workers com sinal de vida dentro do prazo do arrendamento: (nome, shards, tarefas concluídas)"""
+        now = time.time()
+        return self._read(
+            "SELECT w.name, (SELECT COUNT(*) FROM shards s WHERE s.worker = w.name AND s.lease_until > ?), "
+            "w.tasks_done FROM workers w WHERE w.heartbeat > ? ORDER BY w.name",
+            (now, now - self.lease_seconds)
+        )
+
+    def drained(self):
+        """Nenhuma tarefa pendente ou em andamento em nenhum worker"""
+        return not self._read("SELECT 1 FROM tasks WHERE status IN (?, ?) LIMIT 1", (PENDING, LEASED))
+
+    def heartbeat(self, worker):
+        """Renova o sinal de vida do worker e os arrendamentos dos seus shards e tarefas"""
+        now = time.time()
+        until = now + self.lease_seconds
+        with self._transaction():
+            self._db.execute(
+                "INSERT INTO workers (name, heartbeat) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (worker, now)
+            )
+            self._db.execute("UPDATE shards SET lease_until = ? WHERE worker = ? AND lease_until > ?",
+                             (until, worker, now))
+            self._db.execute("UPDATE tasks SET lease_until = ? WHERE worker = ? AND status = ? AND lease_until > ?",
+                             (until, worker, LEASED, now))
+
+    def claim_shards(self, worker):
+        """Arrenda shards com trabalho até a parte justa do worker; devolve os shards do worker
+
+        Shards do worker sem tarefas visíveis (nem do lote em andamento) são
+        devolvidos, para que outro worker possa pegá-los quando chegarem
+        tarefas novas (repasses).
+        """
+        self.heartbeat(worker)
+        now = time.time()
+        until = now + self.lease_seconds
+        with self._transaction():
+            active = self._db.execute("SELECT COUNT(*) FROM workers WHERE heartbeat > ?",
+                                      (now - self.lease_seconds,)).fetchone()[0]
+            # Parte justa: shards que ainda têm trabalho divididos pelos workers ativos
+            working = self._db.execute("SELECT COUNT(DISTINCT shard) FROM tasks WHERE status IN (?, ?)",
+                                       (PENDING, LEASED)).fetchone()[0]
+            share = max(math.ceil(working / max(active, 1)), 1)
+
+            visible = ("EXISTS (SELECT 1 FROM tasks t WHERE t.shard = shards.shard AND "
+                       "(t.status = 'pending' OR (t.status = 'leased' AND t.lease_until <= ?)))")
+            # Shards com tarefas do lote em andamento deste worker nunca são devolvidos:
+            # outro worker buscaria o mesmo domínio ao mesmo tempo
+            busy = {row[0] for row in self._db.execute(
+                "SELECT DISTINCT shard FROM tasks WHERE worker = ? AND status = ? AND lease_until > ?",
+                (worker, LEASED, now))}
+            idle = [row[0] for row in self._db.execute(
+                f"SELECT shard FROM shards WHERE worker = ? AND NOT {visible}", (worker, now))]
+            self._db.executemany("UPDATE shards SET worker = NULL, lease_until = 0 WHERE shard = ?",
+                                 ((shard,) for shard in idle if shard not in busy))
+
+            mine = [row[0] for row in self._db.execute(
+                "SELECT shard FROM shards WHERE worker = ? AND lease_until > ? ORDER BY shard", (worker, now))]
+            if len(mine) > share:
+                # Chegaram workers novos: o excedente volta para a fila de shards
+                extra = [shard for shard in mine if shard not in busy][:len(mine) - share]
+                mine = [shard for shard in mine if shard not in extra]
+                self._db.executemany("UPDATE shards SET worker = NULL, lease_until = 0 WHERE shard = ?",
+                                     ((shard,) for shard in extra))
+            elif len(mine) < share:
+                free = [row[0] for row in self._db.execute(
+                    f"SELECT shard FROM shards WHERE (worker IS NULL OR lease_until <= ?) AND {visible} "
+                    f"ORDER BY lease_until, shard LIMIT ?", (now, now, share - len(mine)))]
+                self._db.executemany("UPDATE shards SET worker = ?, lease_until = ? WHERE shard = ?",
+                                     ((worker, until, shard) for shard in free))
+                mine += free
+        return mine
+
+    def lease(self, worker, limit=None):
+        """Arrenda um lote de tarefas visíveis dos shards do worker: lista de (key, url, kind, source)"""
+        limit = limit or WORKER_CONFIG['batch_size']
+        now = time.time()
+        with self._transaction():
+            # Tarefas que já derrubaram workers demais não voltam para a fila
+            self._db.execute(
+                "UPDATE tasks SET status = ? WHERE status = ? AND lease_until <= ? AND attempts >= ?",
+                (FAILED, LEASED, now, self.max_attempts)
+            )
+            # Páginas buscadas por workers caídos no meio de um lote são buscadas de novo
+            self._db.execute(
+                "DELETE FROM visited WHERE worker IN (SELECT name FROM workers WHERE heartbeat <= ?)",
+                (now - self.lease_seconds,)
+            )
+            rows = self._db.execute(
+                "SELECT t.key, t.url, t.kind, t.source FROM tasks t JOIN shards s ON s.shard = t.shard "
+                "WHERE s.worker = ? AND s.lease_until > ? "
+                "AND (t.status = ? OR (t.status = ? AND t.lease_until <= ?)) "
+                "ORDER BY t.score DESC, t.rowid LIMIT ?",
+                (worker, now, PENDING, LEASED, now, limit)
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE tasks SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1 WHERE key = ?",
+                ((LEASED, worker, now + self.lease_seconds, row[0]) for row in rows)
+            )
+        return rows
+
+    def complete(self, worker, keys, status=DONE):
+        """Conclui tarefas arrendadas pelo worker (ignora as que já passaram para outro)"""
+        keys = list(keys)
+        with self._transaction():
+            self._db.executemany("UPDATE tasks SET status = ? WHERE key = ? AND worker = ? AND status = ?",
+                                 ((status, key, worker, LEASED) for key in keys))
+            self._db.execute("UPDATE workers SET tasks_done = tasks_done + ? WHERE name = ?", (len(keys), worker))
+            # O lote terminou: as páginas buscadas nele deixam de ser provisórias
+            self._db.execute("UPDATE visited SET worker = NULL WHERE worker = ?", (worker,))
+
+    def release(self, worker):
+        """Devolve shards e tarefas do worker (encerramento normal ou Ctrl-C)"""
+        with self._transaction():
+            self._db.execute("UPDATE tasks SET status = ?, lease_until = 0, attempts = MAX(attempts - 1, 0) "
+                             "WHERE worker = ? AND status = ?", (PENDING, worker, LEASED))
+            self._db.execute("UPDATE shards SET worker = NULL, lease_until = 0 WHERE worker = ?", (worker,))
+            self._db.execute("UPDATE workers SET heartbeat = 0 WHERE name = ?", (worker,))
+            self._db.execute("DELETE FROM visited WHERE worker = ?", (worker,))
+
+    def is_visited(self, url):
+        return bool(self._read("SELECT 1 FROM visited WHERE key = ?", (url_key(url),)))
+
+    def mark_visited(self, url, source=None, worker=None):
+        """Registra a URL como buscada (provisória, até o lote do worker terminar, se `worker` for informado)"""
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO visited (key, url, source, worker) VALUES (?, ?, ?, ?)",
+                             (url_key(url), url, source, worker))
+
+    def count_visited(self):
+        return self._read("SELECT COUNT(*) FROM visited")[0][0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK em caso de erro) sob o lock da conexão"""
+
+    def __init__(self, db, lock):
+        self.db = db
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.lock.release()
+            raise
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+        return False
+
+
+class LeaseKeeper:
+    """Thread que renova os arrendamentos do worker enquanto ele processa um lote"""
+
+    def __init__(self, queue, worker, interval=None):
+        self.queue = queue
+        self.worker = worker
+        self.interval = interval or max(queue.lease_seconds / 3, 1)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.queue.heartbeat(self.worker)
+            except sqlite3.Error as e:
+                logging.warning(f"Erro ao renovar arrendamentos de {self.worker}: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='lease-keeper', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()